@@ -0,0 +1,348 @@
+import hashlib
+import os
+import uuid
+
+import pandas as pd
+
+# Dimensions repositories are rolled up by
+DIMENSIONS = ('Year', 'Quarter', 'Language', 'Owner')
+
+# Columns whose per-group sums (and so means) are kept
+SUM_COLUMNS = ('Stars', 'Forks', 'Watchers', 'Issues')
+
+# Columns whose per-group value counts are kept, so medians stay exact
+MEDIAN_COLUMNS = ('Stars', 'Forks')
+
+# Dimensions whose medians are queried, by default the only ones value counts are
+# kept for; the tables of the others (Owner above all) grow with the number of rows
+MEDIAN_DIMENSIONS = ('Year', 'Quarter')
+
+STATISTICS = ('count', 'sum', 'mean', 'median')
+
+
+def _dimension_keys(data, dimensions=DIMENSIONS):
+    """
+    Return the group key of every row for each requested dimension the frame can be rolled up by.
+    """
+    keys = {}
+    if 'Date' in data.columns and ('Year' in dimensions or 'Quarter' in dimensions):
+        dates = pd.to_datetime(data['Date'])
+        if 'Year' in dimensions:
+            keys['Year'] = dates.dt.year.rename('Year')
+        if 'Quarter' in dimensions:
+            keys['Quarter'] = dates.dt.to_period('Q').rename('Quarter')
+    for dimension in ('Language', 'Owner'):
+        if dimension in dimensions and dimension in data.columns:
+            keys[dimension] = data[dimension].rename(dimension)
+    return keys
+
+
+def _add(left, right):
+    """
+    Merge two partial states by adding the values of equal groups.
+    """
+    if left is None:
+        return right
+    # Grouping the concatenation is much faster than aligning two MultiIndexes
+    merged = pd.concat([left, right])
+    return merged.groupby(level=list(range(merged.index.nlevels)), sort=False).sum().astype('int64')
+
+
+def _plain_index(index):
+    """
+    Turn a categorical group index into a plain one, so groups of different batches merge.
+    """
+    if isinstance(index, pd.CategoricalIndex):
+        return pd.Index(index.astype(object), name=index.name)
+    return index
+
+
+def _median(counts):
+    """
+    Compute the median of every group from a (key, value) -> count Series.
+
+    Matches pandas' median: the mean of the two middle values for even counts.
+    """
+    counts = counts[counts > 0].sort_index()
+    keys = counts.index.get_level_values(0)
+    values = counts.index.get_level_values(1).to_numpy(dtype=float)
+    frequencies = counts.to_numpy()
+    grouped = counts.groupby(level=0, sort=False)
+    cumulative = grouped.cumsum().to_numpy()
+    total = grouped.transform('sum').to_numpy()
+    start = cumulative - frequencies
+    middle = []
+    for position in ((total - 1) // 2, total // 2):
+        hit = (start <= position) & (position < cumulative)
+        middle.append(pd.Series(values[hit], index=keys[hit]))
+    return (middle[0] + middle[1]) / 2
+
+
+class AggregateStore:
+    """
+    Rollups of repository rows by year, quarter, language and owner.
+
+    For every group the store keeps the row count, the sums of the counters and,
+    for the median dimensions, the value counts of the median columns. All of these merge by addition, so
+    the store is built once and then updated with each batch of new rows (and
+    rows are taken out by subtraction), and queries cost the same however many
+    rows went in.
+
+    Args:
+        median_dimensions (tuple): The dimensions medians can be computed for.
+    """
+
+    def __init__(self, median_dimensions=MEDIAN_DIMENSIONS):
+        self.median_dimensions = tuple(median_dimensions)
+        self._totals = {}
+        self._values = {}
+
+    @classmethod
+    def from_frame(cls, data, dimensions=DIMENSIONS, median_dimensions=MEDIAN_DIMENSIONS):
+        """
+        Build a store from repository rows.
+
+        Args:
+            data (DataFrame): Rows in the github_repos.csv layout.
+            dimensions (tuple): The dimensions to roll up. Default is all of them.
+            median_dimensions (tuple): See AggregateStore.
+
+        Returns:
+            AggregateStore: The rollups of the rows.
+        """
+        store = cls(median_dimensions)
+        store.update(data, dimensions)
+        return store
+
+    @classmethod
+    def from_chunks(cls, chunks, dimensions=DIMENSIONS, median_dimensions=MEDIAN_DIMENSIONS):
+        """
+        Build a store from repository rows that arrive in chunks.
+
+        Each chunk is folded into the rollups and can be released before the
+        next one is read, so memory depends on the number of groups and
+        distinct counter values, not on the number of rows.
+
+        Args:
+            chunks (iterable): DataFrames in the github_repos.csv layout,
+                e.g. from data_loader.iter_repository_chunks.
+            dimensions (tuple): The dimensions to roll up. Default is all of them.
+            median_dimensions (tuple): See AggregateStore.
+
+        Returns:
+            AggregateStore: The rollups of all rows.
+        """
+        store = cls(median_dimensions)
+        for chunk in chunks:
+            store.update(chunk, dimensions)
+        return store
+
+    @property
+    def dimensions(self):
+        return tuple(dimension for dimension in DIMENSIONS if dimension in self._totals)
+
+    def update(self, data, dimensions=DIMENSIONS):
+        """
+        Add new repository rows to the rollups.
+
+        Args:
+            data (DataFrame): Rows in the github_repos.csv layout. Dimensions whose
+                source column is missing are skipped.
+            dimensions (tuple): The dimensions to update. Default is all of them.
+        """
+        self._fold(data, dimensions, 1)
+
+    def remove(self, data, dimensions=DIMENSIONS):
+        """
+        Take repository rows that were added before out of the rollups, e.g. the
+        previous version of repositories that changed. Groups left empty are dropped.
+
+        Args:
+            data (DataFrame): Rows in the github_repos.csv layout, exactly as they were added.
+            dimensions (tuple): The dimensions to update. Default is all of them.
+        """
+        self._fold(data, dimensions, -1)
+
+    def _fold(self, data, dimensions, sign):
+        if data.empty:
+            return
+        sums = [column for column in SUM_COLUMNS if column in data.columns]
+        medians = [column for column in MEDIAN_COLUMNS if column in data.columns]
+        counters = data[sums].astype('int64')
+        for dimension, key in _dimension_keys(data, dimensions).items():
+            grouped = counters.groupby(key, sort=False, observed=True)
+            totals = grouped.sum().add_suffix('_sum')
+            totals.insert(0, 'count', grouped.size())
+            totals.index = _plain_index(totals.index)
+            totals = _add(self._totals.get(dimension), totals * sign)
+            self._totals[dimension] = totals[totals['count'] != 0] if sign < 0 else totals
+            if dimension not in self.median_dimensions:
+                continue
+            values = self._values.setdefault(dimension, {})
+            for column in medians:
+                counts = counters[column].groupby([key, counters[column]], sort=False, observed=True).size()
+                counts.index = counts.index.set_levels(_plain_index(counts.index.levels[0]), level=0)
+                counts = _add(values.get(column), counts * sign)
+                values[column] = counts[counts != 0] if sign < 0 else counts
+
+    def merge(self, other):
+        """
+        Add the rollups of another store, e.g. one built from a different partition of the rows.
+
+        Args:
+            other (AggregateStore): The store to fold into this one.
+        """
+        for dimension, totals in other._totals.items():
+            self._totals[dimension] = _add(self._totals.get(dimension), totals)
+        for dimension, values in other._values.items():
+            if dimension not in self.median_dimensions:
+                continue
+            merged = self._values.setdefault(dimension, {})
+            for column, counts in values.items():
+                merged[column] = _add(merged.get(column), counts)
+
+    def count(self, dimension):
+        """
+        Return the number of rows per group of a dimension, sorted by group.
+        """
+        return self._table(dimension)['count'].sort_index().rename('count')
+
+    def rollup(self, dimension, aggregations):
+        """
+        Summarize the groups of a dimension, like groupby(dimension).agg(aggregations).reset_index().
+
+        Args:
+            dimension (str): 'Year', 'Quarter', 'Language' or 'Owner'.
+            aggregations (dict): Maps a column to 'count', 'sum', 'mean' or 'median'.
+
+        Returns:
+            DataFrame: One row per group, sorted by group.
+
+        Raises:
+            KeyError: If the dimension or a column is not in the store.
+            ValueError: If a statistic is not supported.
+        """
+        totals = self._table(dimension)
+        result = pd.DataFrame(index=totals.index)
+        for column, statistic in aggregations.items():
+            if statistic not in STATISTICS:
+                raise ValueError(f"Unsupported statistic: {statistic}")
+            if statistic == 'count':
+                result[column] = totals['count']
+            elif statistic == 'median':
+                if column not in self._values.get(dimension, {}):
+                    raise KeyError(f"No value counts of {column} by {dimension} in the aggregate store")
+                result[column] = _median(self._values[dimension][column])
+            else:
+                if f'{column}_sum' not in totals.columns:
+                    raise KeyError(f"No sums of {column} in the aggregate store")
+                result[column] = totals[f'{column}_sum']
+                if statistic == 'mean':
+                    result[column] = result[column] / totals['count']
+        return result.sort_index().reset_index()
+
+    def fingerprint(self, dimensions=None):
+        """
+        Return a hash of the group totals of some dimensions, e.g. to key caches of what is drawn from them.
+
+        Args:
+            dimensions (iterable): The dimensions to hash. Default is all in the store.
+
+        Returns:
+            str: A hex digest that changes whenever those totals change.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for dimension in (self.dimensions if dimensions is None else dimensions):
+            totals = self._table(dimension).sort_index()
+            digest.update(dimension.encode())
+            digest.update(pd.util.hash_pandas_object(totals, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _table(self, dimension):
+        if dimension not in self._totals:
+            raise KeyError(f"No {dimension} rollup in the aggregate store")
+        return self._totals[dimension]
+
+    def save(self, path):
+        """
+        Write the store to a directory of Parquet files, replacing any previous version.
+
+        Args:
+            path (str): The directory.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        tmp_path = os.path.join(parent, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp_path)
+        for dimension, totals in self._totals.items():
+            _to_parquet(totals.reset_index(), dimension, os.path.join(tmp_path, f'{dimension}.parquet'))
+            for column, counts in self._values.get(dimension, {}).items():
+                frame = counts.rename('Count').reset_index()
+                _to_parquet(frame, dimension, os.path.join(tmp_path, f'{dimension}.{column}.parquet'))
+        old_path = None
+        if os.path.exists(path):
+            old_path = f"{tmp_path}.old"
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        if old_path is not None:
+            for name in os.listdir(old_path):
+                os.remove(os.path.join(old_path, name))
+            os.rmdir(old_path)
+
+    @classmethod
+    def load(cls, path, median_dimensions=MEDIAN_DIMENSIONS):
+        """
+        Read a store written by save().
+
+        Args:
+            path (str): The directory.
+            median_dimensions (tuple): See AggregateStore. Value counts saved for
+                other dimensions are not read.
+
+        Returns:
+            AggregateStore: The store.
+        """
+        store = cls(median_dimensions)
+        for name in sorted(os.listdir(path)):
+            parts = name[:-len('.parquet')].split('.')
+            if len(parts) > 1 and parts[0] not in store.median_dimensions:
+                continue
+            frame = _from_parquet(os.path.join(path, name), parts[0])
+            if len(parts) == 1:
+                store._totals[parts[0]] = frame.set_index(parts[0])
+            else:
+                counts = frame.set_index([parts[0], parts[1]])['Count']
+                store._values.setdefault(parts[0], {})[parts[1]] = counts
+        return store
+
+
+def _to_parquet(frame, dimension, path):
+    if dimension == 'Quarter':
+        frame[dimension] = frame[dimension].astype(str)
+    frame.to_parquet(path, index=False)
+
+
+def _from_parquet(path, dimension):
+    frame = pd.read_parquet(path)
+    if dimension == 'Quarter':
+        frame[dimension] = pd.PeriodIndex(frame[dimension], freq='Q')
+    return frame
+
+
+def as_aggregates(data, dimensions=DIMENSIONS, median_dimensions=MEDIAN_DIMENSIONS):
+    """
+    Return the rollups of repository data.
+
+    Args:
+        data (DataFrame, AggregateStore or iterable): Repository rows, rollups already
+            built from them, or an iterable of row chunks.
+        dimensions (tuple): The dimensions needed when rows have to be rolled up.
+        median_dimensions (tuple): The dimensions whose medians are needed then.
+
+    Returns:
+        AggregateStore: `data` itself if it is a store, otherwise the rollups of its rows.
+    """
+    if isinstance(data, AggregateStore):
+        return data
+    if isinstance(data, pd.DataFrame):
+        return AggregateStore.from_frame(data, dimensions, median_dimensions)
+    return AggregateStore.from_chunks(data, dimensions, median_dimensions)
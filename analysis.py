@@ -1,24 +1,25 @@
 # analysis.py
 import pandas as pd
-from langdetect import detect
-from sklearn.linear_model import LinearRegression
 import numpy as np
 
+from aggregate_store import as_aggregates
+from regression import RegressionAccumulator
+from volatility import VolatilityTracker
+
 def analyze_yearly_trends(data):
     """
     Analyze yearly trends in GitHub repository data.
     
     Args:
-        data (DataFrame): DataFrame containing GitHub repository data.
+        data (DataFrame, AggregateStore or iterable): DataFrame containing GitHub repository data,
+            its precomputed rollups, or an iterable of DataFrame chunks (e.g. from
+            data_loader.iter_repository_chunks) that is consumed one chunk at a time.
     
     Returns:
         dict: A dictionary containing the analysis results.
     """
-    # Extract year from the date column
-    data['Year'] = pd.to_datetime(data['Date']).dt.year
-    
-    # Group by year and calculate mean stars and forks
-    yearly_stats = data.groupby('Year').agg({'Stars': 'mean', 'Forks': 'mean'}).reset_index()
+    # Read the mean stars and forks per year from the rollups
+    yearly_stats = as_aggregates(data, ('Year',)).rollup('Year', {'Stars': 'mean', 'Forks': 'mean'})
     
     # Convert to dictionary
     results = yearly_stats.to_dict(orient='records')
@@ -30,77 +31,83 @@ def analyze_quarterly_trends(data):
     Analyze quarterly trends in GitHub repository data.
     
     Args:
-        data (DataFrame): DataFrame containing GitHub repository data.
+        data (DataFrame, AggregateStore or iterable): DataFrame containing GitHub repository data,
+            its precomputed rollups, or an iterable of DataFrame chunks (e.g. from
+            data_loader.iter_repository_chunks) that is consumed one chunk at a time.
     
     Returns:
         dict: A dictionary containing the analysis results.
     """
-    # Extract quarter from the date column
-    data['Quarter'] = pd.to_datetime(data['Date']).dt.to_period('Q')
-    
-    # Group by quarter and calculate median stars and forks
-    quarterly_stats = data.groupby('Quarter').agg({'Stars': 'median', 'Forks': 'median'}).reset_index()
+    # Read the median stars and forks per quarter from the rollups
+    quarterly_stats = as_aggregates(data, ('Quarter',)).rollup('Quarter', {'Stars': 'median', 'Forks': 'median'})
     
     # Convert to dictionary
     results = quarterly_stats.to_dict(orient='records')
     
     return results
 
-def perform_regression_analysis(data):
+def perform_regression_analysis(data, predictors=('Stars',), target='Forks'):
     """
     Perform regression analysis on GitHub repository data.
     
+    The fit is solved from sufficient statistics (see regression.py), so a
+    RegressionAccumulator kept up to date at ingest time gives the results
+    without reading any rows.
+    
     Args:
-        data (DataFrame): DataFrame containing GitHub repository data.
+        data (DataFrame, RegressionAccumulator or iterable): GitHub repository
+            data, its regression statistics, or an iterable of DataFrame chunks.
+        predictors (iterable): The columns to predict the target from, out of
+            'Stars', 'Forks', 'Watchers', 'Issues' and 'Age' (days since 'Date').
+        target (str): The column to predict.
     
     Returns:
         dict: A dictionary containing the analysis results.
     """
-    # Prepare data for regression analysis
-    X = data['Stars'].values.reshape(-1, 1)
-    y = data['Forks'].values
-    
-    # Create and fit the linear regression model
-    model = LinearRegression()
-    model.fit(X, y)
-    
-    # Get regression coefficients
-    coefficient = model.coef_[0]
-    intercept = model.intercept_
-    r_squared = model.score(X, y)
+    predictors = list(predictors)
+    if not isinstance(data, RegressionAccumulator):
+        data = RegressionAccumulator.from_frame(data, dict.fromkeys([target] + predictors))
+    fit = data.fit(target, predictors)
     
     # Construct results dictionary
+    if len(predictors) == 1:
+        coefficient = fit['coefficients'][0]
+    else:
+        coefficient = dict(zip(predictors, fit['coefficients']))
     results = {
         'Coefficient': coefficient,
-        'Intercept': intercept,
-        'R-squared': r_squared
+        'Intercept': fit['intercept'],
+        'R-squared': fit['r_squared'],
+        'Observations': fit['observations']
     }
     
     return results
 
-def conduct_volatility_analysis(data):
+def conduct_volatility_analysis(data, top_k=10, language=None):
     """
     Conduct volatility analysis on GitHub repository data.
     
+    Volatility is the standard deviation of a repository's relative star
+    changes between snapshots, over all snapshots and over the most recent
+    ones (see volatility.py), per repository and pooled per language.
+    
     Args:
-        data (DataFrame): DataFrame containing GitHub repository data.
+        data (DataFrame or VolatilityTracker): Snapshot rows with 'URL', 'Stars',
+            'Language' and the snapshot 'Date', or the statistics kept up to
+            date at ingest time.
+        top_k (int): The number of most volatile repositories to return.
+        language (str): Only rank repositories in this language.
     
     Returns:
         dict: A dictionary containing the analysis results.
     """
-    # Calculate the standard deviation of stars over time
-    stars_std = data['Stars'].std()
-    
-    # Determine if the volatility is high or low based on some threshold
-    if stars_std > 100:
-        volatility_level = "High"
-    else:
-        volatility_level = "Low"
+    if not isinstance(data, VolatilityTracker):
+        data = VolatilityTracker.from_frame(data)
     
     # Prepare analysis results
     analysis_results = {
-        "Stars Volatility": stars_std,
-        "Volatility Level": volatility_level
+        "Most Volatile Repositories": data.top_volatile(top_k, language=language).reset_index().to_dict(orient='records'),
+        "Volatility by Language": data.language_volatility().reset_index().to_dict(orient='records')
     }
     
     return analysis_results
@@ -111,61 +118,126 @@ def helper_function():
     """
     pass
 
-def calculate_average_stars(repositories):
+# Summary fields, and the columns they are read from in record and CSV layouts
+SUMMARY_FIELDS = {
+    'stars': ('stars', 'Stars'),
+    'forks': ('forks', 'Forks'),
+    'language': ('language', 'Language'),
+}
+
+def _summary_columns(repositories, fields=tuple(SUMMARY_FIELDS)):
     """
-    Calculate the average number of stars across all repositories.
+    Return the columns the summary functions need as pandas Series.
     
     Args:
-        repositories (list): A list of dictionaries containing information about GitHub repositories.
+        repositories (list, dict, DataFrame or ndarray): Repository dictionaries or
+            records, a dict of column lists, a DataFrame in record or
+            github_repos.csv layout, or a NumPy structured array.
+        fields (tuple): Keys of SUMMARY_FIELDS to return.
     
     Returns:
-        float: The average number of stars.
+        dict: A Series per field, or None for fields the data does not have.
+    """
+    if isinstance(repositories, np.ndarray):
+        names = repositories.dtype.names or ()
+        columns = {name: repositories[name] for name in names}
+    elif isinstance(repositories, (pd.DataFrame, dict)):
+        columns = repositories
+    else:
+        # Records are read once per needed field; repositories without the field give None.
+        # NumPy infers the type of a list of counters much faster than pandas does.
+        repositories = list(repositories)
+        columns = {
+            field: np.array([repo.get(field) for repo in repositories], dtype=object if field == 'language' else None)
+            for field in fields
+        }
+    
+    result = {}
+    for field in fields:
+        name = next((name for name in SUMMARY_FIELDS[field] if name in columns), None)
+        result[field] = None if name is None else pd.Series(columns[name])
+    return result
+
+def _counter_values(column):
+    """
+    Return the known values of a counter column as numbers.
+    """
+    if column is None:
+        return pd.Series([], dtype='int64')
+    if column.dtype == object:
+        column = pd.to_numeric(column)
+    return column.dropna()
+
+def _language_counts(column):
     """
-    total_stars = 0
-    num_repositories = 0
+    Count repositories per language, in order of first appearance.
+    """
+    if column is None:
+        return {}
+    codes, languages = pd.factorize(column)
+    counts = np.bincount(codes[codes >= 0], minlength=len(languages))
+    return dict(zip(list(languages), counts.tolist()))
+
+def summarize_repositories(repositories):
+    """
+    Compute the summary statistics of repositories in one vectorized pass per column.
     
-    # Check if 'stars' key exists in each repository
-    for repo in repositories:
-        if 'stars' in repo:
-            total_stars += repo['stars']
-            num_repositories += 1
+    Repositories without a value for a field (a missing key, None or NaN) are
+    left out of the statistics of that field.
     
-    # Calculate average stars
-    if num_repositories > 0:
-        average_stars = total_stars / num_repositories
-    else:
-        average_stars = 0
+    Args:
+        repositories (list, dict, DataFrame or ndarray): Repository dictionaries or
+            records, a dict of column lists (the fetchers' 'columns' output), a
+            DataFrame in record or github_repos.csv layout, or a NumPy
+            structured array.
     
-    return average_stars
+    Returns:
+        dict: 'Average Stars', 'Most Popular Language', 'Total Forks' and
+        'Repositories by Language', as returned by the functions below.
+    """
+    columns = _summary_columns(repositories)
+    language_counts = _language_counts(columns['language'])
+    return {
+        'Average Stars': _average_stars(columns['stars']),
+        'Most Popular Language': _most_popular_language(language_counts),
+        'Total Forks': _total_forks(columns['forks']),
+        'Repositories by Language': language_counts
+    }
+
+def _average_stars(column):
+    stars = _counter_values(column)
+    return float(stars.mean()) if len(stars) else 0
+
+def _most_popular_language(language_counts):
+    # max() keeps the first language with the highest count
+    return max(language_counts, key=language_counts.get) if language_counts else "Unknown"
+
+def _total_forks(column):
+    return int(_counter_values(column).sum())
+
+def calculate_average_stars(repositories):
+    """
+    Calculate the average number of stars across all repositories.
+    
+    Args:
+        repositories (list, dict, DataFrame or ndarray): GitHub repositories, see summarize_repositories.
+    
+    Returns:
+        float: The average number of stars.
+    """
+    return _average_stars(_summary_columns(repositories, ('stars',))['stars'])
 
 def find_most_popular_language(repositories):
     """
     Find the most popular programming language among the repositories.
     
     Args:
-        repositories (list): A list of dictionaries containing information about GitHub repositories.
+        repositories (list, dict, DataFrame or ndarray): GitHub repositories, see summarize_repositories.
     
     Returns:
         str: The most popular programming language, or "Unknown" if no language information is found.
     """
-    language_counts = {}
-    
-    # Count occurrences of each language
-    for repo in repositories:
-        if 'language' in repo:
-            language = repo['language']
-            if language in language_counts:
-                language_counts[language] += 1
-            else:
-                language_counts[language] = 1
-    
-    # Find the most popular language
-    if language_counts:
-        most_popular_language = max(language_counts, key=language_counts.get)
-    else:
-        most_popular_language = "Unknown"
-    
-    return most_popular_language
+    return _most_popular_language(count_repositories_by_language(repositories))
 
 def helper_function():
     """
@@ -178,53 +250,38 @@ def calculate_total_forks(repositories):
     Calculate the total number of forks across all repositories.
     
     Args:
-        repositories (list): A list of dictionaries containing information about GitHub repositories.
+        repositories (list, dict, DataFrame or ndarray): GitHub repositories, see summarize_repositories.
     
     Returns:
         int: The total number of forks.
     """
-    total_forks = 0
-    
-    # Calculate total forks, skipping repositories without 'forks' information
-    for repo in repositories:
-        if 'forks' in repo:
-            total_forks += repo['forks']
-    
-    return total_forks
+    return _total_forks(_summary_columns(repositories, ('forks',))['forks'])
     
 def count_repositories_by_language(repositories):
     """
     Count the number of repositories for each programming language.
     
     Args:
-        repositories (list): A list of dictionaries containing information about GitHub repositories.
+        repositories (list, dict, DataFrame or ndarray): GitHub repositories, see summarize_repositories.
     
     Returns:
         dict: A dictionary where keys are programming languages and values are the corresponding counts.
     """
-    language_counts = {}
-    
-    # Count repositories by language, skipping repositories without 'language' information
-    for repo in repositories:
-        if 'language' in repo:
-            lang = repo['language']
-            language_counts[lang] = language_counts.get(lang, 0) + 1
-    
-    return language_counts
+    return _language_counts(_summary_columns(repositories, ('language',))['language'])
 # You can add more analysis functions as needed
 
 if __name__ == "__main__":
-    # Example usage with the DataFrame 'data'
-    avg_stars = calculate_average_stars(data)
-    most_popular_language = find_most_popular_language(data)
-    print(f"Average stars: {avg_stars}")
-    print(f"Most popular language: {most_popular_language}")
-    total_forks = calculate_total_forks(data)
-    print(f"Total forks: {total_forks}")
-    
-    language_counts = count_repositories_by_language(data)
+    from data_loader import load_repositories
+
+    # Example usage with the repository data
+    data = load_repositories()
+    summary = summarize_repositories(data)
+    print(f"Average stars: {summary['Average Stars']}")
+    print(f"Most popular language: {summary['Most Popular Language']}")
+    print(f"Total forks: {summary['Total Forks']}")
+    
     print("Repository counts by language:")
-    for language, count in language_counts.items():
+    for language, count in summary['Repositories by Language'].items():
         print(f"{language}: {count}")
         
     # Check if 'Language' column exists and print value counts if it does
@@ -0,0 +1,229 @@
+"""
+Measure how loading, the analysis functions and the charts scale with data size.
+
+For every dataset size a synthetic CSV is generated once (see
+generate_github_data.py) and every case runs in a fresh interpreter, so
+peak RSS belongs to that case alone. Each case reports the median wall time
+of --repeat runs, the process's peak RSS and the peak of Python allocations
+traced by tracemalloc during one extra run. Charts are drawn with the Agg
+backend with the chart cache off and closed after each run; nothing
+touches the network.
+
+Results are saved as JSON per commit in --results-dir. Pass --compare with a
+commit (or a results file) to print the time ratio against it; the script
+exits with status 1 if any case got slower than --threshold by more than
+--min-delta-ms.
+
+Usage:
+    python benchmarks/bench_analysis.py --sizes 10000 100000 1000000
+    python benchmarks/bench_analysis.py --cases analysis --compare 1d70172
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+# Case name -> largest dataset it is run on (None for no limit). visualize_repo_stats
+# draws one bar per repository, so it is only measured on small data.
+CASES = {
+    'data_loader.load_repositories': None,
+    'analysis.analyze_yearly_trends': None,
+    'analysis.analyze_quarterly_trends': None,
+    'analysis.perform_regression_analysis': None,
+    'analysis.conduct_volatility_analysis': None,
+    'github_data_visualization.visualize_language_distribution': None,
+    'github_data_visualization.visualize_stars_vs_forks': None,
+    'github_data_visualization.visualize_repo_stats': 10000,
+    'github_data_visualization.visualize_yearly_trends': None,
+    'github_data_visualization.visualize_quarterly_trends': None,
+    'github_data_visualization.visualize_correlation_matrix': None,
+    'github_data_visualization.visualize_repo_distribution_by_owner': None,
+    'github_data_visualization.visualize_time_series': None,
+    'github_data_visualization.visualize_repo_stars_distribution': None,
+    'github_data_visualization.visualize_repo_watchers_vs_stars': None,
+    'github_data_visualization.visualize_repo_issues_vs_stars': None,
+    'github_data_visualization.visualize_avg_stars_by_language': None,
+    'github_data_visualization.visualize_top_languages': None,
+}
+
+# Extra positional arguments of cases that take more than the frame
+CASE_ARGS = {
+    'github_data_visualization.visualize_time_series': ('Date',),
+}
+
+DEFAULT_DIR = os.path.join(ROOT, '.bench')
+
+
+def _peak_rss():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_case(case, csv_path, repeat):
+    """
+    Run one case in this process and return its measurements.
+    """
+    import importlib
+    import logging
+    import tracemalloc
+
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    # Measure drawing, not the chart cache
+    os.environ['CHART_CACHE_MEMORY_BYTES'] = '0'
+    os.environ['CHART_CACHE_DISK_BYTES'] = '0'
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    import data_loader
+
+    def load():
+        data_loader.clear_cache()
+        # A snapshot directory that does not exist makes the loader read the CSV
+        return data_loader.load_repositories(path=csv_path, snapshot_dir=os.path.join(DEFAULT_DIR, 'no-snapshots'))
+
+    module_name, function_name = case.rsplit('.', 1)
+    if case == 'data_loader.load_repositories':
+        func = load
+    else:
+        data = load()
+        target = getattr(importlib.import_module(module_name), function_name)
+        args = CASE_ARGS.get(case, ())
+
+        def func():
+            return target(data.copy(deep=False), *args)
+
+    cleanup = lambda: None  # noqa: E731
+    if module_name == 'github_data_visualization':
+        import matplotlib.pyplot as plt
+        cleanup = lambda: plt.close('all')  # noqa: E731
+
+    baseline_rss = _peak_rss()
+    times = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+            cleanup()
+        tracemalloc.start()
+        func()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        cleanup()
+    except Exception as e:
+        return {'error': f'{type(e).__name__}: {e}'}
+    return {
+        'seconds': statistics.median(times),
+        'peak_rss': _peak_rss(),
+        'rss_growth': _peak_rss() - baseline_rss,
+        'alloc_peak': traced_peak,
+    }
+
+
+def dataset(rows, seed, data_dir):
+    """
+    Return the path of the synthetic CSV with `rows` rows, generating it on first use.
+    """
+    from generate_github_data import write_synthetic_dataset
+
+    path = os.path.join(data_dir, f'repos-{rows}-{seed}.csv')
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        write_synthetic_dataset(tmp_path, rows, seed, output_format='csv')
+        os.replace(tmp_path, path)
+    return path
+
+
+def commit_id():
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{sha}-dirty' if dirty else sha
+
+
+def load_results(reference, results_dir):
+    path = reference if os.path.exists(reference) else os.path.join(results_dir, f'{reference}.json')
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--cases', nargs='+', default=None,
+                        help='case names or prefixes, e.g. analysis or data_loader.load_repositories')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=os.path.join(DEFAULT_DIR, 'data'))
+    parser.add_argument('--results-dir', default=os.path.join(DEFAULT_DIR, 'results'))
+    parser.add_argument('--compare', default=None, help='commit id or results file to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='time ratio counted as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='slowdowns smaller than this are timer noise, not regressions')
+    parser.add_argument('--child', nargs=3, metavar=('CASE', 'CSV', 'REPEAT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        case, csv_path, repeat = args.child
+        print(json.dumps(run_case(case, csv_path, int(repeat))))
+        return
+
+    cases = [case for case in CASES if args.cases is None or any(case.startswith(prefix) for prefix in args.cases)]
+    baseline = load_results(args.compare, args.results_dir) if args.compare else None
+    results = {'commit': commit_id(), 'python': sys.version.split()[0], 'results': {}}
+
+    print(f"{'case':<58}{'rows':>10}{'ms':>11}{'peak RSS MiB':>14}{'alloc MiB':>11}{'ratio':>8}")
+    regressions = []
+    for rows in args.sizes:
+        csv_path = dataset(rows, args.seed, args.data_dir)
+        for case in cases:
+            if CASES[case] is not None and rows > CASES[case]:
+                continue
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', case, csv_path, str(args.repeat)],
+                cwd=ROOT, capture_output=True, text=True,
+            )
+            lines = child.stdout.strip().splitlines()
+            result = json.loads(lines[-1]) if child.returncode == 0 and lines else {
+                'error': child.stderr.strip().splitlines()[-1] if child.stderr.strip() else 'no output'}
+            key = f'{case}@{rows}'
+            results['results'][key] = result
+            label = case.split('.', 1)[1]
+            if 'error' in result:
+                print(f"{label:<58}{rows:>10}  {result['error'][:60]}")
+                continue
+            ratio = ''
+            previous = (baseline or {}).get('results', {}).get(key)
+            if previous and 'seconds' in previous and previous['seconds'] > 0:
+                change = result['seconds'] / previous['seconds']
+                ratio = f'{change:.2f}x'
+                delta_ms = (result['seconds'] - previous['seconds']) * 1000
+                if change > args.threshold and delta_ms > args.min_delta_ms:
+                    regressions.append(key)
+            print(f"{label:<58}{rows:>10}{result['seconds'] * 1000:>11.1f}"
+                  f"{result['peak_rss'] / 2 ** 20:>14.1f}{result['alloc_peak'] / 2 ** 20:>11.1f}{ratio:>8}")
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, f"{results['commit']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nSaved results to {os.path.relpath(path)}")
+    if regressions:
+        print(f"Slower than {args.threshold}x the baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
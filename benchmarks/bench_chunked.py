@@ -0,0 +1,85 @@
+"""
+Compare in-memory and chunked yearly/quarterly trend analysis on one file.
+
+The in-memory mode loads the whole file with data_loader.load_repositories;
+the chunked mode streams it with data_loader.iter_repository_chunks and folds
+each chunk into mergeable per-group states. Each mode runs in a fresh
+interpreter, and the script reports wall time and peak RSS of both and checks
+that they produce the same results.
+
+Usage:
+    python benchmarks/bench_chunked.py --rows 5000000 --chunk-size 250000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+COLUMNS = ['Date', 'Stars', 'Forks']
+
+
+def run_mode(mode, path, chunk_size):
+    import resource
+
+    import data_loader
+    from analysis import analyze_quarterly_trends, analyze_yearly_trends
+
+    start = time.perf_counter()
+    if mode == 'memory':
+        data = data_loader.load_repositories(columns=COLUMNS, path=path, snapshot_dir=os.devnull)
+        yearly, quarterly = analyze_yearly_trends(data), analyze_quarterly_trends(data)
+    else:
+        # One pass per analysis, as an app would when each is requested separately
+        yearly = analyze_yearly_trends(data_loader.iter_repository_chunks(path, COLUMNS, chunk_size))
+        quarterly = analyze_quarterly_trends(data_loader.iter_repository_chunks(path, COLUMNS, chunk_size))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    for row in quarterly:
+        row['Quarter'] = str(row['Quarter'])
+    return {'seconds': elapsed, 'peak_rss': peak, 'yearly': yearly, 'quarterly': quarterly}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--chunk-size', type=int, default=250000)
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv')
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, '.bench', 'data'))
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child[0], args.child[1], args.chunk_size)))
+        return
+
+    from generate_github_data import write_synthetic_dataset
+
+    path = os.path.join(args.data_dir, f'repos-{args.rows}-0.{args.format}')
+    if not os.path.exists(path):
+        os.makedirs(args.data_dir, exist_ok=True)
+        write_synthetic_dataset(f'{path}.tmp', args.rows, output_format=args.format)
+        os.replace(f'{path}.tmp', path)
+
+    results = {}
+    for mode in ('memory', 'chunks'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', mode, path, '--chunk-size', str(args.chunk_size)],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<8} {results[mode]['seconds']:>8.2f} s {results[mode]['peak_rss'] / 2 ** 20:>10.1f} MiB peak RSS")
+
+    same = all(results['memory'][key] == results['chunks'][key] for key in ('yearly', 'quarterly'))
+    print(f"results {'match' if same else 'DIFFER'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
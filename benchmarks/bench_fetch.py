@@ -0,0 +1,100 @@
+"""
+Measure throughput and latency of the fetch path against the local GitHub stand-in.
+
+Runs entirely offline: a StandInServer with a synthetic fixture is started on
+a free port and the fetch layer is pointed at it. Three workloads are timed:
+crawling the top-starred search results, fetching repository details one by
+one, and the async bulk fetch.
+
+Usage:
+    python benchmarks/bench_fetch.py --repos 5000 --crawl 1000 --details 200 --latency 0.02
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import github_bulk  # noqa: E402
+import github_client  # noqa: E402
+import github_data  # noqa: E402
+from github_standin import StandInServer, synthetic_fixture  # noqa: E402
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(label, count, unit, seconds, latencies=None):
+    line = f"{label:>16}: {count} {unit} in {seconds:.2f}s ({count / seconds:.1f} {unit}/s)"
+    if latencies:
+        line += (f", p50 {statistics.median(latencies) * 1000:.1f} ms"
+                 f", p95 {_percentile(latencies, 0.95) * 1000:.1f} ms")
+    print(line)
+
+
+def bench_crawl(language, limit):
+    latencies = []
+    count = 0
+    start = time.perf_counter()
+    page_start = start
+    for page in github_data.iter_most_starred_repositories(language, limit):
+        now = time.perf_counter()
+        latencies.append(now - page_start)
+        page_start = now
+        count += len(page)
+    report('search crawl', count, 'repos', time.perf_counter() - start, latencies)
+
+
+def bench_serial(pairs):
+    latencies = []
+    start = time.perf_counter()
+    for owner, repo in pairs:
+        call_start = time.perf_counter()
+        github_data.fetch_repository_info(owner, repo)
+        github_data.fetch_repo_contributors(owner, repo)
+        github_data.fetch_repo_issues(owner, repo)
+        latencies.append(time.perf_counter() - call_start)
+    report('serial details', len(pairs), 'repos', time.perf_counter() - start, latencies)
+
+
+def bench_bulk(pairs, concurrency):
+    start = time.perf_counter()
+    results = github_bulk.fetch_repositories_bulk(pairs, concurrency=concurrency)
+    failed = sum(not result.ok for result in results)
+    report('bulk details', len(pairs), 'repos', time.perf_counter() - start)
+    if failed:
+        print(f"{'':>16}  {failed} repositories had errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repos', type=int, default=5000, help='repositories in the synthetic fixture')
+    parser.add_argument('--crawl', type=int, default=1000, help='repositories to crawl from search')
+    parser.add_argument('--details', type=int, default=200, help='repositories to fetch details for')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.02, help='stand-in response delay in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Measure the network path, not the response cache
+    github_client.set_cache(None)
+    github_client.POOL_SIZE = max(github_client.POOL_SIZE, args.concurrency)
+    fixture = synthetic_fixture(args.repos, args.seed)
+    unlimited = {'core': (10 ** 9, 3600), 'search': (10 ** 9, 60)}
+    with StandInServer(fixture, latency=args.latency, error_rate=args.error_rate, rate_limits=unlimited,
+                       seed=args.seed) as server:
+        github_client.set_base_url(server.url)
+        pairs = [tuple(repo['full_name'].split('/')) for repo in fixture['repositories'][:args.details]]
+        bench_crawl('python', args.crawl)
+        bench_serial(pairs)
+        bench_bulk(pairs, args.concurrency)
+        print(f"{'stand-in':>16}: {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare REST and batched GraphQL lookups of repository stats.
+
+Fetches stars, forks, watchers and open issues for N repositories from the
+local GitHub stand-in, once with one REST request per repository
+(fetch_repository_details) and once with aliased GraphQL queries
+(fetch_repository_stats_batch), and reports round trips, rate limit quota
+used and wall time. Both paths must return the same records.
+
+Usage:
+    python benchmarks/bench_graphql.py --repos 1000 --latency 0.02
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import github_client  # noqa: E402
+import github_data  # noqa: E402
+from github_graphql import fetch_repository_stats_batch  # noqa: E402
+from github_standin import StandInServer, synthetic_fixture  # noqa: E402
+from repository_records import DEFAULT_FIELDS, REPOSITORY_FIELDS  # noqa: E402
+
+
+def bench_rest(pairs):
+    before = github_client.client_stats()['requests']
+    start = time.perf_counter()
+    records = []
+    for owner, repo in pairs:
+        item = github_data.fetch_repository_details(owner, repo)
+        records.append({field: REPOSITORY_FIELDS[field](item) for field in DEFAULT_FIELDS})
+    elapsed = time.perf_counter() - start
+    round_trips = github_client.client_stats()['requests'] - before
+    return records, round_trips, round_trips, elapsed
+
+
+def bench_graphql(pairs):
+    before = github_client.client_stats()['requests']
+    start = time.perf_counter()
+    records, usage = fetch_repository_stats_batch(pairs)
+    elapsed = time.perf_counter() - start
+    round_trips = github_client.client_stats()['requests'] - before
+    return records, round_trips, usage['cost'], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repos', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.02, help='stand-in response delay in seconds')
+    args = parser.parse_args()
+
+    github_client.set_cache(None)
+    fixture = synthetic_fixture(args.repos)
+    # Keep the REST issue counts consistent with the open issues the GraphQL lookup sees
+    for repo in fixture['repositories']:
+        repo['open_issues_count'] = sum(issue['state'] == 'open' for issue in fixture['issues'][repo['full_name']])
+    unlimited = {'core': (10 ** 9, 3600), 'graphql': (10 ** 9, 3600)}
+    with StandInServer(fixture, latency=args.latency, rate_limits=unlimited) as server:
+        github_client.set_base_url(server.url)
+        pairs = [tuple(repo['full_name'].split('/')) for repo in fixture['repositories']]
+        rest_records, rest_trips, rest_quota, rest_seconds = bench_rest(pairs)
+        graphql_records, graphql_trips, graphql_quota, graphql_seconds = bench_graphql(pairs)
+
+    print(f"{'REST':>8}: {rest_trips} round trips, {rest_quota} quota points, {rest_seconds:.2f}s")
+    print(f"{'GraphQL':>8}: {graphql_trips} round trips, {graphql_quota} quota points, {graphql_seconds:.2f}s")
+    print(f"{'':>8}  records identical: {rest_records == graphql_records}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Measure the speedup of parallel analysis over partitions.
+
+Runs the yearly and quarterly trend, volatility and language count analyses
+once with the single-process functions on a loaded frame, then with
+parallel_analysis.run_parallel_analysis for each worker count: on the same
+frame (partitions of repositories are sent to the workers) and on the Parquet
+file directly (each worker reads it and keeps its own repositories). Reports
+wall times and speedups over the single-process run, and checks that every
+run gives the same results.
+
+Usage:
+    python benchmarks/bench_parallel.py --rows 5000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+import data_loader  # noqa: E402
+from analysis import analyze_quarterly_trends, analyze_yearly_trends, conduct_volatility_analysis  # noqa: E402
+from generate_github_data import write_synthetic_dataset  # noqa: E402
+from parallel_analysis import run_parallel_analysis  # noqa: E402
+
+
+def serial(data):
+    return {
+        'yearly_trends': analyze_yearly_trends(data),
+        'quarterly_trends': analyze_quarterly_trends(data),
+        'language_counts': data['Language'].value_counts().to_dict(),
+        'volatility': conduct_volatility_analysis(data),
+    }
+
+
+def same_records(left, right):
+    # Pooled volatilities are summed in another order, so compare them approximately
+    try:
+        pd.testing.assert_frame_equal(pd.DataFrame(left), pd.DataFrame(right), check_exact=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def same(left, right):
+    return (all(left[key] == right[key] for key in ('yearly_trends', 'quarterly_trends', 'language_counts'))
+            and all(same_records(left['volatility'][key], right['volatility'][key]) for key in left['volatility']))
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--by', default=None, help='partitioning of the frame: URL, the only one volatility allows')
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, '.bench', 'data'))
+    args = parser.parse_args()
+
+    path = os.path.join(args.data_dir, f'repos-{args.rows}-0.parquet')
+    if not os.path.exists(path):
+        os.makedirs(args.data_dir, exist_ok=True)
+        write_synthetic_dataset(f'{path}.tmp', args.rows, output_format='parquet')
+        os.replace(f'{path}.tmp', path)
+    data = data_loader.load_repositories(columns=['URL', 'Date', 'Stars', 'Forks', 'Language'], path=path,
+                                         snapshot_dir=os.devnull)
+
+    baseline, expected = timed(serial, data)
+    print(f"{os.cpu_count()} CPUs, {len(data)} rows")
+    print(f"{'mode':<24}{'workers':>8}{'seconds':>10}{'speedup':>9}  results")
+    print(f"{'single process':<24}{1:>8}{baseline:>10.2f}{1:>8.2f}x  reference")
+    for workers in sorted(set(args.workers)):
+        for mode, source, kwargs in (('frame partitions', data, {'by': args.by}), ('parquet file', path, {})):
+            seconds, result = timed(run_parallel_analysis, source, workers=workers, **kwargs)
+            print(f"{mode:<24}{workers:>8}{seconds:>10.2f}{baseline / seconds:>8.2f}x  "
+                  f"{'match' if same(result, expected) else 'DIFFER'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Measure how many upstream requests single-flight coalescing saves.
+
+A pool of threads repeatedly asks for one /users/{u} and one /repos/{o}/{r}
+resource from the local GitHub stand-in, which answers after a fixed delay,
+once with coalescing disabled and once with it enabled. The on-disk response
+cache is disabled so every call would otherwise reach the server.
+
+Usage:
+    python benchmarks/bench_single_flight.py --threads 32 --rounds 20
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import github_client  # noqa: E402
+from github_standin import StandInServer, synthetic_fixture  # noqa: E402
+
+
+def run(repo, threads, rounds, single_flight):
+    github_client.SINGLE_FLIGHT = single_flight
+    owner = repo['owner']['login']
+    urls = [github_client.api_url(f'/users/{owner}'), github_client.api_url(f"/repos/{repo['full_name']}")]
+    # fetch_github_user_info/fetch_user_details and fetch_repository_info/fetch_repository_details
+    # all hit one of these two URLs
+    calls = [urls[i % len(urls)] for i in range(threads * rounds)]
+    before = github_client.client_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(github_client.get_json, calls))
+    elapsed = time.perf_counter() - start
+    after = github_client.client_stats()
+    return {
+        'calls': len(calls),
+        'upstream': after['requests'] - before['requests'],
+        'coalesced': after['coalesced'] - before['coalesced'],
+        'seconds': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='server response delay in seconds')
+    args = parser.parse_args()
+
+    github_client.set_cache(None)
+    github_client.POOL_SIZE = args.threads
+    fixture = synthetic_fixture(10)
+    unlimited = {'core': (10 ** 9, 3600)}
+    with StandInServer(fixture, latency=args.latency, rate_limits=unlimited) as server:
+        github_client.set_base_url(server.url)
+        for single_flight in (False, True):
+            result = run(fixture['repositories'][0], args.threads, args.rounds, single_flight)
+            label = 'single-flight' if single_flight else 'no coalescing'
+            print(f"{label:>14}: {result['calls']} calls, {result['upstream']} upstream requests, "
+                  f"{result['coalesced']} coalesced, {result['seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
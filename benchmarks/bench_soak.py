@@ -0,0 +1,106 @@
+"""
+Render charts thousands of times and check that memory stays flat.
+
+Every chart of github_data_visualization is drawn in turn, in this process,
+on one synthetic dataset, with the Agg backend and the chart cache off so
+each call really draws. Every --sample renders the script prints
+figure_stats(): the figures still alive (figures are reference cycles, so
+up to a garbage collection's worth of them), those open in pyplot and the
+resident memory. It exits with status 1 if figures outlive their render or
+resident memory grows by more than --max-growth-mib between the end of the
+--warmup renders (font and style caches fill up there) and the end of the run.
+
+Usage:
+    python benchmarks/bench_soak.py --renders 5000 --rows 2000
+"""
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+# Charts drawn in turn, with their extra arguments. visualize_time_series
+# expects a 'Value' column that repository data does not have, and
+# visualize_repo_stats draws one bar per row, which takes seconds per render.
+CHARTS = (
+    ('visualize_language_distribution', ()),
+    ('visualize_stars_vs_forks', ()),
+    ('visualize_yearly_trends', ()),
+    ('visualize_quarterly_trends', ()),
+    ('visualize_correlation_matrix', ()),
+    ('visualize_repo_distribution_by_owner', ()),
+    ('visualize_repo_stars_distribution', ()),
+    ('visualize_repo_watchers_vs_stars', ()),
+    ('visualize_repo_issues_vs_stars', ()),
+    ('visualize_avg_stars_by_language', ()),
+    ('visualize_top_languages', (5,)),
+)
+
+
+def _collect():
+    # Figures are reference cycles whose finalizers free more cycles, so one pass is not enough
+    while gc.collect():
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--renders', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sample', type=int, default=200, help='renders between reports')
+    parser.add_argument('--warmup', type=int, default=200, help='renders before the memory baseline')
+    parser.add_argument('--max-growth-mib', type=float, default=16.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    # Every call should draw, not show a cached image
+    os.environ['CHART_CACHE_MEMORY_BYTES'] = '0'
+    os.environ['CHART_CACHE_DISK_BYTES'] = '0'
+    # st.image warns about the missing app context on every call
+    logging.disable(logging.WARNING)
+    import pandas as pd
+
+    import github_data_visualization
+    from generate_github_data import iter_synthetic_chunks
+
+    data = pd.concat(iter_synthetic_chunks(args.rows, args.seed), ignore_index=True)
+    charts = [(getattr(github_data_visualization, name), chart_args) for name, chart_args in CHARTS]
+
+    print(f"{'renders':>8}{'seconds':>9}{'live figures':>14}{'pyplot figures':>16}{'RSS MiB':>10}")
+    start = time.perf_counter()
+    baseline = None
+    for render in range(1, args.renders + 1):
+        chart, chart_args = charts[(render - 1) % len(charts)]
+        chart(data, *chart_args)
+        if render == args.warmup:
+            _collect()
+            baseline = github_data_visualization.figure_stats()['rss_bytes']
+        if render % args.sample == 0 or render == args.renders:
+            stats = github_data_visualization.figure_stats()
+            rss = stats['rss_bytes'] / 2 ** 20 if stats['rss_bytes'] is not None else float('nan')
+            print(f"{render:>8}{time.perf_counter() - start:>9.1f}{stats['live_figures']:>14}"
+                  f"{stats['pyplot_figures']:>16}{rss:>10.1f}")
+
+    _collect()
+    stats = github_data_visualization.figure_stats()
+    failures = []
+    if stats['live_figures'] or stats['pyplot_figures']:
+        failures.append(f"{stats['live_figures']} figures still alive, {stats['pyplot_figures']} open in pyplot")
+    if baseline is not None and stats['rss_bytes'] is not None:
+        growth = (stats['rss_bytes'] - baseline) / 2 ** 20
+        print(f"\nRSS growth after {args.warmup} warm-up renders: {growth:+.1f} MiB")
+        if growth > args.max_growth_mib:
+            failures.append(f"RSS grew by {growth:.1f} MiB, more than {args.max_growth_mib} MiB")
+    if failures:
+        print('\n'.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measure the cold-start cost of the Streamlit app and of each page's imports.
+
+Every measurement runs in a fresh interpreter, so nothing is already in
+sys.modules: first `import main` (what every worker pays before it can serve
+Home or About), then the modules the Top Repositories, Analysis and
+Visualizations pages import on their first visit. Reports the median of
+several runs and which heavy dependencies `import main` loaded. Exits with
+status 1 if importing main takes longer than --budget milliseconds.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --budget 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that should only load when a page needs them
+HEAVY_MODULES = ('sklearn', 'matplotlib', 'seaborn', 'pyarrow', 'langdetect')
+
+# What each page imports on its first visit, on top of main
+PAGES = {
+    'Top Repositories': ['github_data'],
+    'Analysis': ['data_loader', 'analysis', 'github_data_visualization'],
+    'Visualizations': ['data_loader', 'github_data_visualization'],
+}
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+startup = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+page = time.perf_counter() - start
+print(json.dumps({{'startup': startup, 'page': page, 'loaded': loaded}}))
+"""
+
+
+def probe(modules):
+    code = _PROBE.format(heavy=HEAVY_MODULES, modules=modules)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode:
+        sys.exit(f"Probe of {', '.join(modules)} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=None, help='maximum median import time of main in milliseconds')
+    args = parser.parse_args()
+
+    startups, loaded = [], set()
+    print(f"{'page':<18}{'first visit ms':>16}")
+    for page, modules in PAGES.items():
+        results = [probe(modules) for _ in range(args.runs)]
+        startups.extend(result['startup'] for result in results)
+        loaded.update(*(result['loaded'] for result in results))
+        print(f"{page:<18}{statistics.median(result['page'] for result in results) * 1000:>16.1f}")
+
+    startup_ms = statistics.median(startups) * 1000
+    print(f"\nimport main: {startup_ms:.1f} ms median over {len(startups)} cold starts")
+    print(f"heavy modules loaded by import main: {', '.join(sorted(loaded)) or 'none'}")
+    if args.budget is not None and startup_ms > args.budget:
+        print(f"over the {args.budget:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare buffered and streaming decoding of search pages and issue lists.
+
+Runs against the local GitHub stand-in with a bandwidth limit, so response
+bodies arrive over time as they do from api.github.com. Repository items are
+padded to the ~100 fields of real API responses. For each mode the script
+reports the time to the first decoded batch, the total time and the peak
+Python memory while consuming the results.
+
+Usage:
+    python benchmarks/bench_stream.py --repos 500 --bandwidth 2000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import github_client  # noqa: E402
+import github_data  # noqa: E402
+from github_standin import StandInServer, synthetic_fixture  # noqa: E402
+
+# Extra *_url fields added to each item so its size matches a real API response
+PADDING_FIELDS = 90
+
+
+def padded_fixture(num_repos, issues_per_repo):
+    fixture = synthetic_fixture(num_repos)
+    for repo in fixture['repositories']:
+        for i in range(PADDING_FIELDS):
+            repo[f'extra_{i}_url'] = f"https://api.github.com/repos/{repo['full_name']}/extra/{i}"
+    first = fixture['repositories'][0]['full_name']
+    fixture['issues'][first] = [
+        {'number': n + 1, 'title': f'Issue {n + 1}', 'state': 'open', 'body': 'x' * 2000}
+        for n in range(issues_per_repo)
+    ]
+    return fixture, first
+
+
+def measure(label, make_batches):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for batch in make_batches():
+        if first is None:
+            first = time.perf_counter() - start
+        count += len(batch)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>22}: {count} items, first batch {first * 1000:.0f} ms, "
+          f"total {total:.2f}s, peak {peak / 1024 / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repos', type=int, default=500, help='repositories to crawl')
+    parser.add_argument('--issues', type=int, default=1000, help='issues in the streamed issue list')
+    parser.add_argument('--bandwidth', type=float, default=2_000_000, help='stand-in bytes per second')
+    args = parser.parse_args()
+
+    github_client.set_cache(None)
+    # Five languages in the fixture, so this yields args.repos Python repositories
+    fixture, full_name = padded_fixture(args.repos * 5, args.issues)
+    owner, repo = full_name.split('/')
+    unlimited = {'core': (10 ** 9, 3600), 'search': (10 ** 9, 60)}
+    with StandInServer(fixture, rate_limits=unlimited, bandwidth=args.bandwidth) as server:
+        github_client.set_base_url(server.url)
+        for stream in (False, True):
+            mode = 'streaming' if stream else 'buffered'
+            measure(f'search crawl, {mode}', lambda: github_data.iter_most_starred_repositories(
+                'python', args.repos, stream=stream))
+        measure('issues, buffered', lambda: [github_data.fetch_repo_issues(owner, repo, per_page=100)])
+        measure('issues, streaming', lambda: github_data.iter_repo_issues(
+            owner, repo, fields=('number', 'title'), limit=100))
+
+
+if __name__ == '__main__':
+    main()
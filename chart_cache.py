@@ -0,0 +1,256 @@
+import functools
+import hashlib
+import inspect
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Directory of the on-disk chart cache, shared by every process on the machine
+CHART_CACHE_DIR = os.environ.get('CHART_CACHE_DIR', os.path.join('.cache', 'charts'))
+
+# Bytes of encoded charts kept in memory and on disk; 0 turns a tier off
+MAX_MEMORY_BYTES = int(os.environ.get('CHART_CACHE_MEMORY_BYTES', 32 * 1024 * 1024))
+MAX_DISK_BYTES = int(os.environ.get('CHART_CACHE_DISK_BYTES', 256 * 1024 * 1024))
+
+# Resolution charts are encoded at
+DPI = 100
+
+_memory = OrderedDict()
+_memory_bytes = 0
+_lock = threading.Lock()
+_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _hash_column(digest, column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        digest.update(column.cat.codes.to_numpy().tobytes())
+        digest.update(pd.util.hash_pandas_object(column.cat.categories, index=False).to_numpy().tobytes())
+    elif column.dtype.kind in 'biufcmM':
+        digest.update(np.ascontiguousarray(column.to_numpy()).tobytes())
+    else:
+        digest.update(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes())
+
+
+def data_fingerprint(data, columns=None, dimensions=None):
+    """
+    Return a hash of the part of a chart's input that the chart draws.
+
+    A frame returned by data_loader.load_repositories is identified by its
+    dataset version, without reading it. Of other frames only the given columns
+    are hashed, so the cost is a pass over the numbers a chart reads, not over
+    the whole frame.
+
+    Args:
+        data (DataFrame, AggregateStore or RegressionAccumulator): The chart input.
+        columns (iterable): The DataFrame columns the chart reads. Default is all.
+        dimensions (iterable): The AggregateStore dimensions the chart reads.
+
+    Returns:
+        str: A hex digest.
+    """
+    if isinstance(data, pd.DataFrame):
+        from data_loader import dataset_version
+
+        version = dataset_version(data)
+        if version is not None:
+            return version
+        columns = list(data.columns if columns is None else columns)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((columns, len(data))).encode())
+        if not isinstance(data.index, pd.RangeIndex):
+            _hash_column(digest, data.index.to_series())
+        for column in columns:
+            _hash_column(digest, data[column])
+        return digest.hexdigest()
+    if hasattr(data, 'fingerprint'):
+        return data.fingerprint(dimensions)
+    if hasattr(data, 'to_dict'):
+        return hashlib.blake2b(repr(sorted(data.to_dict().items())).encode(), digest_size=16).hexdigest()
+    raise TypeError(f"Cannot fingerprint {type(data).__name__}")
+
+
+def _disk_path(key):
+    return os.path.join(CHART_CACHE_DIR, f'{key}.png')
+
+
+def _remember(key, image):
+    """
+    Keep an encoded chart in memory, evicting the least recently used ones over budget.
+    """
+    global _memory_bytes
+    if len(image) > MAX_MEMORY_BYTES:
+        return
+    with _lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return
+        _memory[key] = image
+        _memory_bytes += len(image)
+        while _memory_bytes > MAX_MEMORY_BYTES:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= len(evicted)
+            _stats['evictions'] += 1
+
+
+def _store_on_disk(key, image):
+    """
+    Write an encoded chart to the disk cache, removing the least recently used files over budget.
+    """
+    if len(image) > MAX_DISK_BYTES:
+        return
+    os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{_disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(image)
+    os.replace(tmp_path, _disk_path(key))
+
+    entries = []
+    for entry in os.scandir(CHART_CACHE_DIR):
+        if entry.name.endswith('.png'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= MAX_DISK_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        with _lock:
+            _stats['evictions'] += 1
+
+
+def get(key):
+    """
+    Look up an encoded chart in memory, then on disk.
+
+    Returns:
+        bytes: The PNG image, or None if the chart is not cached.
+    """
+    with _lock:
+        image = _memory.get(key)
+        if image is not None:
+            _memory.move_to_end(key)
+            _stats['hits'] += 1
+            return image
+    if MAX_DISK_BYTES > 0:
+        try:
+            with open(_disk_path(key), 'rb') as f:
+                image = f.read()
+            # The modification time orders files for eviction
+            os.utime(_disk_path(key))
+        except FileNotFoundError:
+            image = None
+    if image is None:
+        with _lock:
+            _stats['misses'] += 1
+        return None
+    with _lock:
+        _stats['disk_hits'] += 1
+    _remember(key, image)
+    return image
+
+
+def put(key, image):
+    """
+    Cache an encoded chart in memory and on disk, within their budgets.
+    """
+    if MAX_MEMORY_BYTES > 0:
+        _remember(key, image)
+    if MAX_DISK_BYTES > 0:
+        _store_on_disk(key, image)
+
+
+def encode_figure(figure):
+    """
+    Encode a matplotlib figure as PNG bytes.
+    """
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def cached_chart(columns=None, dimensions=None):
+    """
+    Cache the rendered image of a chart function.
+
+    The decorated function draws a chart of its first argument and returns the
+    matplotlib figure. The wrapper keys the rendered PNG by the function name,
+    a fingerprint of the data it reads (see data_fingerprint) and its other
+    arguments. On a hit the
+    cached image is shown without drawing anything; on a miss the figure is
+    drawn, encoded, closed, cached and shown.
+
+    Args:
+        columns (iterable or callable): The DataFrame columns the chart reads, or
+            a function of the chart's arguments returning them. Default is all.
+        dimensions (iterable): The AggregateStore dimensions the chart reads.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(data, *args, **kwargs):
+            import streamlit as st
+
+            chart_columns = columns(data, *args, **kwargs) if callable(columns) else columns
+            # Key positional, keyword and default arguments alike
+            arguments = signature.bind(data, *args, **kwargs)
+            arguments.apply_defaults()
+            options = list(arguments.arguments.items())[1:]
+            key = hashlib.blake2b(repr((
+                func.__module__, func.__qualname__, data_fingerprint(data, chart_columns, dimensions),
+                options, DPI,
+            )).encode(), digest_size=20).hexdigest()
+            image = get(key)
+            if image is None:
+                import matplotlib.pyplot as plt
+
+                figure = func(data, *args, **kwargs)
+                try:
+                    image = encode_figure(figure)
+                finally:
+                    # Free the artists now instead of at the next cyclic garbage collection
+                    figure.clear()
+                    plt.close(figure)
+                put(key, image)
+            st.image(image)
+
+        return wrapper
+
+    return decorator
+
+
+def cache_info():
+    """
+    Report the chart cache counters and sizes.
+
+    Returns:
+        dict: 'hits' (memory), 'disk_hits', 'misses', 'evictions', and the
+        'memory_entries' and 'memory_bytes' held by this process.
+    """
+    with _lock:
+        info = dict(_stats)
+        info['memory_entries'] = len(_memory)
+        info['memory_bytes'] = _memory_bytes
+    return info
+
+
+def clear_cache(disk=False):
+    """
+    Drop the charts cached in memory, and on disk if `disk` is true.
+    """
+    global _memory_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
+    if disk and os.path.isdir(CHART_CACHE_DIR):
+        for entry in os.scandir(CHART_CACHE_DIR):
+            if entry.name.endswith('.png'):
+                os.remove(entry.path)
@@ -0,0 +1,351 @@
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from aggregate_store import AggregateStore
+from regression import RegressionAccumulator
+from snapshot_store import SNAPSHOT_DIR, has_snapshots, load_aggregates, load_regression, load_volatility, read_snapshots
+from volatility import VolatilityTracker
+
+# CSV read when the snapshot store is empty
+DATA_PATH = 'github_repos.csv'
+
+# Format of the Date column in the CSV
+DATE_FORMAT = '%Y-%m-%d'
+
+# Explicit column types, so nothing is inferred on load
+TEXT_COLUMNS = ['Name', 'Description', 'URL']
+CATEGORY_COLUMNS = ['Language', 'Owner']
+COUNTER_COLUMNS = ['Stars', 'Forks', 'Watchers', 'Issues']
+CSV_DTYPES = dict(
+    {column: 'object' for column in TEXT_COLUMNS},
+    **{column: 'category' for column in CATEGORY_COLUMNS},
+    **{column: 'int64' for column in COUNTER_COLUMNS},
+)
+
+# Rows per chunk when a file is streamed instead of loaded whole
+CHUNK_SIZE = 250000
+
+# Number of differently filtered frames kept in memory
+MAX_CACHED_FRAMES = 4
+
+_frames = OrderedDict()
+_frames_lock = threading.Lock()
+
+# Version of every frame load_repositories returned that is still alive, as
+# id -> (weak reference, version)
+_versions = {}
+
+# Rollups of the current source, as (fingerprint, AggregateStore)
+_aggregates = None
+
+# Regression statistics of the current source, as (fingerprint, RegressionAccumulator)
+_regression = None
+
+# Star volatility of the current source, as (fingerprint, VolatilityTracker)
+_volatility = None
+
+
+def _source(path, snapshot_dir):
+    """
+    Return whether the snapshot store is used, and the file whose changes invalidate the cache.
+    """
+    if has_snapshots(snapshot_dir):
+        return True, os.path.join(snapshot_dir, '_state', 'latest.parquet')
+    return False, path
+
+
+def _fingerprint(path):
+    """
+    Identify a version of a file or directory by its size and modification time.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _apply_schema(data):
+    """
+    Convert a freshly read frame to the explicit schema, in place.
+    """
+    if 'Owner' not in data.columns and 'URL' in data.columns:
+        data['Owner'] = data['URL'].str.rstrip('/').str.split('/').str[-2]
+    for column in CATEGORY_COLUMNS:
+        if column in data.columns and data[column].dtype.name != 'category':
+            data[column] = data[column].astype('category')
+    for column in COUNTER_COLUMNS:
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], downcast='unsigned')
+    return data
+
+
+def _csv_usecols(path, columns):
+    """
+    Return the CSV columns to parse for the requested columns; Owner may need URL.
+    """
+    if columns is None:
+        return None
+    available = set(pd.read_csv(path, nrows=0).columns)
+    usecols = [column for column in columns if column in available]
+    if 'Owner' in columns and 'Owner' not in available and 'URL' not in usecols:
+        usecols.append('URL')
+    return usecols
+
+
+def _is_parquet(path):
+    return path.endswith(('.parquet', '.pq'))
+
+
+def _read_file(path, start, end, columns):
+    """
+    Read a CSV or Parquet file with explicit types, parsing only the requested columns.
+    """
+    if _is_parquet(path):
+        data = pq.read_table(path, columns=columns).to_pandas()
+    else:
+        data = pd.read_csv(path, usecols=_csv_usecols(path, columns), dtype=CSV_DTYPES)
+    if 'Date' in data.columns:
+        if not _is_parquet(path):
+            data['Date'] = pd.to_datetime(data['Date'], format=DATE_FORMAT)
+        if start is not None:
+            data = data[data['Date'] >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data['Date'] <= pd.Timestamp(end)]
+    data = _apply_schema(data.reset_index(drop=True))
+    if columns is not None:
+        data = data[list(columns)]
+    return data
+
+
+def load_repositories(start=None, end=None, columns=None, predicate=None, path=DATA_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load GitHub repository data, parsing it only when the source has changed.
+
+    Reads the snapshot store when it has been populated, one row per repository
+    as it stood at the end of the range, and the file otherwise. Counters are downcast to the smallest unsigned integer type, Language and
+    Owner become categoricals and Date is parsed with a fixed format. The parsed
+    frame is cached per process, keyed on the source's size and modification
+    time plus the arguments, so every session and rerun shares one copy.
+
+    Args:
+        start (date): The first snapshot date to include. Default is the earliest.
+        end (date): The last snapshot date to include. Default is the latest.
+        columns (list): The columns to load. Default is all columns.
+        predicate (pyarrow.dataset.Expression): An optional row filter pushed down
+            to the snapshot reader; ignored for the CSV.
+        path (str): The file to read when the snapshot store is empty: a CSV in
+            the github_repos.csv layout or a Parquet file (.parquet or .pq).
+        snapshot_dir (str): The snapshot dataset directory.
+
+    Returns:
+        DataFrame: A shallow copy of the cached frame, identified by
+        dataset_version. Adding or replacing columns does not affect the cache;
+        the column data itself must not be modified.
+    """
+    use_snapshots, source = _source(path, snapshot_dir)
+    key = (_fingerprint(source), start, end, None if columns is None else tuple(columns),
+           None if predicate is None else str(predicate))
+    with _frames_lock:
+        if key in _frames:
+            _frames.move_to_end(key)
+            return _versioned(_frames[key], key)
+
+    if use_snapshots:
+        data = _apply_schema(read_snapshots(start, end, columns, predicate, root=snapshot_dir))
+    else:
+        data = _read_file(path, start, end, columns)
+
+    with _frames_lock:
+        _frames[key] = data
+        _frames.move_to_end(key)
+        while len(_frames) > MAX_CACHED_FRAMES:
+            _frames.popitem(last=False)
+    return _versioned(data, key)
+
+
+def _versioned(data, key):
+    """
+    Return a shallow copy of a cached frame, registered with the version of its cache key.
+    """
+    frame = data.copy(deep=False)
+    frame_id = id(frame)
+    version = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+    # The callback runs before the id can be reused, and must not take a lock
+    _versions[frame_id] = (weakref.ref(frame, lambda _: _versions.pop(frame_id, None)), version)
+    return frame
+
+
+def dataset_version(data):
+    """
+    Return the version of the data a frame returned by load_repositories holds.
+
+    The version is a hash of the source's size and modification time and the
+    load arguments, so it changes whenever the data does, and caches of what
+    is drawn from a frame can be keyed by it without reading the frame. Frames
+    derived from it, e.g. by filtering, have no version. Columns replaced in
+    place are not noticed; copy the frame before replacing columns of it.
+
+    Args:
+        data (DataFrame): A frame.
+
+    Returns:
+        str: A hex digest, or None if `data` is not a frame load_repositories returned.
+    """
+    entry = _versions.get(id(data))
+    if entry is None or entry[0]() is not data:
+        return None
+    return entry[1]
+
+
+def iter_repository_chunks(path=DATA_PATH, columns=None, chunk_size=CHUNK_SIZE):
+    """
+    Read a repositories CSV or Parquet file a chunk at a time.
+
+    Chunks get the same types as load_repositories, and only one is held in
+    memory at a time, so files larger than memory can be aggregated.
+
+    Args:
+        path (str): A CSV in the github_repos.csv layout, or a Parquet file
+            (.parquet or .pq) such as those written by generate_github_data.py.
+        columns (list): The columns to read. Default is all columns.
+        chunk_size (int): The number of rows per chunk.
+
+    Yields:
+        DataFrame: The next chunk of rows.
+    """
+    if _is_parquet(path):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield _apply_schema(batch.to_pandas())
+        return
+    usecols = _csv_usecols(path, columns)
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=CSV_DTYPES, chunksize=chunk_size):
+        if 'Date' in chunk.columns:
+            chunk['Date'] = pd.to_datetime(chunk['Date'], format=DATE_FORMAT)
+        chunk = _apply_schema(chunk)
+        yield chunk if columns is None else chunk[list(columns)]
+
+
+def load_repository_aggregates(path=DATA_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load the year, quarter, language and owner rollups of the repository data.
+
+    With a populated snapshot store these are the rollups maintained at ingest
+    time, so no repository rows are read. Otherwise they are built from the CSV
+    once per version of the file.
+
+    Args:
+        path (str): The CSV to read when the snapshot store is empty.
+        snapshot_dir (str): The snapshot dataset directory.
+
+    Returns:
+        AggregateStore: The rollups, shared between callers; do not update it.
+    """
+    global _aggregates
+    use_snapshots, source = _source(path, snapshot_dir)
+    fingerprint = _fingerprint(source)
+    with _frames_lock:
+        if _aggregates is not None and _aggregates[0] == fingerprint:
+            return _aggregates[1]
+
+    if use_snapshots:
+        aggregates = load_aggregates(snapshot_dir)
+    else:
+        aggregates = AggregateStore.from_frame(load_repositories(path=path, snapshot_dir=snapshot_dir))
+
+    with _frames_lock:
+        _aggregates = (fingerprint, aggregates)
+    return aggregates
+
+
+def load_repository_regression(path=DATA_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load the regression statistics (see regression.py) of the repository data.
+
+    With a populated snapshot store these are the statistics maintained at
+    ingest time. Otherwise they are built from the CSV once per version of the file.
+
+    Args:
+        path (str): The CSV to read when the snapshot store is empty.
+        snapshot_dir (str): The snapshot dataset directory.
+
+    Returns:
+        RegressionAccumulator: The statistics, shared between callers; do not update it.
+    """
+    global _regression
+    use_snapshots, source = _source(path, snapshot_dir)
+    fingerprint = _fingerprint(source)
+    with _frames_lock:
+        if _regression is not None and _regression[0] == fingerprint:
+            return _regression[1]
+
+    if use_snapshots:
+        regression = load_regression(snapshot_dir)
+    else:
+        regression = RegressionAccumulator.from_frame(load_repositories(path=path, snapshot_dir=snapshot_dir))
+
+    with _frames_lock:
+        _regression = (fingerprint, regression)
+    return regression
+
+
+def load_repository_volatility(path=DATA_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """
+    Load the per-repository star volatility (see volatility.py) of the repository data.
+
+    With a populated snapshot store these are the statistics maintained at
+    ingest time. Otherwise the CSV is read as a history with one snapshot per
+    Date, as snapshot_store.import_csv does, once per version of the file.
+
+    Args:
+        path (str): The CSV to read when the snapshot store is empty.
+        snapshot_dir (str): The snapshot dataset directory.
+
+    Returns:
+        VolatilityTracker: The statistics, shared between callers; do not update it.
+    """
+    global _volatility
+    use_snapshots, source = _source(path, snapshot_dir)
+    fingerprint = _fingerprint(source)
+    with _frames_lock:
+        if _volatility is not None and _volatility[0] == fingerprint:
+            return _volatility[1]
+
+    if use_snapshots:
+        volatility = load_volatility(snapshot_dir)
+    else:
+        volatility = VolatilityTracker.from_frame(load_repositories(path=path, snapshot_dir=snapshot_dir))
+
+    with _frames_lock:
+        _volatility = (fingerprint, volatility)
+    return volatility
+
+
+def cached_frames_info():
+    """
+    Report the frames held by the loader cache.
+
+    Returns:
+        list: A dict per cached frame with its 'rows', 'columns' and 'bytes' in memory.
+    """
+    with _frames_lock:
+        frames = list(_frames.values())
+    return [
+        {'rows': len(frame), 'columns': len(frame.columns), 'bytes': int(frame.memory_usage(deep=True).sum())}
+        for frame in frames
+    ]
+
+
+def clear_cache():
+    """
+    Drop all cached frames, rollups, regression and volatility statistics.
+    """
+    global _aggregates, _regression, _volatility
+    with _frames_lock:
+        _frames.clear()
+        _aggregates = None
+        _regression = None
+        _volatility = None
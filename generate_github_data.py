@@ -1,21 +1,189 @@
+"""
+Generate a synthetic GitHub repositories dataset for load testing.
+
+Rows use the github_repos.csv layout plus an Owner column. Stars follow a
+power law, forks, watchers and issues scale with stars, languages and owners
+are Zipf-distributed and creation dates span several years with more
+repositories in recent ones. Rows are generated and written in chunks, so
+memory stays bounded by the chunk size however many rows are requested. The
+same seed and chunk size always produce the same data.
+
+Usage:
+    python generate_github_data.py --rows 1000000
+    python generate_github_data.py --rows 100000000 --output .bench/data/synthetic.parquet
+"""
+import argparse
+import os
+
+import numpy as np
 import pandas as pd
 
-# Sample data with Owner column added
-data = {
-    'Repository Name': ['project1', 'project2', 'project3'],
-    'Description': ['Description of project1', 'Description of project2', 'Description of project3'],
-    'Stars': [100, 200, 150],
-    'Forks': [50, 100, 80],
-    'Watchers': [80, 120, 90],
-    'Issues': [10, 20, 15],
-    'URL': ['https://github.com/user/project1', 'https://github.com/user/project2', 'https://github.com/user/project3'],
-    'Date': ['2023-01-01', '2023-01-02', '2023-01-03'],
-    'Language': ['Python', 'JavaScript', 'Java'],
-    'Owner': ['owner1', 'owner2', 'owner3']  # Add owner information here
+# Where the data is written when no --output is given; github_data.csv is a
+# tracked fixture, so the default stays out of the repository
+DEFAULT_OUTPUT = os.path.join('.bench', 'data', 'synthetic.csv')
+
+# Column layout of the generated data
+COLUMNS = ['Name', 'Description', 'Stars', 'Forks', 'Watchers', 'Issues', 'URL', 'Date', 'Language', 'Owner']
+
+# Languages in order of popularity; rank r is drawn with weight 1 / r ** LANGUAGE_EXPONENT
+LANGUAGES = (
+    'JavaScript', 'Python', 'Java', 'TypeScript', 'C#', 'C++', 'PHP', 'C', 'Go', 'Shell',
+    'Ruby', 'Rust', 'Kotlin', 'Swift', 'Jupyter Notebook', 'HTML', 'Dart', 'Scala', 'R', 'Lua',
+)
+LANGUAGE_EXPONENT = 1.1
+
+# Owner rank r is drawn with weight 1 / r ** OWNER_EXPONENT
+OWNER_EXPONENT = 1.05
+
+# Pareto tail index of the star distribution, and the largest star count generated
+STAR_ALPHA = 1.2
+MAX_STARS = 500000
+
+# Median ratio to stars and log-normal spread of each correlated counter
+COUNTER_RATIOS = {
+    'Forks': (0.15, 0.6),
+    'Watchers': (1.1, 0.3),
+    'Issues': (0.01, 0.9),
 }
 
-# Create DataFrame
-df = pd.DataFrame(data)
+# Range of creation dates
+START_DATE = np.datetime64('2008-01-01')
+END_DATE = np.datetime64('2024-12-31')
+
+DEFAULT_CHUNK_SIZE = 250000
+
+FORMATS = ('csv', 'parquet')
+
+
+def _zipf_cdf(count, exponent):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def _draw(rng, cdf, size):
+    """
+    Draw 0-based ranks from the discrete distribution with the given CDF.
+    """
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side='right'), len(cdf) - 1)
+
+
+def _generate_chunk(rng, first_id, size, language_cdf, owner_cdf):
+    ids = pd.Series(np.arange(first_id, first_id + size)).astype(str)
+    names = 'repo' + ids
+    owners = 'owner' + pd.Series(_draw(rng, owner_cdf, size)).astype(str)
+
+    stars = np.minimum(np.floor(rng.pareto(STAR_ALPHA, size) * 10), MAX_STARS)
+    counters = {'Stars': stars.astype(np.int64)}
+    for column, (ratio, sigma) in COUNTER_RATIOS.items():
+        counters[column] = np.floor(stars * rng.lognormal(np.log(ratio), sigma, size)).astype(np.int64)
+
+    # sqrt of a uniform variate gives a linearly growing number of repositories per day
+    span = (END_DATE - START_DATE).astype(np.int64)
+    dates = START_DATE + (np.sqrt(rng.random(size)) * span).astype('timedelta64[D]')
+
+    return pd.DataFrame({
+        'Name': names,
+        'Description': 'Synthetic repository ' + ids,
+        **counters,
+        'URL': 'https://github.com/' + owners + '/' + names,
+        'Date': dates.astype('datetime64[ns]'),
+        'Language': pd.Categorical.from_codes(_draw(rng, language_cdf, size), LANGUAGES),
+        'Owner': owners,
+    }, columns=COLUMNS)
+
+
+def iter_synthetic_chunks(num_rows, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, num_owners=None):
+    """
+    Generate synthetic repository rows chunk by chunk.
+
+    Each chunk has its own random stream derived from the seed and the chunk
+    number, so chunks can also be generated independently.
+
+    Args:
+        num_rows (int): The total number of rows.
+        seed (int): The random seed.
+        chunk_size (int): The number of rows per chunk.
+        num_owners (int): The number of distinct owners. Default is one per ten
+            rows, at most one million.
+
+    Yields:
+        DataFrame: The next chunk of rows.
+    """
+    if num_owners is None:
+        num_owners = max(1, min(num_rows // 10, 1000000))
+    language_cdf = _zipf_cdf(len(LANGUAGES), LANGUAGE_EXPONENT)
+    owner_cdf = _zipf_cdf(num_owners, OWNER_EXPONENT)
+    for index, first_id in enumerate(range(0, num_rows, chunk_size)):
+        rng = np.random.default_rng([seed, index])
+        yield _generate_chunk(rng, first_id, min(chunk_size, num_rows - first_id), language_cdf, owner_cdf)
+
+
+def write_synthetic_dataset(path, num_rows, seed=0, chunk_size=DEFAULT_CHUNK_SIZE, num_owners=None,
+                            output_format=None):
+    """
+    Write a synthetic repositories dataset to a CSV or Parquet file, one chunk at a time.
+
+    CSV dates are written as YYYY-MM-DD; each chunk becomes one Parquet row group.
+
+    Args:
+        path (str): The file to write.
+        num_rows (int): The total number of rows.
+        seed (int): The random seed.
+        chunk_size (int): The number of rows generated and written at a time.
+        num_owners (int): The number of distinct owners, see iter_synthetic_chunks.
+        output_format (str): 'csv' or 'parquet'. Default is taken from the file extension.
+
+    Returns:
+        int: The number of rows written.
+    """
+    output_format = output_format or ('parquet' if path.endswith(('.parquet', '.pq')) else 'csv')
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    chunks = iter_synthetic_chunks(num_rows, seed, chunk_size, num_owners)
+    written = 0
+    if output_format == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in chunks:
+                chunk.to_csv(f, header=written == 0, index=False, date_format='%Y-%m-%d')
+                written += len(chunk)
+        return written
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--format', dest='output_format', choices=FORMATS, default=None,
+                        help='default is taken from the file extension')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--owners', type=int, default=None, help='number of distinct owners')
+    args = parser.parse_args()
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    written = write_synthetic_dataset(args.output, args.rows, args.seed, args.chunk_size, args.owners,
+                                      args.output_format)
+    print(f"Wrote {written} rows to {args.output} ({os.path.getsize(args.output) / 2 ** 20:.1f} MiB)")
+
 
-# Save DataFrame to CSV
-df.to_csv('github_data.csv', index=False)
+if __name__ == "__main__":
+    main()
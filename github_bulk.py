@@ -0,0 +1,174 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+import requests
+
+from github_client import RateLimitError, api_url, get_json, rate_limit_status
+
+# Resources that can be fetched for each repository
+RESOURCES = ('info', 'contributors', 'issues')
+
+# Requests kept in reserve so interactive pages still work during a bulk run
+RATE_LIMIT_RESERVE = 5
+
+
+@dataclass
+class BulkResult:
+    """
+    Outcome of a bulk fetch for one repository.
+
+    Each requested resource is either stored in its attribute or, if it could
+    not be fetched, the exception raised for it is stored in `errors` under the
+    resource name.
+    """
+    owner: str
+    repo: str
+    info: dict = None
+    contributors: list = None
+    issues: list = None
+    errors: dict = field(default_factory=dict)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+
+class RateLimitScheduler:
+    """
+    Paces bulk requests according to the rate limit reported by GitHub.
+
+    Before each request the scheduler checks the remaining quota; once it drops
+    to the reserve, requests wait until the window resets. A Retry-After from a
+    rejected request pauses every worker for the given time.
+    """
+
+    def __init__(self, reserve=RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.paused_until = 0.0
+        self.remaining = None
+        self.reset = None
+        self._lock = asyncio.Lock()
+
+    def refresh(self):
+        """
+        Pick up the latest rate limit state seen by the HTTP client.
+        """
+        status = rate_limit_status()
+        if status['remaining'] is not None:
+            self.remaining = status['remaining']
+            self.reset = status['reset']
+
+    def pause(self, seconds):
+        """
+        Hold back all requests for the given number of seconds.
+        """
+        self.paused_until = max(self.paused_until, time.time() + seconds)
+
+    async def acquire(self):
+        """
+        Wait until a request may be sent and reserve one unit of quota for it.
+        """
+        async with self._lock:
+            while True:
+                now = time.time()
+                if self.paused_until > now:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                if self.remaining is not None and self.remaining <= self.reserve and self.reset:
+                    if self.reset > now:
+                        await asyncio.sleep(self.reset - now + 1)
+                    # A new window has started, the next response tells us the real quota
+                    self.remaining = None
+                    continue
+                if self.remaining is not None:
+                    self.remaining -= 1
+                return
+
+
+async def _fetch(url, params, scheduler, semaphore, max_retries):
+    for attempt in range(max_retries + 1):
+        async with semaphore:
+            await scheduler.acquire()
+            try:
+                return await asyncio.to_thread(get_json, url, params)
+            except RateLimitError as e:
+                if attempt == max_retries:
+                    raise
+                scheduler.pause(e.retry_after)
+            finally:
+                scheduler.refresh()
+
+
+async def _fetch_repository(owner, repo, resources, scheduler, semaphore, max_retries, issue_state, issues_per_page):
+    base_url = api_url(f'/repos/{owner}/{repo}')
+    requests_by_resource = {
+        'info': (base_url, None),
+        'contributors': (f'{base_url}/contributors', None),
+        'issues': (f'{base_url}/issues', {'state': issue_state, 'per_page': issues_per_page}),
+    }
+    result = BulkResult(owner, repo)
+    tasks = [_fetch(*requests_by_resource[resource], scheduler, semaphore, max_retries) for resource in resources]
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    for resource, outcome in zip(resources, outcomes):
+        if isinstance(outcome, (requests.RequestException, ValueError)):
+            result.errors[resource] = outcome
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            setattr(result, resource, outcome)
+    return result
+
+
+async def fetch_repositories_bulk_async(repositories, resources=RESOURCES, concurrency=8, max_retries=3,
+                                        issue_state='open', issues_per_page=10):
+    """
+    Fetch information, contributors and issues for many repositories concurrently.
+
+    Args:
+        repositories (iterable): (owner, repo_name) pairs.
+        resources (tuple): Which of 'info', 'contributors' and 'issues' to fetch.
+        concurrency (int): The maximum number of requests in flight at once.
+        max_retries (int): How many times a rate-limited request is retried.
+        issue_state (str): The state of the issues to fetch ('open', 'closed', or 'all').
+        issues_per_page (int): The number of issues fetched per repository.
+
+    Returns:
+        list: A BulkResult for each repository, in input order.
+    """
+    unknown = set(resources) - set(RESOURCES)
+    if unknown:
+        raise ValueError(f"Unknown resources: {', '.join(sorted(unknown))}")
+    scheduler = RateLimitScheduler()
+    scheduler.refresh()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = [
+        _fetch_repository(owner, repo, tuple(resources), scheduler, semaphore, max_retries, issue_state, issues_per_page)
+        for owner, repo in repositories
+    ]
+    return await asyncio.gather(*tasks)
+
+
+def fetch_repositories_bulk(repositories, **kwargs):
+    """
+    Synchronous wrapper around fetch_repositories_bulk_async.
+
+    Args:
+        repositories (iterable): (owner, repo_name) pairs.
+        **kwargs: Options passed on to fetch_repositories_bulk_async.
+
+    Returns:
+        list: A BulkResult for each repository, in input order.
+    """
+    return asyncio.run(fetch_repositories_bulk_async(repositories, **kwargs))
+
+
+if __name__ == "__main__":
+    # Example usage:
+    results = fetch_repositories_bulk([('streamlit', 'streamlit'), ('pytorch', 'pytorch')])
+    for result in results:
+        if result.ok:
+            print(f"{result.owner}/{result.repo}: {result.info.get('stargazers_count')} stars, "
+                  f"{len(result.contributors)} contributors, {len(result.issues)} open issues")
+        else:
+            print(f"{result.owner}/{result.repo}: failed to fetch {', '.join(result.errors)}")
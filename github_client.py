@@ -0,0 +1,559 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from json_stream import iter_array_batches
+from response_cache import DEFAULT_CACHE_PATH, ResponseCache
+
+# Base URL of the GitHub REST API; point it at a local stand-in for offline runs
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+# Personal access token sent with every request, if set; required for GraphQL
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+
+# Number of keep-alive connections kept open per host
+POOL_SIZE = 10
+
+# Seconds to wait for the GitHub API before giving up on a request
+REQUEST_TIMEOUT = 30
+
+# Maximum number of responses remembered in memory for conditional revalidation
+# when the on-disk cache is disabled
+MAX_VALIDATORS = 2048
+
+# On-disk response cache location; set GITHUB_CACHE_PATH to an empty string to disable it
+CACHE_PATH = os.environ.get('GITHUB_CACHE_PATH', DEFAULT_CACHE_PATH)
+
+# Share one outstanding request between concurrent callers of the same resource
+SINGLE_FLIGHT = True
+
+# Bytes read from the network at a time when streaming a response
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Seconds to back off when GitHub rate-limits us without saying for how long
+DEFAULT_RETRY_AFTER = 60
+
+_session = None
+_session_lock = threading.Lock()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Maps a request key to (etag, last_modified, body, headers) of the last 200 response. The raw
+# body is kept and decoded again for every caller, like the on-disk cache does, so no caller
+# can modify what a later one is given
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+# Maps a request key to the _Call currently fetching it
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# Upstream requests sent and callers served by another caller's request
+_counters = {'requests': 0, 'coalesced': 0}
+_counters_lock = threading.Lock()
+
+# Last rate limit state reported by GitHub, per rate limit resource ('core', 'search', 'graphql', ...)
+_rate_limits = {}
+_rate_limit_lock = threading.Lock()
+
+
+class RateLimitError(requests.HTTPError):
+    """
+    Raised when GitHub rejects a request because a rate limit was hit.
+
+    Attributes:
+        retry_after (float): Seconds to wait before the request may be retried.
+    """
+
+    def __init__(self, message, retry_after, response=None):
+        super().__init__(message, response=response)
+        self.retry_after = retry_after
+
+
+class _Call:
+    """
+    A request in flight whose outcome is shared with every caller waiting on it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+def get_session():
+    """
+    Return the process-wide HTTP session used for every GitHub API call.
+
+    The session keeps connections alive between calls, so repeated requests
+    to api.github.com reuse the same TCP/TLS connection.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({'Accept': 'application/vnd.github+json'})
+                if GITHUB_TOKEN:
+                    session.headers['Authorization'] = f'Bearer {GITHUB_TOKEN}'
+                _session = session
+    return _session
+
+
+def api_url(path):
+    """
+    Build the full URL of a GitHub API endpoint.
+
+    Args:
+        path (str): The endpoint path, e.g. '/repos/streamlit/streamlit'.
+
+    Returns:
+        str: The URL under the configured API base URL.
+    """
+    return f"{GITHUB_API_URL}{path}"
+
+
+def set_base_url(url):
+    """
+    Send all following requests to another API base URL, e.g. a local stand-in server.
+
+    Args:
+        url (str): The new base URL, e.g. 'http://127.0.0.1:8000'.
+    """
+    global GITHUB_API_URL
+    GITHUB_API_URL = url.rstrip('/')
+
+
+def get_cache():
+    """
+    Return the on-disk response cache, creating it on first use.
+
+    Returns:
+        ResponseCache: The shared cache, or None if caching is disabled.
+    """
+    global _cache
+    if _cache is None and CACHE_PATH:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = ResponseCache(CACHE_PATH)
+                except (sqlite3.Error, OSError) as e:
+                    print(f"Response cache disabled: {e}")
+                    return None
+    return _cache
+
+
+def set_cache(cache):
+    """
+    Replace the on-disk response cache, e.g. with one at another path.
+
+    Args:
+        cache (ResponseCache): The cache to use, or None to disable caching.
+    """
+    global _cache, CACHE_PATH
+    with _cache_lock:
+        _cache = cache
+        if cache is None:
+            CACHE_PATH = ''
+
+
+def cache_stats():
+    """
+    Return the hit/miss counters and size of the on-disk response cache.
+
+    Returns:
+        dict: The cache statistics, empty if caching is disabled.
+    """
+    cache = get_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def client_stats():
+    """
+    Return how many requests were sent upstream and how many were coalesced.
+
+    Returns:
+        dict: 'requests' sent to the API and 'coalesced' calls that shared another
+        caller's in-flight request instead of sending their own.
+    """
+    with _counters_lock:
+        return dict(_counters)
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def _request_key(url, params=None):
+    """
+    Build the key identifying a request for revalidation purposes.
+    """
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+def _remember(key, etag, last_modified, body, headers):
+    with _validators_lock:
+        _validators[key] = (etag, last_modified, body, dict(headers))
+        _validators.move_to_end(key)
+        while len(_validators) > MAX_VALIDATORS:
+            _validators.popitem(last=False)
+
+
+def _lookup(key):
+    with _validators_lock:
+        entry = _validators.get(key)
+        if entry is not None:
+            _validators.move_to_end(key)
+        return entry
+
+
+def _record_rate_limit(response):
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    reset = response.headers.get('X-RateLimit-Reset')
+    if remaining is None or reset is None:
+        return
+    resource = response.headers.get('X-RateLimit-Resource', 'core')
+    with _rate_limit_lock:
+        _rate_limits[resource] = {'remaining': int(remaining), 'reset': int(reset)}
+
+
+def _retry_after(response):
+    """
+    Work out how long to wait after a rate-limited response.
+    """
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+    reset = response.headers.get('X-RateLimit-Reset')
+    if reset is not None:
+        return max(0.0, int(reset) - time.time())
+    return DEFAULT_RETRY_AFTER
+
+
+def _is_rate_limited(response):
+    if response.status_code == 429:
+        return True
+    return response.status_code == 403 and (
+        'Retry-After' in response.headers or response.headers.get('X-RateLimit-Remaining') == '0'
+    )
+
+
+def rate_limit_status(resource='core'):
+    """
+    Return the most recent rate limit state reported by GitHub.
+
+    Args:
+        resource (str): The rate limit resource: 'core' for the REST API,
+            'search' or 'graphql'.
+
+    Returns:
+        dict: 'remaining' requests in the current window and the 'reset' epoch
+        timestamp, both None until a response carrying rate limit headers is seen.
+    """
+    with _rate_limit_lock:
+        return dict(_rate_limits.get(resource, {'remaining': None, 'reset': None}))
+
+
+def get(url, params=None):
+    """
+    Perform a GET request against the GitHub API and decode the JSON body.
+
+    Responses are kept in the on-disk cache and served from it without a
+    request while they are fresh. If the same resource was fetched before but
+    has expired, the request is sent with If-None-Match / If-Modified-Since so
+    that an unchanged resource comes back as 304 Not Modified; in that case the
+    previously stored body is returned. 304 responses do not count against the
+    GitHub rate limit. Concurrent calls for the same URL and parameters share a
+    single outstanding request; each caller gets its own copy of the decoded
+    result, so callers may modify what they are given.
+
+    Args:
+        url (str): The full API URL.
+        params (dict): Optional query string parameters.
+
+    Returns:
+        tuple: The decoded JSON body and the (case-insensitive) response headers.
+
+    Raises:
+        RateLimitError: If GitHub rejected the request because of a rate limit.
+        requests.RequestException: If the request fails or returns a non-2xx status.
+    """
+    key = _request_key(url, params)
+    if not SINGLE_FLIGHT:
+        return _get(key, url, params)
+
+    with _inflight_lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+        else:
+            call.waiters += 1
+    if not leader:
+        _count('coalesced')
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        body, headers = call.result
+        return copy.deepcopy(body), headers.copy()
+
+    result = None
+    try:
+        result = _get(key, url, params)
+        return result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+        # No one can join once the call is removed. _get decodes a new object
+        # for every call, so the leader's caller owns `result`; the waiters
+        # copy from a snapshot taken before that caller can modify it
+        if call.waiters and result is not None:
+            body, headers = result
+            call.result = copy.deepcopy(body), headers.copy()
+        call.done.set()
+
+
+def _cached_entry(cache, key):
+    if cache is None:
+        return None
+    try:
+        return cache.get(key)
+    except sqlite3.Error:
+        return None
+
+
+def _validator_headers(etag, last_modified):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def _check_rate_limit(response):
+    _record_rate_limit(response)
+    if _is_rate_limited(response):
+        response.close()
+        raise RateLimitError(f"Rate limit exceeded for url: {response.url}",
+                             retry_after=_retry_after(response), response=response)
+
+
+def _refresh_entry(cache, key, url):
+    try:
+        cache.refresh(key, cache.ttl_for(url))
+    except sqlite3.Error:
+        pass
+
+
+def _store_entry(cache, key, url, body, headers):
+    try:
+        cache.put(key, body, headers, headers.get('ETag'), headers.get('Last-Modified'), cache.ttl_for(url))
+    except sqlite3.Error:
+        pass
+
+
+def _get(key, url, params):
+    """
+    Fetch a resource through the response cache and conditional request layers.
+    """
+    cache = get_cache()
+    entry = _cached_entry(cache, key)
+    cached = _lookup(key) if cache is None else None
+    if entry is not None and entry['fresh']:
+        return json.loads(entry['body']), CaseInsensitiveDict(entry['headers'])
+
+    if entry is not None:
+        headers = _validator_headers(entry['etag'], entry['last_modified'])
+    elif cached is not None:
+        headers = _validator_headers(cached[0], cached[1])
+    else:
+        headers = {}
+
+    _count('requests')
+    response = get_session().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT)
+    _check_rate_limit(response)
+    if response.status_code == 304 and entry is not None:
+        _refresh_entry(cache, key, url)
+        return json.loads(entry['body']), CaseInsensitiveDict(entry['headers'])
+    if response.status_code == 304 and cached is not None:
+        return json.loads(cached[2]), CaseInsensitiveDict(cached[3])
+    response.raise_for_status()  # Raise an error for non-2xx status codes
+
+    data = response.json()
+    if cache is not None:
+        _store_entry(cache, key, url, response.content, response.headers)
+    else:
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            _remember(key, etag, last_modified, response.content, response.headers)
+    return data, response.headers
+
+
+class JsonStream:
+    """
+    A GitHub API response whose JSON array is decoded while it downloads.
+
+    The request is sent when the stream is created, so `headers` (e.g. the Link
+    header) are available right away. Iterating the stream yields the elements
+    of the array, either the whole document or the array under `items_key`, as
+    soon as they have arrived, without materialising the whole response. The
+    other top-level values (e.g. 'total_count') are collected in `meta`.
+
+    Fresh cached responses are replayed from the on-disk cache and expired ones
+    are revalidated with their ETag, like get(). Streams are not coalesced with
+    concurrent requests.
+
+    Args:
+        url (str): The full API URL.
+        params (dict): Optional query string parameters.
+        items_key (str): The top-level key holding the array, or None if the
+            document itself is the array.
+        chunk_size (int): The number of bytes read from the network at a time.
+
+    Raises:
+        RateLimitError: If GitHub rejected the request because of a rate limit.
+        requests.RequestException: If the request fails or returns a non-2xx status.
+    """
+
+    def __init__(self, url, params=None, items_key=None, chunk_size=STREAM_CHUNK_SIZE):
+        self.items_key = items_key
+        self.chunk_size = chunk_size
+        self.meta = {}
+        self._url = url
+        self._key = _request_key(url, params)
+        self._cache = get_cache()
+        self._response = None
+        self._body = None
+
+        entry = _cached_entry(self._cache, self._key)
+        if entry is not None and entry['fresh']:
+            self._body = entry['body']
+            self.headers = CaseInsensitiveDict(entry['headers'])
+            return
+
+        headers = _validator_headers(entry['etag'], entry['last_modified']) if entry is not None else {}
+        _count('requests')
+        response = get_session().get(url, params=params, headers=headers, timeout=REQUEST_TIMEOUT, stream=True)
+        _check_rate_limit(response)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            _refresh_entry(self._cache, self._key, url)
+            self._body = entry['body']
+            self.headers = CaseInsensitiveDict(entry['headers'])
+            return
+        try:
+            response.raise_for_status()  # Raise an error for non-2xx status codes
+        except requests.HTTPError:
+            response.close()
+            raise
+        self._response = response
+        self.headers = response.headers
+
+    def _chunks(self):
+        if self._body is not None:
+            for start in range(0, len(self._body), self.chunk_size):
+                yield self._body[start:start + self.chunk_size]
+            return
+        # Keep the raw bytes only if they are going to be cached; they are far
+        # smaller than the decoded objects
+        body = bytearray() if self._cache is not None else None
+        for chunk in self._response.iter_content(self.chunk_size):
+            if body is not None:
+                body += chunk
+            yield chunk
+        if body is not None:
+            _store_entry(self._cache, self._key, self._url, bytes(body), self.headers)
+
+    def batches(self):
+        """
+        Yield the array elements decoded from each chunk of the body, as lists.
+        """
+        try:
+            yield from iter_array_batches(self._chunks(), self.items_key, self.meta)
+        finally:
+            self.close()
+
+    def __iter__(self):
+        for batch in self.batches():
+            yield from batch
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_json(url, params=None):
+    """
+    Fetch a GitHub API resource and return only its decoded JSON body.
+
+    Args:
+        url (str): The full API URL.
+        params (dict): Optional query string parameters.
+
+    Returns:
+        dict or list: The decoded JSON body.
+
+    Raises:
+        requests.RequestException: If the request fails or returns a non-2xx status.
+    """
+    data, _ = get(url, params=params)
+    return data
+
+
+def post_json(url, payload):
+    """
+    POST a JSON payload to the GitHub API and decode the JSON response.
+
+    Used for GraphQL queries, which are never cached.
+
+    Args:
+        url (str): The full API URL.
+        payload (dict): The JSON request body.
+
+    Returns:
+        dict or list: The decoded JSON body.
+
+    Raises:
+        RateLimitError: If GitHub rejected the request because of a rate limit.
+        requests.RequestException: If the request fails or returns a non-2xx status.
+    """
+    _count('requests')
+    response = get_session().post(url, json=payload, timeout=REQUEST_TIMEOUT)
+    _check_rate_limit(response)
+    response.raise_for_status()  # Raise an error for non-2xx status codes
+    return response.json()
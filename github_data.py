@@ -1,70 +1,295 @@
+import csv
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
 import requests
 
-def get_most_starred_repositories(language='python', limit=10):
+from github_client import JsonStream, api_url, get, get_json
+from repository_records import (
+    OUTPUTS,
+    check_fields,
+    columns_to_array,
+    columns_to_frame,
+    concat_columns,
+    project_items
+)
+
+# GitHub's search API never returns more than this many results for one query
+SEARCH_RESULT_LIMIT = 1000
+
+# Largest page size accepted by the GitHub API
+MAX_PER_PAGE = 100
+
+# Column layout of github_repos.csv
+CSV_COLUMNS = ['Name', 'Description', 'Stars', 'Forks', 'Watchers', 'Issues', 'URL', 'Date', 'Language']
+
+# Seconds a top repositories table is reused; matches the search response TTL
+TOP_REPOSITORIES_TTL = 300
+
+# Number of (language, limit) top repositories tables kept in memory
+MAX_CACHED_TOP_TABLES = 16
+
+# Search result fields and the github_repos.csv columns they are shown as
+TOP_REPOSITORY_COLUMNS = {
+    'name': 'Name',
+    'description': 'Description',
+    'stars': 'Stars',
+    'forks': 'Forks',
+    'watchers': 'Watchers',
+    'issues': 'Issues',
+    'url': 'URL',
+}
+
+_top_tables = OrderedDict()
+_top_tables_lock = threading.Lock()
+
+def _next_link(headers):
+    """
+    Return the URL of the rel="next" page from a Link header, or None on the last page.
+    """
+    link_header = headers.get('Link')
+    if not link_header:
+        return None
+    for link in requests.utils.parse_header_links(link_header):
+        if link.get('rel') == 'next':
+            return link.get('url')
+    return None
+
+def iter_most_starred_repositories(language='python', limit=None, per_page=MAX_PER_PAGE, created=None,
+                                   fields=None, output='dicts', stream=False):
+    """
+    Crawls the most starred GitHub repositories for a language, one page at a time.
+
+    Pages are requested by following the Link: rel="next" headers of the search
+    API. GitHub only serves the first 1000 results of a search, so once a query
+    is exhausted the crawl continues with a new query restricted to repositories
+    with at most as many stars as the last one seen (star-range sharding).
+    Repositories already yielded at the shard boundary are skipped.
+
+    Args:
+        language (str): The programming language for which repositories are to be fetched. Default is 'python'.
+        limit (int): The maximum number of repositories to yield. Default is None (no limit).
+        per_page (int): The number of repositories requested per page, at most 100.
+        created (str): Optional creation date qualifier to shard the search by date,
+            e.g. '2020-01-01..2020-12-31' or '>=2023-01-01'.
+        fields (iterable): The repository fields to keep, see repository_records.REPOSITORY_FIELDS.
+            Default is name, url, description, stars, forks, watchers and issues.
+        output (str): 'dicts' for a list of dictionaries per page, 'records' for a list of
+            compact RepositoryRecord objects, or 'columns' for a dict of column lists.
+        stream (bool): Decode each response incrementally and yield the repositories of each
+            network chunk as soon as it arrives, instead of one batch per full page.
+
+    Yields:
+        list or dict: The repositories of each page (or chunk, when streaming) of results,
+        in the requested output format.
+
+    Raises:
+        requests.RequestException: If a page cannot be fetched.
+    """
+    fields = check_fields(fields)
+    if output not in ('dicts', 'records', 'columns'):
+        raise ValueError(f"Unsupported output format for a page: {output}")
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    if limit is not None:
+        per_page = min(per_page, limit)
+    qualifiers = [f'language:{language}']
+    if created:
+        qualifiers.append(f'created:{created}')
+
+    url = api_url('/search/repositories')
+    yielded = 0
+    max_stars = None
+    boundary_urls = set()
+    while True:
+        query = ' '.join(qualifiers + ([f'stars:<={max_stars}'] if max_stars is not None else []))
+        params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': per_page}
+        page_url = url
+        shard_count = 0
+        total_count = 0
+        lowest_stars = None
+        lowest_urls = set()
+        while page_url:
+            response = JsonStream(page_url, params, items_key='items') if stream else None
+            try:
+                if stream:
+                    batches, meta, headers = response.batches(), response.meta, response.headers
+                else:
+                    data, headers = get(page_url, params=params)
+                    batches, meta = [data['items']], data
+                for batch in batches:
+                    items = []
+                    for item in batch:
+                        shard_count += 1
+                        stars, repo_url = item['stargazers_count'], item['html_url']
+                        if stars != lowest_stars:
+                            lowest_stars = stars
+                            lowest_urls = set()
+                        lowest_urls.add(repo_url)
+                        if repo_url in boundary_urls:
+                            continue
+                        items.append(item)
+                    if limit is not None and yielded + len(items) >= limit:
+                        items = items[:limit - yielded]
+                        if items:
+                            yield project_items(items, fields, output)
+                        return
+                    if items:
+                        yielded += len(items)
+                        yield project_items(items, fields, output)
+            finally:
+                if response is not None:
+                    response.close()
+            total_count = meta.get('total_count', 0)
+            page_url = _next_link(headers)
+            params = None  # The next link already carries the query string
+
+        # The shard is exhausted if it returned everything the search matched
+        if shard_count == 0 or shard_count >= total_count or lowest_stars is None:
+            return
+        if lowest_stars == max_stars:
+            # More than SEARCH_RESULT_LIMIT repositories share this star count and
+            # the rest of them cannot be reached, so carry on below it
+            if lowest_stars == 0:
+                return
+            max_stars = lowest_stars - 1
+            boundary_urls = set()
+        else:
+            max_stars = lowest_stars
+            boundary_urls = lowest_urls
+
+def _collect(crawl, args, fields, output, error_message):
+    """
+    Run a page-by-page fetcher to completion and combine its pages into one result.
+    """
+    if output not in OUTPUTS:
+        raise ValueError(f"Unknown output format: {output}")
+    fields = check_fields(fields)
+    columnar = output in ('columns', 'frame', 'array')
+    try:
+        pages = list(crawl(*args, fields=fields, output='columns' if columnar else output))
+    except requests.RequestException as e:
+        print(f"{error_message}: {e}")
+        pages = []
+    if output == 'frame':
+        return columns_to_frame(pages, fields)
+    if output == 'array':
+        return columns_to_array(pages, fields)
+    if output == 'columns':
+        return concat_columns(pages, fields)
+    return [repository for page in pages for repository in page]
+
+def get_most_starred_repositories(language='python', limit=10, fields=None, output='dicts'):
     """
     Fetches data about the most starred GitHub repositories for a given programming language.
     
     Args:
         language (str): The programming language for which repositories are to be fetched. Default is 'python'.
         limit (int): The maximum number of repositories to fetch. Default is 10.
+        fields (iterable): The repository fields to keep, see iter_most_starred_repositories.
+        output (str): 'dicts' (default), 'records', 'columns' for a dict of column lists,
+            'frame' for a DataFrame or 'array' for a NumPy structured array.
     
     Returns:
-        list: A list of dictionaries containing information about the most starred repositories.
+        list: A list of dictionaries containing information about the most starred repositories,
+        or the same data in the requested output format.
     """
-    url = f'https://api.github.com/search/repositories?q=language:{language}&sort=stars&order=desc&per_page={limit}'
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        data = response.json()
-        repositories = []
-        for item in data['items']:
-            repository = {
-                'name': item['name'],
-                'url': item['html_url'],
-                'description': item['description'],
-                'stars': item['stargazers_count'],
-                'forks': item['forks_count'],
-                'watchers': item['watchers_count'],
-                'issues': item['open_issues_count']
-            }
-            repositories.append(repository)
-        return repositories
-    except requests.RequestException as e:
-        print(f"Failed to fetch repositories: {e}")
-        return []
+    return _collect(iter_most_starred_repositories, (language, limit), fields, output,
+                    "Failed to fetch repositories")
+
+def load_top_repositories_table(language='python', limit=10):
+    """
+    Fetches the most starred repositories of a language as a table, once per (language, limit).
+
+    The table is kept for TOP_REPOSITORIES_TTL seconds, so callers that only
+    re-sort or page through it do not touch the API again. Failed fetches are
+    not cached.
+
+    Args:
+        language (str): The programming language for which repositories are to be fetched. Default is 'python'.
+        limit (int): The maximum number of repositories to fetch. Default is 10.
+
+    Returns:
+        DataFrame: One row per repository in star order, with the columns of TOP_REPOSITORY_COLUMNS.
+        A shallow copy of the cached table.
+
+    Raises:
+        requests.RequestException: If the search fails.
+    """
+    key = (language.strip().lower(), limit)
+    with _top_tables_lock:
+        entry = _top_tables.get(key)
+        if entry is not None and time.monotonic() - entry[0] < TOP_REPOSITORIES_TTL:
+            _top_tables.move_to_end(key)
+            return entry[1].copy(deep=False)
+
+    fields = tuple(TOP_REPOSITORY_COLUMNS)
+    pages = iter_most_starred_repositories(language, limit, fields=fields, output='columns')
+    table = columns_to_frame(pages, fields).rename(columns=TOP_REPOSITORY_COLUMNS)
+
+    with _top_tables_lock:
+        _top_tables[key] = (time.monotonic(), table)
+        _top_tables.move_to_end(key)
+        while len(_top_tables) > MAX_CACHED_TOP_TABLES:
+            _top_tables.popitem(last=False)
+    return table.copy(deep=False)
 
-def fetch_github_repositories(language='python', num_repos=10):
+def export_most_starred_repositories(path, language='python', limit=SEARCH_RESULT_LIMIT, created=None):
+    """
+    Writes the most starred repositories for a language to a CSV file as pages arrive.
+
+    The file uses the same columns as github_repos.csv, so it can be loaded by the app.
+
+    Args:
+        path (str): The CSV file to write.
+        language (str): The programming language for which repositories are to be fetched. Default is 'python'.
+        limit (int): The maximum number of repositories to write. Default is 1000.
+        created (str): Optional creation date qualifier, see iter_most_starred_repositories.
+
+    Returns:
+        int: The number of repositories written.
+    """
+    today = date.today().isoformat()
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_COLUMNS)
+        try:
+            for page in iter_most_starred_repositories(language, limit, created=created):
+                for repo in page:
+                    writer.writerow([repo['name'], repo['description'], repo['stars'], repo['forks'],
+                                     repo['watchers'], repo['issues'], repo['url'], today, language])
+                written += len(page)
+                f.flush()
+        except requests.RequestException as e:
+            print(f"Failed to fetch repositories: {e}")
+    return written
+
+def _iter_github_repositories(language, num_repos, fields=None, output='dicts'):
+    """
+    Yields the single page of repositories fetched by fetch_github_repositories.
+    """
+    url = api_url(f'/search/repositories?q=language:{language}&per_page={num_repos}')
+    data = get_json(url)
+    yield project_items(data['items'], check_fields(fields), output)
+
+def fetch_github_repositories(language='python', num_repos=10, fields=None, output='dicts'):
     """
     Fetches GitHub repositories based on the specified language and number.
     
     Args:
         language (str): The programming language to filter repositories (default: 'python').
         num_repos (int): The number of repositories to fetch (default: 10).
+        fields (iterable): The repository fields to keep, see iter_most_starred_repositories.
+        output (str): The output format, see get_most_starred_repositories (default: 'dicts').
     
     Returns:
-        list: A list of dictionaries containing information about the fetched repositories.
+        list: A list of dictionaries containing information about the fetched repositories,
+        or the same data in the requested output format.
     """
-    url = f'https://api.github.com/search/repositories?q=language:{language}&per_page={num_repos}'
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        data = response.json()
-        repositories = []
-        for item in data['items']:
-            repository = {
-                'name': item['name'],
-                'description': item['description'],
-                'url': item['html_url'],
-                'stars': item['stargazers_count'],
-                'forks': item['forks_count'],
-                'watchers': item['watchers_count'],
-                'issues': item['open_issues_count']
-            }
-            repositories.append(repository)
-        return repositories
-    except requests.RequestException as e:
-        print(f"Failed to fetch repositories: {e}")
-        return []
+    return _collect(_iter_github_repositories, (language, num_repos), fields, output,
+                    "Failed to fetch repositories")
 
 def get_most_used_languages(username):
     """
@@ -76,11 +301,9 @@ def get_most_used_languages(username):
     Returns:
         list: A list of tuples containing the most used languages and their usage count.
     """
-    url = f'https://api.github.com/users/{username}/repos'
+    url = api_url(f'/users/{username}/repos')
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        repos = response.json()
+        repos = get_json(url)
         languages = {}
         for repo in repos:
             lang = repo['language']
@@ -101,31 +324,30 @@ def fetch_github_user_info(username):
     Returns:
         dict: A dictionary containing information about the GitHub user.
     """
-    url = f'https://api.github.com/users/{username}'
+    url = api_url(f'/users/{username}')
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        return response.json()
+        return get_json(url)
     except requests.RequestException as e:
         print(f"Failed to fetch user information for {username}: {e}")
         return {}
 
-def fetch_repository_info(owner, repo_name):
+def fetch_repository_info(owner, repo_name, fields=None):
     """
     Fetches information about a GitHub repository.
     
     Args:
         owner (str): The owner of the repository.
         repo_name (str): The name of the repository.
+        fields (iterable): Optional. API fields to keep, e.g. ('stargazers_count', 'forks_count').
+            By default the full response is returned.
     
     Returns:
         dict: A dictionary containing information about the GitHub repository.
     """
-    url = f'https://api.github.com/repos/{owner}/{repo_name}'
+    url = api_url(f'/repos/{owner}/{repo_name}')
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        return response.json()
+        info = get_json(url)
+        return info if fields is None else {field: info.get(field) for field in fields}
     except requests.RequestException as e:
         print(f"Failed to fetch repository information for {owner}/{repo_name}: {e}")
         return {}
@@ -143,16 +365,76 @@ def fetch_repo_issues(owner, repo_name, state='open', per_page=10):
     Returns:
         list: A list of dictionaries containing information about the repository issues.
     """
-    url = f'https://api.github.com/repos/{owner}/{repo_name}/issues'
+    url = api_url(f'/repos/{owner}/{repo_name}/issues')
     params = {'state': state, 'per_page': per_page}
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        return response.json()
+        return get_json(url, params=params)
     except requests.RequestException as e:
         print(f"Failed to fetch repository issues for {owner}/{repo_name}: {e}")
         return []
 
+def _iter_list(url, params, fields, limit):
+    """
+    Streams a paginated list endpoint, following Link headers, one chunk at a time.
+    """
+    yielded = 0
+    while url:
+        with JsonStream(url, params) as response:
+            for batch in response.batches():
+                if fields is not None:
+                    batch = [{field: item.get(field) for field in fields} for item in batch]
+                if limit is not None and yielded + len(batch) >= limit:
+                    yield batch[:limit - yielded]
+                    return
+                yielded += len(batch)
+                yield batch
+            url = _next_link(response.headers)
+            params = None  # The next link already carries the query string
+
+def iter_repo_issues(owner, repo_name, state='open', per_page=MAX_PER_PAGE, fields=None, limit=None):
+    """
+    Streams all issues of a GitHub repository across pages.
+
+    Each response is decoded incrementally, so only the issues of one network
+    chunk are held in memory at a time.
+
+    Args:
+        owner (str): The owner of the repository.
+        repo_name (str): The name of the repository.
+        state (str): Optional. The state of the issues ('open', 'closed', or 'all').
+        per_page (int): Optional. The number of issues per page (default: 100).
+        fields (iterable): Optional. Issue fields to keep, e.g. ('number', 'title', 'state').
+        limit (int): Optional. The maximum number of issues to yield.
+
+    Yields:
+        list: The issues decoded from each chunk of the responses.
+
+    Raises:
+        requests.RequestException: If a page cannot be fetched.
+    """
+    url = api_url(f'/repos/{owner}/{repo_name}/issues')
+    return _iter_list(url, {'state': state, 'per_page': per_page}, fields, limit)
+
+def iter_repo_contributors(owner, repo_name, per_page=MAX_PER_PAGE, fields=None, limit=None):
+    """
+    Streams all contributors of a GitHub repository across pages.
+
+    Args:
+        owner (str): The owner of the repository.
+        repo_name (str): The name of the repository.
+        per_page (int): Optional. The number of contributors per page (default: 100).
+        fields (iterable): Optional. Contributor fields to keep, e.g. ('login', 'contributions').
+        limit (int): Optional. The maximum number of contributors to yield.
+
+    Yields:
+        list: The contributors decoded from each chunk of the responses.
+
+    Raises:
+        requests.RequestException: If a page cannot be fetched.
+    """
+    url = api_url(f'/repos/{owner}/{repo_name}/contributors')
+    return _iter_list(url, {'per_page': per_page}, fields, limit)
+
 def fetch_repo_contributors(owner, repo_name):
     """
     Fetches contributors of a GitHub repository.
@@ -164,11 +446,9 @@ def fetch_repo_contributors(owner, repo_name):
     Returns:
         list: A list of dictionaries containing information about the repository contributors.
     """
-    url = f'https://api.github.com/repos/{owner}/{repo_name}/contributors'
+    url = api_url(f'/repos/{owner}/{repo_name}/contributors')
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        return response.json()
+        return get_json(url)
     except requests.RequestException as e:
         print(f"Failed to fetch repository contributors for {owner}/{repo_name}: {e}")
         return []
@@ -183,37 +463,36 @@ def fetch_user_details(username):
     Returns:
         dict: A dictionary containing details of the GitHub user.
     """
-    url = f'https://api.github.com/users/{username}'
+    url = api_url(f'/users/{username}')
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        return response.json()
+        return get_json(url)
     except requests.RequestException as e:
         print(f"Failed to fetch user details for {username}: {e}")
         return {}
 
-def fetch_repository_details(owner, repo_name):
+def fetch_repository_details(owner, repo_name, fields=None):
     """
     Fetches details of a GitHub repository.
     
     Args:
         owner (str): The owner of the repository.
         repo_name (str): The name of the repository.
+        fields (iterable): Optional. API fields to keep, e.g. ('stargazers_count', 'forks_count').
+            By default the full response is returned.
     
     Returns:
         dict: A dictionary containing details of the GitHub repository.
     """
-    url = f'https://api.github.com/repos/{owner}/{repo_name}'
+    url = api_url(f'/repos/{owner}/{repo_name}')
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for non-2xx status codes
-        return response.json()
+        info = get_json(url)
+        return info if fields is None else {field: info.get(field) for field in fields}
     except requests.RequestException as e:
         print(f"Failed to fetch repository details for {owner}/{repo_name}: {e}")
         return {}
 
 if __name__ == "__main__":
     # Example usage:
-    repositories = get_most_starred_repositories(language='python', limit=10)
-    for repo in repositories:
-        print(repo)
+    for page in iter_most_starred_repositories(language='python', limit=10):
+        for repo in page:
+            print(repo)
@@ -1,8 +1,118 @@
-import streamlit as st
+import os
+import weakref
+
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+
+from aggregate_store import as_aggregates
+from chart_cache import cached_chart
+from regression import RegressionAccumulator
+
+# Scatter charts of more rows than this are drawn as binned densities instead
+SCATTER_BIN_THRESHOLD = 50000
+
+# Bins per axis of a binned density chart
+DENSITY_BINS = 200
+
+# Figures drawn by this module that have not been garbage collected yet
+_live_figures = weakref.WeakSet()
+
+def _new_figure():
+    """
+    Create a chart figure with one set of axes.
+
+    The figure is not registered with pyplot, so nothing keeps it alive once
+    the caller has rendered it and dropped it.
+
+    Returns:
+        tuple: The Figure and its Axes.
+    """
+    figure = Figure(figsize=(10, 6))
+    _live_figures.add(figure)
+    return figure, figure.subplots()
+
+def _rotate_xticks(ax):
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+
+def _resident_memory():
+    # Current, not peak, resident set size; /proc is only available on Linux
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def figure_stats():
+    """
+    Report the figures alive in this process and its memory use.
+
+    Returns:
+        dict: 'live_figures' (charts drawn by this module and not yet garbage
+        collected), 'pyplot_figures' (figures open in pyplot's registry, which
+        are only freed when closed) and 'rss_bytes' (the resident memory, or
+        None where it cannot be read).
+    """
+    return {
+        'live_figures': len(_live_figures),
+        'pyplot_figures': len(plt.get_fignums()),
+        'rss_bytes': _resident_memory(),
+    }
+
+def _numeric_columns(data):
+    # Regression statistics are fingerprinted whole
+    return list(data.select_dtypes(include='number').columns) if isinstance(data, pd.DataFrame) else None
+
+def _bin_counts(x, y, bins=DENSITY_BINS):
+    """
+    Count points per cell of a grid spanning the data, evenly spaced in log(1 + value).
+
+    Counters follow a power law, so evenly spaced cells would put nearly every
+    repository in the corner cell; log-spaced ones spread them over the grid.
+
+    Args:
+        x (np.ndarray): Horizontal values, at least 0; rows with a NaN in either axis are skipped.
+        y (np.ndarray): Vertical values, at least 0.
+        bins (int): Cells per axis.
 
+    Returns:
+        tuple: The (bins, bins) counts indexed [x, y], and the x and y cell edges.
+    """
+    present = ~(np.isnan(x) | np.isnan(y))
+    cells = np.zeros(present.sum(), dtype=np.intp)
+    edges = []
+    for values in (x[present], y[present]):
+        values = np.log1p(np.maximum(values, 0))
+        low, high = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+        high = high if high > low else low + 1.0
+        edges.append(np.expm1(np.linspace(low, high, bins + 1)))
+        # The maximum falls in the last cell rather than past it
+        cells = cells * bins + np.minimum(((values - low) * (bins / (high - low))).astype(np.intp), bins - 1)
+    counts = np.bincount(cells, minlength=bins * bins).reshape(bins, bins)
+    return counts, edges[0], edges[1]
+
+def _plot_density(ax, x, y):
+    """
+    Draw a 2D histogram of two columns on log-scaled axes with a logarithmic colour scale.
+
+    Drawing costs the same for any number of rows. The axes are symmetric-log
+    (linear below 1, so 0 stays on them) to match the log-spaced cells, and
+    the colour scale keeps sparse outliers visible next to the dense cells.
+    """
+    counts, x_edges, y_edges = _bin_counts(x.to_numpy(dtype=float, na_value=np.nan),
+                                           y.to_numpy(dtype=float, na_value=np.nan))
+    mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0),
+                         norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)), cmap='viridis')
+    ax.set_xscale('symlog', linthresh=1)
+    ax.set_yscale('symlog', linthresh=1)
+    ax.figure.colorbar(mesh, ax=ax, label='Repositories')
+
+@cached_chart(columns=('Language',))
 def visualize_language_distribution(data):
     """
     Visualize the distribution of programming languages in GitHub repositories.
@@ -14,27 +124,33 @@ def visualize_language_distribution(data):
     language_counts = data['Language'].value_counts()
 
     # Plot a bar chart
-    plt.figure(figsize=(10, 6))
-    language_counts.plot(kind='bar')
-    plt.xlabel('Language')
-    plt.ylabel('Number of Repositories')
-    plt.title('Number of Repositories by Language')
-    st.pyplot()
-
+    figure, ax = _new_figure()
+    language_counts.plot(kind='bar', ax=ax)
+    ax.set_xlabel('Language')
+    ax.set_ylabel('Number of Repositories')
+    ax.set_title('Number of Repositories by Language')
+    return figure
+
+@cached_chart(columns=('Stars', 'Forks'))
 def visualize_stars_vs_forks(data):
     """
     Visualize the relationship between stars and forks in GitHub repositories.
+    Above SCATTER_BIN_THRESHOLD rows it is drawn as a binned density instead of points.
 
     Args:
         data (pd.DataFrame): DataFrame containing GitHub repository data.
     """
-    plt.figure(figsize=(10, 6))
-    plt.scatter(data['Stars'], data['Forks'])
-    plt.xlabel('Stars')
-    plt.ylabel('Forks')
-    plt.title('Stars vs Forks')
-    st.pyplot()
-
+    figure, ax = _new_figure()
+    if len(data) > SCATTER_BIN_THRESHOLD:
+        _plot_density(ax, data['Stars'], data['Forks'])
+    else:
+        ax.scatter(data['Stars'], data['Forks'])
+    ax.set_xlabel('Stars')
+    ax.set_ylabel('Forks')
+    ax.set_title('Stars vs Forks')
+    return figure
+
+@cached_chart(columns=('Stars', 'Forks', 'Watchers', 'Issues'))
 def visualize_repo_stats(data):
     """
     Visualize repository statistics such as stars, forks, watchers, and issues.
@@ -42,63 +158,73 @@ def visualize_repo_stats(data):
     Args:
         data (pd.DataFrame): DataFrame containing GitHub repository data.
     """
-    plt.figure(figsize=(10, 6))
-    data[['Stars', 'Forks', 'Watchers', 'Issues']].plot(kind='bar')
-    plt.xlabel('Repository')
-    plt.ylabel('Count')
-    plt.title('GitHub Repository Statistics')
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot()
-
+    figure, ax = _new_figure()
+    data[['Stars', 'Forks', 'Watchers', 'Issues']].plot(kind='bar', ax=ax)
+    ax.set_xlabel('Repository')
+    ax.set_ylabel('Count')
+    ax.set_title('GitHub Repository Statistics')
+    _rotate_xticks(ax)
+    return figure
+
+@cached_chart(columns=('Date',), dimensions=('Year',))
 def visualize_yearly_trends(data):
     """
     Visualize yearly trends in GitHub repository activity.
 
     Args:
-        data (pd.DataFrame): DataFrame containing GitHub repository data.
+        data (pd.DataFrame or AggregateStore): DataFrame containing GitHub repository data,
+            or its precomputed rollups.
     """
-    # Group by year and count repositories
-    yearly_counts = data['Date'].dt.year.value_counts().sort_index()
+    # Count repositories per year
+    yearly_counts = as_aggregates(data, ('Year',)).count('Year')
 
-    plt.figure(figsize=(10, 6))
-    yearly_counts.plot(kind='line', marker='o')
-    plt.xlabel('Year')
-    plt.ylabel('Number of Repositories')
-    plt.title('Yearly Trends in GitHub Repositories')
-    st.pyplot()
+    figure, ax = _new_figure()
+    yearly_counts.plot(kind='line', marker='o', ax=ax)
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Number of Repositories')
+    ax.set_title('Yearly Trends in GitHub Repositories')
+    return figure
 
+@cached_chart(columns=('Date',), dimensions=('Quarter',))
 def visualize_quarterly_trends(data):
     """
     Visualize quarterly trends in GitHub repository activity.
 
     Args:
-        data (pd.DataFrame): DataFrame containing GitHub repository data.
+        data (pd.DataFrame or AggregateStore): DataFrame containing GitHub repository data,
+            or its precomputed rollups.
     """
-    # Group by quarter and count repositories
-    quarterly_counts = data['Date'].dt.to_period('Q').value_counts().sort_index()
+    # Count repositories per quarter
+    quarterly_counts = as_aggregates(data, ('Quarter',)).count('Quarter')
 
-    plt.figure(figsize=(10, 6))
-    quarterly_counts.plot(kind='line', marker='o')
-    plt.xlabel('Quarter')
-    plt.ylabel('Number of Repositories')
-    plt.title('Quarterly Trends in GitHub Repositories')
-    st.pyplot()
+    figure, ax = _new_figure()
+    quarterly_counts.plot(kind='line', marker='o', ax=ax)
+    ax.set_xlabel('Quarter')
+    ax.set_ylabel('Number of Repositories')
+    ax.set_title('Quarterly Trends in GitHub Repositories')
+    return figure
 
+@cached_chart(columns=_numeric_columns)
 def visualize_correlation_matrix(data):
     """
     Visualize the correlation matrix of numerical features in the GitHub repository data.
 
     Args:
-        data (pd.DataFrame): DataFrame containing GitHub repository data.
+        data (pd.DataFrame or RegressionAccumulator): DataFrame containing GitHub
+            repository data, or its regression statistics.
     """
-    numerical_features = data.select_dtypes(include=['int64', 'float64'])
-    correlation_matrix = numerical_features.corr()
-
-    plt.figure(figsize=(10, 6))
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f")
-    plt.title('Correlation Matrix of Numerical Features')
-    st.pyplot()
-
+    if isinstance(data, RegressionAccumulator):
+        correlation_matrix = data.correlation()
+    else:
+        numerical_features = data.select_dtypes(include='number')
+        correlation_matrix = numerical_features.corr()
+
+    figure, ax = _new_figure()
+    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt=".2f", ax=ax)
+    ax.set_title('Correlation Matrix of Numerical Features')
+    return figure
+
+@cached_chart(columns=('Owner',))
 def visualize_repo_distribution_by_owner(data):
     """
     Visualize the distribution of GitHub repositories by owner.
@@ -108,14 +234,15 @@ def visualize_repo_distribution_by_owner(data):
     """
     owner_counts = data['Owner'].value_counts().head(10)
 
-    plt.figure(figsize=(10, 6))
-    owner_counts.plot(kind='bar')
-    plt.xlabel('Repository Owner')
-    plt.ylabel('Number of Repositories')
-    plt.title('Distribution of GitHub Repositories by Owner (Top 10)')
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot()
+    figure, ax = _new_figure()
+    owner_counts.plot(kind='bar', ax=ax)
+    ax.set_xlabel('Repository Owner')
+    ax.set_ylabel('Number of Repositories')
+    ax.set_title('Distribution of GitHub Repositories by Owner (Top 10)')
+    _rotate_xticks(ax)
+    return figure
 
+@cached_chart(columns=lambda data, date_column: (date_column, 'Value'))
 def visualize_time_series(data, date_column):
     """
     Visualize time series data.
@@ -126,14 +253,15 @@ def visualize_time_series(data, date_column):
     """
     data[date_column] = pd.to_datetime(data[date_column])
 
-    plt.figure(figsize=(10, 6))
-    plt.plot(data[date_column], data['Value'])
-    plt.xlabel('Date')
-    plt.ylabel('Value')
-    plt.title('Time Series Data')
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot()
+    figure, ax = _new_figure()
+    ax.plot(data[date_column], data['Value'])
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Value')
+    ax.set_title('Time Series Data')
+    _rotate_xticks(ax)
+    return figure
 
+@cached_chart(columns=('Stars',))
 def visualize_repo_stars_distribution(data):
     """
     Visualize the distribution of stars for GitHub repositories.
@@ -141,70 +269,85 @@ def visualize_repo_stars_distribution(data):
     Args:
         data (pd.DataFrame): DataFrame containing GitHub repository data.
     """
-    plt.figure(figsize=(10, 6))
-    sns.histplot(data['Stars'], bins=20, kde=True)
-    plt.xlabel('Stars')
-    plt.ylabel('Frequency')
-    plt.title('Distribution of Stars for GitHub Repositories')
-    st.pyplot()
-
+    figure, ax = _new_figure()
+    sns.histplot(data['Stars'], bins=20, kde=True, ax=ax)
+    ax.set_xlabel('Stars')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Distribution of Stars for GitHub Repositories')
+    return figure
+
+@cached_chart(columns=('Stars', 'Watchers'))
 def visualize_repo_watchers_vs_stars(data):
     """
     Visualize the relationship between the number of watchers and stars for GitHub repositories.
+    Above SCATTER_BIN_THRESHOLD rows it is drawn as a binned density instead of points.
 
     Args:
         data (pd.DataFrame): DataFrame containing GitHub repository data.
     """
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(x='Stars', y='Watchers', data=data)
-    plt.xlabel('Stars')
-    plt.ylabel('Watchers')
-    plt.title('Number of Watchers vs. Stars for GitHub Repositories')
-    st.pyplot()
-
+    figure, ax = _new_figure()
+    if len(data) > SCATTER_BIN_THRESHOLD:
+        _plot_density(ax, data['Stars'], data['Watchers'])
+    else:
+        sns.scatterplot(x='Stars', y='Watchers', data=data, ax=ax)
+    ax.set_xlabel('Stars')
+    ax.set_ylabel('Watchers')
+    ax.set_title('Number of Watchers vs. Stars for GitHub Repositories')
+    return figure
+
+@cached_chart(columns=('Stars', 'Issues'))
 def visualize_repo_issues_vs_stars(data):
     """
     Visualize the relationship between the number of issues and stars for GitHub repositories.
+    Above SCATTER_BIN_THRESHOLD rows it is drawn as a binned density instead of points.
 
     Args:
         data (pd.DataFrame): DataFrame containing GitHub repository data.
     """
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(x='Stars', y='Issues', data=data)
-    plt.xlabel('Stars')
-    plt.ylabel('Issues')
-    plt.title('Number of Issues vs. Stars for GitHub Repositories')
-    st.pyplot()
-
+    figure, ax = _new_figure()
+    if len(data) > SCATTER_BIN_THRESHOLD:
+        _plot_density(ax, data['Stars'], data['Issues'])
+    else:
+        sns.scatterplot(x='Stars', y='Issues', data=data, ax=ax)
+    ax.set_xlabel('Stars')
+    ax.set_ylabel('Issues')
+    ax.set_title('Number of Issues vs. Stars for GitHub Repositories')
+    return figure
+
+@cached_chart(columns=('Language', 'Stars'), dimensions=('Language',))
 def visualize_avg_stars_by_language(data):
     """
     Visualize the average number of stars for each programming language in GitHub repositories.
 
     Args:
-        data (pd.DataFrame): DataFrame containing GitHub repository data.
+        data (pd.DataFrame or AggregateStore): DataFrame containing GitHub repository data,
+            or its precomputed rollups.
     """
-    avg_stars_by_language = data.groupby('Language')['Stars'].mean().sort_values(ascending=False)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x=avg_stars_by_language.index, y=avg_stars_by_language.values)
-    plt.xlabel('Programming Language')
-    plt.ylabel('Average Stars')
-    plt.title('Average Stars by Programming Language in GitHub Repositories')
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot()
-
+    avg_stars = as_aggregates(data, ('Language',)).rollup('Language', {'Stars': 'mean'})
+    avg_stars_by_language = avg_stars.set_index('Language')['Stars'].sort_values(ascending=False)
+    figure, ax = _new_figure()
+    sns.barplot(x=avg_stars_by_language.index, y=avg_stars_by_language.values, ax=ax)
+    ax.set_xlabel('Programming Language')
+    ax.set_ylabel('Average Stars')
+    ax.set_title('Average Stars by Programming Language in GitHub Repositories')
+    _rotate_xticks(ax)
+    return figure
+
+@cached_chart(columns=('Language',), dimensions=('Language',))
 def visualize_top_languages(data, n=5):
     """
     Visualize the top N programming languages used in GitHub repositories.
 
     Args:
-        data (pd.DataFrame): DataFrame containing GitHub repository data.
+        data (pd.DataFrame or AggregateStore): DataFrame containing GitHub repository data,
+            or its precomputed rollups.
         n (int): Number of top languages to visualize.
     """
-    top_languages = data['Language'].value_counts().head(n)
-    plt.figure(figsize=(10, 6))
-    top_languages.plot(kind='bar')
-    plt.xlabel('Programming Language')
-    plt.ylabel('Number of Repositories')
-    plt.title(f'Top {n} Programming Languages in GitHub Repositories')
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot()
+    top_languages = as_aggregates(data, ('Language',)).count('Language').sort_values(ascending=False).head(n)
+    figure, ax = _new_figure()
+    top_languages.plot(kind='bar', ax=ax)
+    ax.set_xlabel('Programming Language')
+    ax.set_ylabel('Number of Repositories')
+    ax.set_title(f'Top {n} Programming Languages in GitHub Repositories')
+    _rotate_xticks(ax)
+    return figure
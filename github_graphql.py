@@ -0,0 +1,163 @@
+import requests
+
+from github_client import api_url, post_json
+from repository_records import check_fields, project_items
+
+# Estimated query cost of one aliased repository lookup: the repository node
+# plus its open issues and open pull requests connections
+COST_PER_REPOSITORY = 3
+
+# Estimated cost budget of one GraphQL query; 300 packs 100 repositories per query
+MAX_QUERY_COST = 300
+
+# Error types GitHub returns when a query is too large or too expensive to run
+_TOO_COMPLEX_ERRORS = {'MAX_NODE_LIMIT_EXCEEDED', 'RESOURCE_LIMITS_EXCEEDED', 'TIMEOUT'}
+
+REPOSITORY_FRAGMENT = """
+fragment RepositoryStats on Repository {
+  name
+  nameWithOwner
+  owner { login }
+  url
+  description
+  primaryLanguage { name }
+  createdAt
+  stargazerCount
+  forkCount
+  issues(states: OPEN) { totalCount }
+  pullRequests(states: OPEN) { totalCount }
+}
+"""
+
+
+class GraphQLError(requests.RequestException):
+    """
+    Raised when GitHub rejects a whole GraphQL query.
+
+    Attributes:
+        errors (list): The error objects returned by GitHub.
+    """
+
+    def __init__(self, errors):
+        super().__init__('; '.join(error.get('message', str(error)) for error in errors))
+        self.errors = errors
+
+    @property
+    def too_complex(self):
+        return any(error.get('type') in _TOO_COMPLEX_ERRORS for error in self.errors)
+
+
+def build_repository_query(repositories):
+    """
+    Build one GraphQL query looking up several repositories through aliases.
+
+    Owners and names are passed as variables, so they never need escaping.
+
+    Args:
+        repositories (list): (owner, repo_name) pairs.
+
+    Returns:
+        tuple: The query text and its variables.
+    """
+    declarations, lookups, variables = [], [], {}
+    for i, (owner, name) in enumerate(repositories):
+        declarations.append(f'$o{i}: String!, $n{i}: String!')
+        lookups.append(f'  r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...RepositoryStats }}')
+        variables[f'o{i}'] = owner
+        variables[f'n{i}'] = name
+    query = (
+        f"query RepositoryStats({', '.join(declarations)}) {{\n"
+        "  rateLimit { cost remaining resetAt }\n"
+        + '\n'.join(lookups)
+        + "\n}\n"
+        + REPOSITORY_FRAGMENT
+    )
+    return query, variables
+
+
+def _to_rest_item(node):
+    """
+    Translate a GraphQL repository node into the shape of a REST repository item.
+
+    The REST watchers_count mirrors the star count and open_issues_count includes
+    open pull requests, so both are reproduced here.
+    """
+    return {
+        'name': node['name'],
+        'full_name': node['nameWithOwner'],
+        'owner': {'login': node['owner']['login']},
+        'html_url': node['url'],
+        'description': node['description'],
+        'language': (node.get('primaryLanguage') or {}).get('name'),
+        'created_at': node.get('createdAt'),
+        'stargazers_count': node['stargazerCount'],
+        'watchers_count': node['stargazerCount'],
+        'forks_count': node['forkCount'],
+        'open_issues_count': node['issues']['totalCount'] + node['pullRequests']['totalCount'],
+    }
+
+
+def _run_chunk(chunk):
+    query, variables = build_repository_query(chunk)
+    response = post_json(api_url('/graphql'), {'query': query, 'variables': variables})
+    data = response.get('data')
+    if data is None:
+        raise GraphQLError(response.get('errors') or [{'message': 'Empty GraphQL response'}])
+    # Per-repository errors (e.g. NOT_FOUND) come back alongside a null alias
+    items = [data.get(f'r{i}') for i in range(len(chunk))]
+    return [_to_rest_item(node) if node else None for node in items], data.get('rateLimit') or {}
+
+
+def fetch_repository_stats_batch(repositories, fields=None, max_cost=MAX_QUERY_COST):
+    """
+    Fetch stars, forks, watchers and open issues of many repositories with batched GraphQL queries.
+
+    Repositories are packed into aliased queries whose estimated cost stays
+    within `max_cost`. If GitHub still rejects a query as too complex, the chunk
+    is split in half and retried. Results have the same shape as the records of
+    the REST search fetchers.
+
+    Args:
+        repositories (iterable): (owner, repo_name) pairs.
+        fields (iterable): The repository fields to keep, see repository_records.REPOSITORY_FIELDS.
+            Default is name, url, description, stars, forks, watchers and issues.
+        max_cost (int): The estimated cost budget of one query.
+
+    Returns:
+        tuple: A list with one record dictionary per repository in input order
+        ({} for repositories that were not found), and a dict with the number of
+        'queries' sent and the total rate limit 'cost' GitHub reported.
+
+    Raises:
+        requests.RequestException: If a query fails.
+    """
+    fields = check_fields(fields)
+    repositories = list(repositories)
+    chunk_size = max(1, max_cost // COST_PER_REPOSITORY)
+    results = []
+    usage = {'queries': 0, 'cost': 0}
+    pending = [repositories[i:i + chunk_size] for i in range(0, len(repositories), chunk_size)]
+    while pending:
+        chunk = pending.pop(0)
+        try:
+            items, rate_limit = _run_chunk(chunk)
+        except GraphQLError as e:
+            if not e.too_complex or len(chunk) == 1:
+                raise
+            half = len(chunk) // 2
+            pending[:0] = [chunk[:half], chunk[half:]]
+            continue
+        usage['queries'] += 1
+        usage['cost'] += rate_limit.get('cost', 0)
+        found = project_items([item for item in items if item is not None], fields)
+        found_iter = iter(found)
+        results.extend(next(found_iter) if item is not None else {} for item in items)
+    return results, usage
+
+
+if __name__ == "__main__":
+    # Example usage (GraphQL requires GITHUB_TOKEN to be set):
+    stats, usage = fetch_repository_stats_batch([('streamlit', 'streamlit'), ('pytorch', 'pytorch')])
+    for repo in stats:
+        print(repo)
+    print(f"{usage['queries']} queries, cost {usage['cost']}")
@@ -0,0 +1,551 @@
+"""
+Local stand-in for the GitHub REST API, for offline benchmarks and regression runs.
+
+The server replays a fixture of recorded API objects: repositories, users,
+issues and contributors, over REST and the aliased repository lookups of
+github_graphql. It serves them with GitHub's pagination (Link
+headers, the 1000-result search ceiling), ETag revalidation, rate limit
+headers and rate limiting, and it can add latency, limit bandwidth and inject
+server errors.
+
+Usage:
+    # Record a fixture from the real API
+    python github_standin.py record --language python --limit 300 --output fixture.json
+
+    # Serve a recorded fixture, or a synthetic one when --fixture is omitted
+    python github_standin.py serve --fixture fixture.json --port 8000 --latency 0.05
+
+    # Point the app at it
+    GITHUB_API_URL=http://127.0.0.1:8000 streamlit run main.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# GitHub never serves more than this many search results for one query
+SEARCH_RESULT_LIMIT = 1000
+
+# Largest page size accepted by the GitHub API
+MAX_PER_PAGE = 100
+
+# Default page size of the GitHub API
+DEFAULT_PER_PAGE = 30
+
+# Rate limit buckets: (requests or GraphQL points per window, window in seconds)
+DEFAULT_RATE_LIMITS = {'core': (5000, 3600), 'search': (30, 60), 'graphql': (5000, 3600)}
+
+# Most repository lookups accepted in one GraphQL query
+DEFAULT_GRAPHQL_MAX_ALIASES = 100
+
+# Bytes written at a time when the bandwidth is limited
+_TRICKLE_CHUNK = 8 * 1024
+
+_GRAPHQL_LOOKUP = re.compile(r'(\w+):\s*repository\(owner:\s*\$(\w+),\s*name:\s*\$(\w+)\)')
+
+
+def load_fixture(path):
+    """
+    Load a fixture written by record_fixture or synthetic_fixture.
+
+    Args:
+        path (str): The JSON fixture file.
+
+    Returns:
+        dict: The fixture.
+    """
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def synthetic_fixture(num_repos=2000, seed=0, languages=('Python', 'JavaScript', 'Go', 'Rust', 'Java')):
+    """
+    Generate a deterministic fixture with realistic-looking repositories.
+
+    Stars follow a power law; forks, watchers and issues are correlated with stars.
+
+    Args:
+        num_repos (int): The number of repositories to generate.
+        seed (int): The random seed.
+        languages (tuple): The languages to spread the repositories over.
+
+    Returns:
+        dict: The fixture.
+    """
+    rng = random.Random(seed)
+    owners = [f'owner{i}' for i in range(max(1, num_repos // 5))]
+    start = datetime(2010, 1, 1)
+    repositories, issues, contributors = [], {}, {}
+    for i in range(num_repos):
+        owner = rng.choice(owners)
+        name = f'repo{i}'
+        stars = int(rng.paretovariate(1.2) * 10)
+        created = start + timedelta(days=rng.randrange(5000))
+        repositories.append({
+            'id': i + 1,
+            'name': name,
+            'full_name': f'{owner}/{name}',
+            'owner': {'login': owner},
+            'html_url': f'https://github.com/{owner}/{name}',
+            'description': f'Synthetic repository {i}',
+            'language': languages[i % len(languages)],
+            'stargazers_count': stars,
+            'watchers_count': stars,
+            'forks_count': int(stars * rng.uniform(0.05, 0.3)),
+            'open_issues_count': int(stars * rng.uniform(0.0, 0.02)),
+            'created_at': created.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+        issues[f'{owner}/{name}'] = [
+            {'number': n + 1, 'title': f'Issue {n + 1}', 'state': 'open' if n % 3 else 'closed'}
+            for n in range(rng.randrange(0, 60))
+        ]
+        contributors[f'{owner}/{name}'] = [
+            {'login': rng.choice(owners), 'contributions': rng.randrange(1, 500)}
+            for _ in range(rng.randrange(1, 40))
+        ]
+    users = {owner: {'login': owner, 'public_repos': 0, 'followers': rng.randrange(0, 10000)} for owner in owners}
+    for repo in repositories:
+        users[repo['owner']['login']]['public_repos'] += 1
+    return {'repositories': repositories, 'users': users, 'issues': issues, 'contributors': contributors}
+
+
+def record_fixture(language='python', limit=300, output='fixture.json', detail_limit=20):
+    """
+    Record a fixture from the real GitHub API.
+
+    The most starred repositories for the language are recorded, plus users,
+    issues and contributors for the first `detail_limit` of them.
+
+    Args:
+        language (str): The programming language to record.
+        limit (int): The number of repositories to record.
+        output (str): The JSON file to write.
+        detail_limit (int): The number of repositories to record details for.
+
+    Returns:
+        dict: The recorded fixture.
+    """
+    from github_client import api_url, get, get_json
+
+    repositories = []
+    url = api_url('/search/repositories')
+    params = {'q': f'language:{language}', 'sort': 'stars', 'order': 'desc', 'per_page': MAX_PER_PAGE}
+    while url and len(repositories) < limit:
+        data, headers = get(url, params=params)
+        repositories.extend(data['items'])
+        match = re.search(r'<([^>]+)>;\s*rel="next"', headers.get('Link', ''))
+        url = match.group(1) if match else None
+        params = None
+    repositories = repositories[:limit]
+
+    users, issues, contributors = {}, {}, {}
+    for repo in repositories[:detail_limit]:
+        full_name = repo['full_name']
+        login = repo['owner']['login']
+        users[login] = get_json(api_url(f'/users/{login}'))
+        issues[full_name] = get_json(api_url(f'/repos/{full_name}/issues'), params={'state': 'all', 'per_page': 100})
+        contributors[full_name] = get_json(api_url(f'/repos/{full_name}/contributors'), params={'per_page': 100})
+
+    fixture = {'repositories': repositories, 'users': users, 'issues': issues, 'contributors': contributors}
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(fixture, f)
+    return fixture
+
+
+def _matches_range(value, spec):
+    """
+    Check a value against a search qualifier range such as '>=10', '<5' or '10..20'.
+    """
+    if '..' in spec:
+        low, high = spec.split('..', 1)
+        return (low in ('', '*') or value >= type(value)(low)) and (high in ('', '*') or value <= type(value)(high))
+    for op, test in (('>=', lambda a, b: a >= b), ('<=', lambda a, b: a <= b),
+                     ('>', lambda a, b: a > b), ('<', lambda a, b: a < b)):
+        if spec.startswith(op):
+            return test(value, type(value)(spec[len(op):]))
+    return value == type(value)(spec)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if self.server.standin.verbose:
+            super().log_message(format, *args)
+
+    def _delay_or_fail(self):
+        """
+        Apply the configured latency and, if an error is injected, send it.
+
+        Returns:
+            bool: True if an error response was sent.
+        """
+        standin = self.server.standin
+        standin.count('requests')
+        if standin.latency or standin.jitter:
+            time.sleep(standin.latency + standin.random_uniform(0, standin.jitter))
+        if standin.error_rate and standin.random_uniform(0, 1) < standin.error_rate:
+            standin.count('errors')
+            self._send(standin.random_choice([500, 502, 503]), {'message': 'Injected server error'})
+            return True
+        return False
+
+    def _rate_limited(self, rate):
+        if rate['remaining'] >= 0:
+            return False
+        self.server.standin.count('rate_limited')
+        rate['remaining'] = 0
+        self._send(403, {'message': 'API rate limit exceeded'}, rate=rate)
+        return True
+
+    def do_GET(self):
+        standin = self.server.standin
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        if self._delay_or_fail():
+            return
+
+        bucket = 'search' if parts.path.startswith('/search/') else 'core'
+        status, body, links = standin.route(parts.path, query)
+        etag = None
+        if status == 200:
+            etag = 'W/"%s"' % hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                # Conditional requests answered with 304 do not count against the rate limit
+                standin.count('not_modified')
+                return self._send(304, None, etag=etag, rate=standin.peek(bucket))
+        rate = standin.consume(bucket)
+        if self._rate_limited(rate):
+            return
+        self._send(status, body, etag=etag, rate=rate, links=links, path=parts.path, query=query)
+
+    def do_POST(self):
+        standin = self.server.standin
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send(400, {'message': 'Problems parsing JSON'})
+        if self._delay_or_fail():
+            return
+        if urlsplit(self.path).path != '/graphql':
+            return self._send(404, {'message': 'Not Found'})
+
+        body, cost = standin.graphql(request.get('query', ''), request.get('variables') or {})
+        rate = standin.consume('graphql', cost)
+        if self._rate_limited(rate):
+            return
+        if 'data' in body:
+            body['data']['rateLimit'] = {'cost': cost, 'remaining': rate['remaining'],
+                                         'resetAt': datetime.fromtimestamp(rate['reset'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}
+        self._send(200, body, rate=rate)
+
+    def _send(self, status, body, etag=None, rate=None, links=None, path=None, query=None):
+        payload = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if etag:
+            self.send_header('ETag', etag)
+        if rate:
+            self.send_header('X-RateLimit-Limit', str(rate['limit']))
+            self.send_header('X-RateLimit-Remaining', str(rate['remaining']))
+            self.send_header('X-RateLimit-Reset', str(rate['reset']))
+            self.send_header('X-RateLimit-Used', str(rate['limit'] - rate['remaining']))
+            self.send_header('X-RateLimit-Resource', rate['resource'])
+        if links:
+            base = f"http://{self.headers.get('Host')}{path}"
+            self.send_header('Link', ', '.join(
+                f'<{base}?{urlencode(dict(query, page=page))}>; rel="{rel}"' for rel, page in links.items()
+            ))
+        self.end_headers()
+        bandwidth = self.server.standin.bandwidth
+        if not bandwidth:
+            self.wfile.write(payload)
+            return
+        # Trickle the body out to simulate a slow link
+        for start in range(0, len(payload), _TRICKLE_CHUNK):
+            chunk = payload[start:start + _TRICKLE_CHUNK]
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            time.sleep(len(chunk) / bandwidth)
+
+
+class StandInServer:
+    """
+    A local GitHub API stand-in serving a fixture over HTTP.
+
+    Args:
+        fixture (dict): The API objects to serve, see synthetic_fixture.
+        host (str): The interface to bind to.
+        port (int): The port to listen on; 0 picks a free port.
+        latency (float): Seconds added to every response.
+        jitter (float): Up to this many extra random seconds per response.
+        error_rate (float): Probability of answering with a 5xx error.
+        rate_limits (dict): bucket name -> (requests per window, window seconds).
+        seed (int): The random seed for jitter and error injection.
+        verbose (bool): Whether to log every request.
+        graphql_max_aliases (int): The most repository lookups accepted in one GraphQL query.
+        bandwidth (float): Optional response body throughput limit in bytes per second.
+    """
+
+    def __init__(self, fixture=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 rate_limits=None, seed=0, verbose=False, graphql_max_aliases=DEFAULT_GRAPHQL_MAX_ALIASES,
+                 bandwidth=None):
+        self.fixture = fixture if fixture is not None else synthetic_fixture()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self.verbose = verbose
+        self.graphql_max_aliases = graphql_max_aliases
+        self.bandwidth = bandwidth
+        self.stats = {'requests': 0, 'errors': 0, 'not_modified': 0, 'rate_limited': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._repos = {repo['full_name'].lower(): repo for repo in self.fixture['repositories']}
+        self._by_stars = sorted(self.fixture['repositories'], key=lambda r: r['stargazers_count'], reverse=True)
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        Serve requests on a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Shut the server down.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def random_uniform(self, low, high):
+        with self._lock:
+            return self._random.uniform(low, high)
+
+    def random_choice(self, options):
+        with self._lock:
+            return self._random.choice(options)
+
+    def _window(self, bucket, now):
+        limit, window = self.rate_limits[bucket]
+        reset, used = self._windows.get(bucket, (0, 0))
+        if now >= reset:
+            reset, used = int(now) + window, 0
+        return limit, reset, used
+
+    def peek(self, bucket):
+        with self._lock:
+            limit, reset, used = self._window(bucket, time.time())
+        return {'resource': bucket, 'limit': limit, 'remaining': max(0, limit - used), 'reset': reset}
+
+    def consume(self, bucket, amount=1):
+        with self._lock:
+            limit, reset, used = self._window(bucket, time.time())
+            self._windows[bucket] = (reset, used + amount)
+        return {'resource': bucket, 'limit': limit, 'remaining': limit - used - amount, 'reset': reset}
+
+    def graphql(self, query, variables):
+        """
+        Answer a GraphQL query of aliased repository lookups, as built by
+        github_graphql.build_repository_query.
+
+        Returns:
+            tuple: The response body and the rate limit cost of the query.
+        """
+        lookups = _GRAPHQL_LOOKUP.findall(query)
+        if len(lookups) > self.graphql_max_aliases:
+            return {'errors': [{'type': 'MAX_NODE_LIMIT_EXCEEDED',
+                                'message': f'Query exceeds {self.graphql_max_aliases} repository lookups'}]}, 1
+        data, errors = {}, []
+        for alias, owner_var, name_var in lookups:
+            owner, name = variables.get(owner_var), variables.get(name_var)
+            repo = self._repos.get(f'{owner}/{name}'.lower())
+            if repo is None:
+                data[alias] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [alias],
+                               'message': f"Could not resolve to a Repository with the name '{owner}/{name}'."})
+                continue
+            open_issues = [issue for issue in self.fixture['issues'].get(repo['full_name'], [])
+                           if issue.get('state', 'open') == 'open']
+            data[alias] = {
+                'name': repo['name'],
+                'nameWithOwner': repo['full_name'],
+                'owner': {'login': repo['owner']['login']},
+                'url': repo['html_url'],
+                'description': repo.get('description'),
+                'primaryLanguage': {'name': repo['language']} if repo.get('language') else None,
+                'createdAt': repo.get('created_at'),
+                'stargazerCount': repo['stargazers_count'],
+                'forkCount': repo['forks_count'],
+                'issues': {'totalCount': len(open_issues)},
+                'pullRequests': {'totalCount': max(0, repo['open_issues_count'] - len(open_issues))},
+            }
+        body = {'data': data}
+        if errors:
+            body['errors'] = errors
+        # Like GitHub, two connections per lookup, one point per hundred, at least one point per query
+        return body, max(1, -(-len(lookups) * 2 // 100))
+
+    def route(self, path, query):
+        """
+        Answer an API request.
+
+        Returns:
+            tuple: (status, body, links) where links maps rel names to page numbers.
+        """
+        segments = [s for s in path.split('/') if s]
+        if segments == ['search', 'repositories']:
+            return self._search(query)
+        if len(segments) >= 3 and segments[0] == 'repos':
+            full_name = f'{segments[1]}/{segments[2]}'.lower()
+            repo = self._repos.get(full_name)
+            if repo is None:
+                return 404, {'message': 'Not Found'}, None
+            if len(segments) == 3:
+                return 200, repo, None
+            if segments[3:] == ['issues']:
+                state = query.get('state', 'open')
+                items = self.fixture['issues'].get(repo['full_name'], [])
+                if state != 'all':
+                    items = [issue for issue in items if issue.get('state', 'open') == state]
+                return self._paginate(items, query)
+            if segments[3:] == ['contributors']:
+                return self._paginate(self.fixture['contributors'].get(repo['full_name'], []), query)
+        if len(segments) >= 2 and segments[0] == 'users':
+            login = segments[1]
+            if len(segments) == 2:
+                user = self.fixture['users'].get(login)
+                if user is None:
+                    return 404, {'message': 'Not Found'}, None
+                return 200, user, None
+            if segments[2:] == ['repos']:
+                items = [r for r in self.fixture['repositories'] if r['owner']['login'].lower() == login.lower()]
+                return self._paginate(items, query)
+        return 404, {'message': 'Not Found'}, None
+
+    def _page_bounds(self, query):
+        per_page = max(1, min(int(query.get('per_page', DEFAULT_PER_PAGE)), MAX_PER_PAGE))
+        page = max(1, int(query.get('page', 1)))
+        return per_page, page
+
+    def _links(self, page, per_page, total):
+        last = max(1, -(-total // per_page))
+        links = {}
+        if page < last:
+            links['next'] = page + 1
+            links['last'] = last
+        if page > 1:
+            links['first'] = 1
+            links['prev'] = page - 1
+        return links
+
+    def _paginate(self, items, query):
+        per_page, page = self._page_bounds(query)
+        start = (page - 1) * per_page
+        return 200, items[start:start + per_page], self._links(page, per_page, len(items))
+
+    def _search(self, query):
+        items = self._by_stars if query.get('sort') == 'stars' else self.fixture['repositories']
+        for qualifier in query.get('q', '').split():
+            key, _, value = qualifier.partition(':')
+            if key == 'language':
+                items = [r for r in items if (r.get('language') or '').lower() == value.lower()]
+            elif key == 'stars':
+                items = [r for r in items if _matches_range(r['stargazers_count'], value)]
+            elif key == 'created':
+                items = [r for r in items if _matches_range(r['created_at'][:10], value)]
+        if query.get('sort') == 'stars' and query.get('order') == 'asc':
+            items = list(reversed(items))
+
+        per_page, page = self._page_bounds(query)
+        start = (page - 1) * per_page
+        if start >= SEARCH_RESULT_LIMIT:
+            return 422, {'message': 'Only the first 1000 search results are available'}, None
+        reachable = min(len(items), SEARCH_RESULT_LIMIT)
+        body = {
+            'total_count': len(items),
+            'incomplete_results': False,
+            'items': items[start:min(start + per_page, reachable)],
+        }
+        return 200, body, self._links(page, per_page, reachable)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help='serve a fixture')
+    serve.add_argument('--fixture', help='fixture JSON file; a synthetic fixture is used when omitted')
+    serve.add_argument('--synthetic-repos', type=int, default=2000)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8000)
+    serve.add_argument('--latency', type=float, default=0.0)
+    serve.add_argument('--jitter', type=float, default=0.0)
+    serve.add_argument('--error-rate', type=float, default=0.0)
+    serve.add_argument('--bandwidth', type=float, help='response body bytes per second')
+    serve.add_argument('--core-limit', type=int, default=DEFAULT_RATE_LIMITS['core'][0])
+    serve.add_argument('--search-limit', type=int, default=DEFAULT_RATE_LIMITS['search'][0])
+    serve.add_argument('--seed', type=int, default=0)
+
+    record = commands.add_parser('record', help='record a fixture from api.github.com')
+    record.add_argument('--language', default='python')
+    record.add_argument('--limit', type=int, default=300)
+    record.add_argument('--details', type=int, default=20)
+    record.add_argument('--output', default='fixture.json')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        fixture = record_fixture(args.language, args.limit, args.output, args.details)
+        print(f"Recorded {len(fixture['repositories'])} repositories to {args.output}")
+        return
+
+    fixture = load_fixture(args.fixture) if args.fixture else synthetic_fixture(args.synthetic_repos, args.seed)
+    server = StandInServer(
+        fixture, args.host, args.port, args.latency, args.jitter, args.error_rate,
+        rate_limits={'core': (args.core_limit, DEFAULT_RATE_LIMITS['core'][1]),
+                     'search': (args.search_limit, DEFAULT_RATE_LIMITS['search'][1])},
+        seed=args.seed, verbose=True, bandwidth=args.bandwidth,
+    )
+    print(f"Serving {len(fixture['repositories'])} repositories on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
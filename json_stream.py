@@ -0,0 +1,182 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+
+_WHITESPACE = ' \t\n\r'
+
+
+class IncrementalArrayParser:
+    """
+    Decodes the elements of a JSON array while the document is still arriving.
+
+    The array is either the whole document (e.g. a list of issues) or the value
+    of `items_key` in a top-level object (e.g. 'items' of a search response).
+    Other top-level values are collected in `meta`. Only one array element at a
+    time is held as text; finished elements are returned by feed() and can be
+    released by the caller.
+
+    Args:
+        items_key (str): The top-level key holding the array, or None if the
+            document itself is the array.
+    """
+
+    def __init__(self, items_key=None):
+        self.items_key = items_key
+        self.meta = {}
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'start'
+        self._key = None
+
+    @property
+    def done(self):
+        return self._state == 'done'
+
+    def feed(self, chunk):
+        """
+        Add the next chunk of the document.
+
+        Args:
+            chunk (bytes): The next bytes of the response body.
+
+        Returns:
+            list: The array elements completed by this chunk.
+        """
+        self._buffer = self._buffer[self._pos:] + self._utf8.decode(chunk)
+        self._pos = 0
+        items = []
+        while self._state != 'done' and self._step(items):
+            pass
+        return items
+
+    def close(self):
+        """
+        Check that the whole document was received.
+
+        Raises:
+            ValueError: If the document ended early or is not in the expected shape.
+        """
+        self.feed(b'')
+        rest = self._buffer[self._pos:].strip(_WHITESPACE)
+        if self._state != 'done' or rest:
+            raise ValueError('Incomplete or malformed JSON document')
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._pos < len(self._buffer)
+
+    def _expect(self, chars):
+        if not self._skip_whitespace():
+            return None
+        char = self._buffer[self._pos]
+        if char not in chars:
+            raise ValueError(f"Unexpected {char!r} at offset {self._pos} of the JSON stream")
+        self._pos += 1
+        return char
+
+    def _decode_value(self):
+        """
+        Decode the next complete value, or return False if more data is needed.
+        """
+        if not self._skip_whitespace():
+            return False, None
+        try:
+            value, end = _decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return False, None
+        # A number at the very end of the buffer may continue in the next chunk
+        if end >= len(self._buffer):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _step(self, items):
+        """
+        Advance the parser by one token; return False when more data is needed.
+        """
+        state = self._state
+        if state == 'start':
+            char = self._expect('[' if self.items_key is None else '{')
+            if char is None:
+                return False
+            self._state = 'array_start' if char == '[' else 'object_key'
+        elif state == 'object_key':
+            start = self._pos
+            char = self._expect('"},')
+            if char is None:
+                return False
+            if char == '}':
+                self._state = 'done'
+            elif char == '"':
+                self._pos -= 1
+                ok, key = self._decode_value()
+                if not ok:
+                    self._pos = start
+                    return False
+                if self._expect(':') is None:
+                    self._pos = start
+                    return False
+                self._key = key
+                self._state = 'object_value'
+        elif state == 'object_value':
+            if self._key == self.items_key:
+                if self._expect('[') is None:
+                    return False
+                self._state = 'array_start'
+            else:
+                ok, value = self._decode_value()
+                if not ok:
+                    return False
+                self.meta[self._key] = value
+                self._state = 'object_key'
+        elif state == 'array_start':
+            if not self._skip_whitespace():
+                return False
+            if self._buffer[self._pos] == ']':
+                self._pos += 1
+                self._state = 'array_end'
+            else:
+                self._state = 'array_item'
+        elif state == 'array_item':
+            ok, value = self._decode_value()
+            if not ok:
+                return False
+            items.append(value)
+            self._state = 'array_separator'
+        elif state == 'array_separator':
+            char = self._expect(',]')
+            if char is None:
+                return False
+            self._state = 'array_item' if char == ',' else 'array_end'
+        elif state == 'array_end':
+            self._state = 'done' if self.items_key is None else 'object_key'
+        return True
+
+
+def iter_array_batches(chunks, items_key=None, meta=None):
+    """
+    Decode JSON array elements from an iterable of byte chunks as they arrive.
+
+    Args:
+        chunks (iterable): The bytes of the JSON document.
+        items_key (str): The top-level key holding the array, or None if the
+            document itself is the array.
+        meta (dict): Optional dict that receives the other top-level values.
+
+    Yields:
+        list: The array elements completed by each chunk.
+
+    Raises:
+        ValueError: If the document is incomplete or malformed.
+    """
+    parser = IncrementalArrayParser(items_key)
+    if meta is not None:
+        parser.meta = meta
+    for chunk in chunks:
+        items = parser.feed(chunk)
+        if items:
+            yield items
+    parser.close()
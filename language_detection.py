@@ -0,0 +1,219 @@
+"""
+Detect the natural language of repository descriptions.
+
+Descriptions are deduplicated by a hash of their text, and detected
+languages are cached on disk by that hash, so re-runs only detect new or
+changed descriptions. Cache misses are detected in batches across a process
+pool. langdetect is seeded, so the same text always gets the same language.
+
+Usage:
+    python language_detection.py github_repos.csv --output github_data_with_language.csv
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Default location of the on-disk detection cache
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'description_languages.sqlite3')
+
+# Seed of langdetect's random sampling; results are cached per seed
+DEFAULT_SEED = 0
+
+# Descriptions sent to a worker process at a time
+BATCH_SIZE = 2000
+
+# Column the detected language codes are written to
+DEFAULT_COLUMN = 'Description Language'
+
+# Code stored for descriptions langdetect finds no language features in
+UNKNOWN = 'unknown'
+
+# Most parameters in one SQLite statement
+_SQL_VARIABLES = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS languages (
+    hash TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    PRIMARY KEY (hash, seed)
+);
+"""
+
+
+def description_hash(text):
+    """
+    Return the cache key of a description's text.
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _detect_batch(texts, seed):
+    """
+    Detect the language of each text; runs in a worker process.
+    """
+    from langdetect import DetectorFactory, detect
+    from langdetect.lang_detect_exception import LangDetectException
+
+    DetectorFactory.seed = seed
+    languages = []
+    for text in texts:
+        try:
+            languages.append(detect(text))
+        except LangDetectException:
+            languages.append(UNKNOWN)
+    return languages
+
+
+class LanguageCache:
+    """
+    SQLite-backed cache of detected description languages, keyed by text hash and seed.
+
+    Args:
+        path (str): The SQLite database file.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, hashes, seed):
+        """
+        Look up cached languages.
+
+        Args:
+            hashes (list): Description hashes.
+            seed (int): The langdetect seed the languages were detected with.
+
+        Returns:
+            dict: The language of each hash that is cached.
+        """
+        found = {}
+        with self._connection() as conn:
+            for start in range(0, len(hashes), _SQL_VARIABLES):
+                batch = hashes[start:start + _SQL_VARIABLES]
+                found.update(conn.execute(
+                    f"SELECT hash, language FROM languages WHERE seed = ? AND hash IN ({', '.join('?' * len(batch))})",
+                    [seed, *batch],
+                ).fetchall())
+        return found
+
+    def put_many(self, languages, seed):
+        """
+        Store detected languages.
+
+        Args:
+            languages (dict): The language of each description hash.
+            seed (int): The langdetect seed they were detected with.
+        """
+        with self._connection() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO languages (hash, seed, language) VALUES (?, ?, ?)',
+                [(key, seed, language) for key, language in languages.items()],
+            )
+
+    def __len__(self):
+        with self._connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM languages').fetchone()[0]
+
+
+def detect_languages(descriptions, cache=None, seed=DEFAULT_SEED, workers=None, batch_size=BATCH_SIZE):
+    """
+    Detect the language of many descriptions.
+
+    Each distinct text is detected at most once, and only if it is not cached.
+
+    Args:
+        descriptions (iterable): The descriptions; missing or blank ones get None.
+        cache (LanguageCache): The cache to use. Default is one at DEFAULT_CACHE_PATH.
+        seed (int): The langdetect seed.
+        workers (int): The number of worker processes. Default is the number of
+            CPUs; 1 detects in this process.
+        batch_size (int): The number of descriptions per worker task.
+
+    Returns:
+        Series: The ISO 639-1 code of each description (or UNKNOWN), in input order.
+    """
+    descriptions = pd.Series(descriptions, dtype=object)
+    texts = descriptions.map(lambda text: text.strip() or None if isinstance(text, str) else None)
+    codes, uniques = pd.factorize(texts)
+    uniques = list(uniques)
+    hashes = [description_hash(text) for text in uniques]
+
+    cache = cache if cache is not None else LanguageCache()
+    found = cache.get_many(hashes, seed)
+    missing = [index for index, key in enumerate(hashes) if key not in found]
+    if missing:
+        batches = [[uniques[index] for index in missing[start:start + batch_size]]
+                   for start in range(0, len(missing), batch_size)]
+        workers = max(1, workers or os.cpu_count() or 1)
+        if workers == 1 or len(batches) == 1:
+            results = [_detect_batch(batch, seed) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+                results = list(pool.map(_detect_batch, batches, [seed] * len(batches)))
+        detected = dict(zip((hashes[index] for index in missing), (code for batch in results for code in batch)))
+        cache.put_many(detected, seed)
+        found.update(detected)
+
+    # Code -1 (no description) picks the trailing None
+    languages = np.array([found[key] for key in hashes] + [None], dtype=object)
+    return pd.Series(languages[codes], index=descriptions.index, dtype=object)
+
+
+def add_description_languages(data, column=DEFAULT_COLUMN, **options):
+    """
+    Return a copy of repository rows with the language of each description as a column.
+
+    Args:
+        data (DataFrame): Rows with a 'Description' column.
+        column (str): The column to write.
+        **options: Passed to detect_languages.
+
+    Returns:
+        DataFrame: The rows with the new column.
+    """
+    return data.assign(**{column: detect_languages(data['Description'], **options).to_numpy()})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV with a Description column')
+    parser.add_argument('--output', default=None, help='default is to overwrite the input')
+    parser.add_argument('--column', default=DEFAULT_COLUMN)
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    data = pd.read_csv(args.input)
+    cache = LanguageCache(args.cache)
+    cached = len(cache)
+    data = add_description_languages(data, args.column, cache=cache, seed=args.seed, workers=args.workers)
+    output = args.output or args.input
+    data.to_csv(output, index=False)
+    print(f"Wrote {len(data)} rows to {output} ({len(cache) - cached} descriptions detected, the rest cached)")
+
+
+if __name__ == "__main__":
+    main()
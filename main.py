@@ -1,51 +1,36 @@
+import requests
 import streamlit as st
-import pandas as pd
-from datetime import datetime
-from github_data import get_most_starred_repositories
-from analysis import (
-    analyze_yearly_trends,
-    analyze_quarterly_trends,
-    perform_regression_analysis,
-    calculate_average_stars,
-    find_most_popular_language,
-    calculate_total_forks,
-    count_repositories_by_language,
-    conduct_volatility_analysis
-)
-from github_data_visualization import (
-    visualize_language_distribution,
-    visualize_stars_vs_forks,
-    visualize_repo_stats,
-    visualize_yearly_trends,
-    visualize_quarterly_trends,
-    visualize_correlation_matrix,
-    visualize_repo_distribution_by_owner,
-    visualize_time_series,
-    visualize_repo_stars_distribution,
-    visualize_repo_watchers_vs_stars,
-    visualize_repo_issues_vs_stars,
-    visualize_avg_stars_by_language,
-    visualize_top_languages
-)
-
-# Disable the PyplotGlobalUseWarning
-st.set_option('deprecation.showPyplotGlobalUse', False)
-
-def load_data():
+
+# Page modules are imported inside the branch that renders the page, so opening
+# Home or About never loads matplotlib, seaborn or pyarrow. Python
+# keeps imported modules in sys.modules, so the cost is paid once per process,
+# on the first visit to a page that needs them.
+
+# Rows per page of the Top Repositories table
+TABLE_PAGE_SIZE = 25
+
+def load_data(start=None, end=None, columns=None, predicate=None):
     """
-    Load sample GitHub repository data.
+    Load GitHub repository data.
+
+    Reads the date-partitioned snapshot store when it has been populated, so only
+    the snapshots in the date range and the requested columns are read, and falls
+    back to github_repos.csv otherwise. The parsed frame is shared between
+    sessions and reruns until the data changes; see data_loader.load_repositories.
+
+    Args:
+        start (date): The first snapshot date to include. Default is the earliest.
+        end (date): The last snapshot date to include. Default is the latest.
+        columns (list): The columns to load. Default is all columns.
+        predicate (pyarrow.dataset.Expression): An optional row filter pushed down
+            to the snapshot reader; ignored for the CSV fallback.
     """
-    # Get current date
-    current_date = datetime.today().strftime('%Y-%m-%d')
+    from data_loader import load_repositories
 
-    # Load your data here or use a sample DataFrame for testing
-    data = pd.read_csv("github_repos.csv")
+    data = load_repositories(start, end, columns, predicate)
     
-    # Convert 'Date' column to datetime format
-    data['Date'] = pd.to_datetime(data['Date'])  # No need to specify format
-    
-    # Print data types of all columns
-    print(data.dtypes)
+    # Report the memory footprint of the shared frame
+    st.sidebar.write(f"Data: {len(data)} rows, {data.memory_usage(deep=True).sum() / 1024:.1f} KiB in memory")
     
     return data
 
@@ -70,19 +55,28 @@ def main():
         st.subheader("Top Repositories Analysis")
         language = st.sidebar.text_input("Enter programming language", "python")
         limit = st.sidebar.slider("Select number of repositories", 1, 100, 10)
-        repositories = get_most_starred_repositories(language, limit)
-        if repositories:
-            st.write("Top Repositories:")
-            for repo in repositories:
-                st.write(f"Name: {repo['name']}")
-                st.write(f"Description: {repo['description']}")
-                st.write(f"Stars: {repo['stars']}")
-                st.write(f"Forks: {repo['forks']}")
-                st.write(f"Watchers: {repo['watchers']}")
-                st.write(f"Issues: {repo['issues']}")
-                st.write("---")
-        else:
+        sort_by = st.sidebar.selectbox("Sort by", ["Stars", "Forks", "Watchers", "Issues", "Name"])
+        descending = st.sidebar.checkbox("Descending", True)
+        from github_data import load_top_repositories_table
+        # The list is fetched once per (language, limit); sorting and paging reuse it
+        try:
+            repos = load_top_repositories_table(language, limit)
+        except requests.RequestException as e:
+            st.write(f"Failed to fetch repositories: {e}")
+            repos = None
+        if repos is not None and repos.empty:
             st.write("No repositories found.")
+        elif repos is not None:
+            # Render one table of at most TABLE_PAGE_SIZE rows instead of widgets per repository
+            page_count = -(-len(repos) // TABLE_PAGE_SIZE)
+            page = st.sidebar.number_input("Page", 1, page_count, 1) if page_count > 1 else 1
+            start = (page - 1) * TABLE_PAGE_SIZE
+            table = repos.sort_values(sort_by, ascending=not descending, kind='stable')
+            table = table.iloc[start:start + TABLE_PAGE_SIZE].reset_index(drop=True)
+            table.index += start + 1
+            st.write("Top Repositories:")
+            st.dataframe(table)
+            st.write(f"Showing {start + 1}-{start + len(table)} of {len(repos)}")
         
     elif choice == "Analysis":
         st.subheader("Analysis Page")
@@ -95,28 +89,53 @@ def main():
         # Get user input for programming language
         language = st.sidebar.text_input("Enter programming language", "python")
         
-        data = load_data()
+        from analysis import (
+            analyze_yearly_trends,
+            analyze_quarterly_trends,
+            perform_regression_analysis,
+            conduct_volatility_analysis
+        )
+        from github_data_visualization import (
+            visualize_yearly_trends,
+            visualize_quarterly_trends,
+            visualize_correlation_matrix
+        )
+        from data_loader import load_repository_aggregates, load_repository_regression, load_repository_volatility
 
         if analysis_choice == "Yearly Trends":
             st.header("Yearly Trends Analysis")
-            visualize_yearly_trends(data)
-            yearly_results = analyze_yearly_trends(data)
+            # Trends are read from the precomputed rollups, not the repository rows
+            aggregates = load_repository_aggregates()
+            visualize_yearly_trends(aggregates)
+            yearly_results = analyze_yearly_trends(aggregates)
             st.write(yearly_results)
         elif analysis_choice == "Quarterly Trends":
             st.header("Quarterly Trends Analysis")
-            visualize_quarterly_trends(data)
-            quarterly_results = analyze_quarterly_trends(data)
+            aggregates = load_repository_aggregates()
+            visualize_quarterly_trends(aggregates)
+            quarterly_results = analyze_quarterly_trends(aggregates)
             st.write(quarterly_results)
         elif analysis_choice == "Regression Analysis":
             st.header("Regression Analysis")
-            visualize_correlation_matrix(data)
-            regression_results = perform_regression_analysis(data)
-            st.write(regression_results)
+            predictors = st.sidebar.multiselect(
+                "Predict forks from", ["Stars", "Watchers", "Issues", "Age"], default=["Stars"]
+            )
+            # Fitted from statistics kept up to date at ingest time, not from the rows
+            regression = load_repository_regression()
+            visualize_correlation_matrix(regression)
+            if predictors:
+                regression_results = perform_regression_analysis(regression, predictors)
+                st.write(regression_results)
+            else:
+                st.write("Select at least one predictor.")
         elif analysis_choice == "Volatility Analysis":
             st.header("Volatility Analysis")
-            visualize_time_series(data, 'Date')
-            volatility_results = conduct_volatility_analysis(data)
-            st.write(volatility_results)
+            top_k = st.sidebar.slider("Most volatile repositories", min_value=5, max_value=50, value=10)
+            # Read from the per-repository statistics kept up to date at ingest time
+            volatility = load_repository_volatility()
+            volatility_results = conduct_volatility_analysis(volatility, top_k, language or None)
+            st.dataframe(volatility_results["Most Volatile Repositories"])
+            st.dataframe(volatility_results["Volatility by Language"])
         
     elif choice == "About":
         st.subheader("About Page")
@@ -203,6 +222,26 @@ def main():
                 st.write("- Twitter: @example_handle")
 
         else:  # Show selected visualizations
+            from github_data_visualization import (
+                visualize_language_distribution,
+                visualize_stars_vs_forks,
+                visualize_repo_stats,
+                visualize_yearly_trends,
+                visualize_quarterly_trends,
+                visualize_correlation_matrix,
+                visualize_repo_distribution_by_owner,
+                visualize_time_series,
+                visualize_repo_stars_distribution,
+                visualize_repo_watchers_vs_stars,
+                visualize_repo_issues_vs_stars,
+                visualize_avg_stars_by_language,
+                visualize_top_languages
+            )
+            from data_loader import load_repository_aggregates
+
+            # Charts of per-year, per-quarter and per-language totals use the rollups
+            aggregates = load_repository_aggregates()
+
             # Visualizations based on selected options
             if "Language Distribution" in selected_visualizations:
                 visualize_language_distribution(data)
@@ -211,9 +250,9 @@ def main():
             if "Repository Stats" in selected_visualizations:
                 visualize_repo_stats(data)
             if "Yearly Trends" in selected_visualizations:
-                visualize_yearly_trends(data)
+                visualize_yearly_trends(aggregates)
             if "Quarterly Trends" in selected_visualizations:
-                visualize_quarterly_trends(data)
+                visualize_quarterly_trends(aggregates)
             if "Correlation Matrix" in selected_visualizations:
                 visualize_correlation_matrix(data)
             if "Repo Distribution by Owner" in selected_visualizations:
@@ -227,9 +266,9 @@ def main():
             if "Repo Issues vs Stars" in selected_visualizations:
                 visualize_repo_issues_vs_stars(data)
             if "Average Stars by Language" in selected_visualizations:
-                visualize_avg_stars_by_language(data)
+                visualize_avg_stars_by_language(aggregates)
             if "Top Languages" in selected_visualizations:
-                visualize_top_languages(data)
+                visualize_top_languages(aggregates)
 
 if __name__ == "__main__":
     main()
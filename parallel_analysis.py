@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aggregate_store import AggregateStore
+from analysis import analyze_quarterly_trends, analyze_yearly_trends, conduct_volatility_analysis
+from volatility import VolatilityTracker
+
+# Worker processes used when none are requested
+WORKERS = int(os.environ.get('ANALYSIS_WORKERS', '0')) or os.cpu_count() or 1
+
+# Ways the rows can be split into partitions; 'URL' keeps each repository's rows together
+PARTITION_BY = ('rows', 'Year', 'Language', 'URL')
+
+# Analyses run_parallel_analysis can compute, and the rollup dimension each needs.
+# Volatility needs none: every worker tracks the repositories of its partition
+# (see volatility.py), which needs all snapshots of a repository in one
+# partition, so it is computed over partitions by URL.
+ANALYSES = {
+    'yearly_trends': 'Year',
+    'quarterly_trends': 'Quarter',
+    'language_counts': 'Language',
+    'volatility': None,
+}
+
+
+def _buckets(urls, partitions):
+    """
+    Return the partition of every repository, from a hash of its URL that is the same in every process.
+    """
+    return pd.util.hash_array(np.asarray(urls, dtype=object)) % partitions
+
+
+def _partial(partition, analyses, dates=None):
+    """
+    Compute the mergeable partial results of one partition; runs in a worker process.
+    """
+    if isinstance(partition, tuple):
+        # (path, row groups, bucket) of a Parquet file, read by the worker itself
+        import pyarrow.parquet as pq
+
+        path, row_groups, bucket = partition
+        partition = pq.ParquetFile(path).read_row_groups(row_groups).to_pandas()
+        if bucket is not None:
+            index, partitions = bucket
+            partition = partition[_buckets(partition['URL'], partitions) == index]
+    dimensions = tuple(ANALYSES[analysis] for analysis in analyses if ANALYSES[analysis] is not None)
+    store = AggregateStore.from_frame(partition, dimensions)
+    volatility = VolatilityTracker.from_frame(partition, dates=dates) if 'volatility' in analyses else None
+    return store, volatility
+
+
+def partition_frame(data, by='rows', partitions=None):
+    """
+    Split repository rows into partitions that can be analyzed independently.
+
+    Args:
+        data (DataFrame): Rows in the github_repos.csv layout.
+        by (str): 'rows' for contiguous row ranges, 'Year' or 'Language' to
+            keep each group's rows together, or 'URL' to keep each repository's
+            rows together, spread over partitions by a hash of the URL.
+        partitions (int): The number of partitions. Default is WORKERS. Groups
+            are packed into partitions of similar size.
+
+    Returns:
+        list: The partitions as DataFrames.
+    """
+    if by not in PARTITION_BY:
+        raise ValueError(f"Unknown partitioning: {by}")
+    partitions = max(1, partitions or WORKERS)
+    if by == 'rows':
+        bounds = np.linspace(0, len(data), partitions + 1).astype(int)
+        return [data.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    if by == 'URL':
+        buckets = _buckets(data['URL'], partitions)
+        return [data[buckets == index] for index in range(partitions) if (buckets == index).any()]
+
+    keys = pd.to_datetime(data['Date']).dt.year if by == 'Year' else data[by]
+    codes, _ = pd.factorize(keys, sort=True)
+    sizes = np.bincount(codes[codes >= 0])
+    # Greedily give the largest remaining group to the currently smallest partition
+    assignment = np.empty(len(sizes), dtype=int)
+    loads = np.zeros(min(partitions, len(sizes)) or 1, dtype=np.int64)
+    for group in np.argsort(-sizes):
+        target = int(loads.argmin())
+        assignment[group] = target
+        loads[target] += sizes[group]
+    # Rows without a key (e.g. no language) go with the first partition
+    row_partition = np.where(codes >= 0, assignment[np.maximum(codes, 0)], 0)
+    return [data[row_partition == index] for index in range(len(loads)) if (row_partition == index).any()]
+
+
+def _parquet_partitions(path, partitions, by_repository=False):
+    """
+    Split a Parquet file into runs of whole row groups, one per partition, or
+    with `by_repository` into the repositories of each URL hash bucket.
+    """
+    import pyarrow.parquet as pq
+
+    row_groups = pq.ParquetFile(path).num_row_groups
+    if by_repository:
+        # A repository's rows may be in any row group, so every worker reads them all
+        return [(path, list(range(row_groups)), (index, partitions)) for index in range(partitions)]
+    bounds = np.linspace(0, row_groups, min(partitions, row_groups) + 1).astype(int)
+    return [(path, list(range(start, stop)), None) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def _snapshot_dates(data):
+    """
+    Return the sorted distinct snapshot dates of all rows, so every partition numbers the same periods.
+    """
+    if isinstance(data, str):
+        import pyarrow.parquet as pq
+
+        data = pq.read_table(data, columns=['Date']).to_pandas()
+    return np.unique(pd.to_datetime(data['Date']).to_numpy())
+
+
+def run_parallel_analysis(data, analyses=tuple(ANALYSES), by=None, workers=None, partitions=None):
+    """
+    Run trend, volatility and counting analyses over partitions in a process pool.
+
+    Each worker turns its partition into mergeable per-group rollups (counts,
+    sums and value counts, see aggregate_store) and, for volatility, into the
+    statistics of its repositories over all snapshot dates. The partials are
+    merged in this process: rollups by addition, the volatility statistics by
+    concatenation, which pools the per-language moments over all repositories.
+    So the results equal those of the single-process functions.
+
+    Args:
+        data (DataFrame or str): Repository rows, or the path of a Parquet file
+            whose row groups the workers read themselves, so no rows are sent
+            between processes.
+        analyses (iterable): Names from ANALYSES. Default is all of them.
+        by (str): How to partition a DataFrame, see partition_frame. Default
+            is 'URL' with volatility, which needs it, and 'rows' otherwise.
+            Parquet files are split by row groups, or by URL with volatility.
+        workers (int): The number of worker processes. Default is WORKERS; 1
+            runs everything in this process.
+        partitions (int): The number of partitions. Default is the number of workers.
+
+    Returns:
+        dict: Per analysis, the result of analyze_yearly_trends,
+        analyze_quarterly_trends or conduct_volatility_analysis, or for
+        'language_counts' a dict of repository counts per language.
+
+    Raises:
+        ValueError: If an analysis or partitioning is unknown, or volatility is
+            requested with a DataFrame partitioned other than by 'URL'.
+    """
+    analyses = tuple(analyses)
+    unknown = [analysis for analysis in analyses if analysis not in ANALYSES]
+    if unknown:
+        raise ValueError(f"Unknown analyses: {', '.join(unknown)}")
+    volatility = 'volatility' in analyses
+    by = by or ('URL' if volatility else 'rows')
+    if volatility and by != 'URL' and not isinstance(data, str):
+        raise ValueError("Volatility needs the rows partitioned by 'URL'")
+    workers = max(1, workers or WORKERS)
+    partitions = partitions or workers
+    if isinstance(data, str):
+        parts = _parquet_partitions(data, partitions, by_repository=volatility)
+    else:
+        parts = partition_frame(data, by, partitions)
+    dates = _snapshot_dates(data) if volatility else None
+
+    if workers == 1:
+        partials = [_partial(part, analyses, dates) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(_partial, parts, [analyses] * len(parts), [dates] * len(parts)))
+
+    store = AggregateStore()
+    for partial, _ in partials:
+        store.merge(partial)
+
+    results = {}
+    if 'yearly_trends' in analyses:
+        results['yearly_trends'] = analyze_yearly_trends(store)
+    if 'quarterly_trends' in analyses:
+        results['quarterly_trends'] = analyze_quarterly_trends(store)
+    if 'language_counts' in analyses:
+        results['language_counts'] = store.count('Language').to_dict()
+    if volatility:
+        tracker = VolatilityTracker.concat(partial for _, partial in partials)
+        results['volatility'] = conduct_volatility_analysis(tracker)
+    return results
@@ -0,0 +1,216 @@
+import json
+import os
+import uuid
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Columns whose co-moments can be accumulated; 'Age' is derived from 'Date'
+FEATURES = ('Stars', 'Forks', 'Watchers', 'Issues', 'Age')
+
+
+class RegressionAccumulator:
+    """
+    Sufficient statistics for least-squares regressions between repository counters.
+
+    Keeps the row count, the means and the co-moment matrix (the X'X and X'y
+    of the mean-centered data) of a set of features. Batches of rows are merged in with
+    Chan et al.'s pairwise update, so the statistics can be updated as
+    snapshots arrive, built in parallel and merged, and any target can be
+    regressed on any subset of the other features without seeing the rows again.
+    Centering keeps the sums small, so R² stays accurate on large counts.
+
+    Args:
+        features (iterable): The features to keep statistics of, from FEATURES.
+            Default is all of them.
+        as_of (date): The date 'Age' is measured to, in days since 'Date'.
+            Default is today; it must stay fixed for one accumulator.
+    """
+
+    def __init__(self, features=FEATURES, as_of=None):
+        self.features = tuple(features)
+        unknown = [feature for feature in self.features if feature not in FEATURES]
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(unknown)}")
+        self.as_of = pd.Timestamp(as_of or date.today()).normalize()
+        self.count = 0
+        self.mean = np.zeros(len(self.features))
+        self.comoment = np.zeros((len(self.features), len(self.features)))
+
+    @classmethod
+    def from_frame(cls, data, features=FEATURES, as_of=None):
+        """
+        Build the statistics of repository rows.
+
+        Args:
+            data (DataFrame or iterable): Rows in the github_repos.csv layout, or
+                an iterable of such chunks.
+            features (iterable): See RegressionAccumulator.
+            as_of (date): See RegressionAccumulator.
+
+        Returns:
+            RegressionAccumulator: The statistics of all rows.
+        """
+        accumulator = cls(features, as_of)
+        for chunk in ([data] if isinstance(data, pd.DataFrame) else data):
+            accumulator.update(chunk)
+        return accumulator
+
+    def update(self, data):
+        """
+        Add rows to the statistics.
+
+        Rows missing a value of any feature are skipped.
+
+        Args:
+            data (DataFrame): Rows in the github_repos.csv layout with a column
+                for every feature ('Date' for 'Age').
+        """
+        values = self._values(data)
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0)
+        centered = values - mean
+        self._merge(len(values), mean, centered.T @ centered)
+
+    def remove(self, data):
+        """
+        Take rows that were added before out of the statistics, e.g. the previous
+        version of repositories that changed.
+
+        Args:
+            data (DataFrame): Rows exactly as they were added with update().
+        """
+        values = self._values(data)
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0)
+        centered = values - mean
+        self._unmerge(len(values), mean, centered.T @ centered)
+
+    def _values(self, data):
+        columns = {}
+        for feature in self.features:
+            if feature == 'Age':
+                columns[feature] = (self.as_of - pd.to_datetime(data['Date'])).dt.days
+            else:
+                columns[feature] = data[feature]
+        return pd.DataFrame(columns).dropna().to_numpy(dtype=float)
+
+    def merge(self, other):
+        """
+        Add the statistics of another accumulator of the same features and as_of date.
+
+        Args:
+            other (RegressionAccumulator): The statistics to fold into these.
+        """
+        if other.features != self.features or other.as_of != self.as_of:
+            raise ValueError("Accumulators have different features or measure Age to different dates")
+        self._merge(other.count, other.mean, other.comoment)
+
+    def _merge(self, count, mean, comoment):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * self.count * count / total
+        self.mean = self.mean + delta * count / total
+        self.count = total
+
+    def _unmerge(self, count, mean, comoment):
+        # Chan et al.'s update solved for the statistics of the remaining rows
+        rest = self.count - count
+        if rest <= 0:
+            self.count = 0
+            self.mean = np.zeros(len(self.features))
+            self.comoment = np.zeros((len(self.features), len(self.features)))
+            return
+        rest_mean = (self.mean * self.count - mean * count) / rest
+        delta = mean - rest_mean
+        self.comoment = self.comoment - comoment - np.outer(delta, delta) * rest * count / self.count
+        self.mean = rest_mean
+        self.count = rest
+
+    def fit(self, target='Forks', predictors=('Stars',)):
+        """
+        Solve the least-squares regression of a target on predictors.
+
+        Args:
+            target (str): The feature to predict.
+            predictors (iterable): The features to predict it from.
+
+        Returns:
+            dict: 'coefficients' (one per predictor, in order), 'intercept',
+            'r_squared' and the number of 'observations'.
+
+        Raises:
+            ValueError: If a feature is not accumulated or there are no rows.
+        """
+        predictors = list(predictors)
+        unknown = [feature for feature in [target] + predictors if feature not in self.features]
+        if unknown:
+            raise ValueError(f"Unknown features: {', '.join(unknown)}")
+        if self.count == 0:
+            raise ValueError("No rows to fit")
+        x = [self.features.index(feature) for feature in predictors]
+        y = self.features.index(target)
+        sxx = self.comoment[np.ix_(x, x)]
+        sxy = self.comoment[x, y]
+        syy = self.comoment[y, y]
+        # lstsq also copes with constant or collinear predictors
+        coefficients = np.linalg.lstsq(sxx, sxy, rcond=None)[0]
+        intercept = self.mean[y] - coefficients @ self.mean[x]
+        r_squared = float(coefficients @ sxy / syy) if syy > 0 else float('nan')
+        return {
+            'coefficients': coefficients.tolist(),
+            'intercept': float(intercept),
+            'r_squared': r_squared,
+            'observations': self.count,
+        }
+
+    def correlation(self):
+        """
+        Return the Pearson correlation matrix of the features.
+
+        Returns:
+            DataFrame: The correlations, indexed by feature on both axes.
+        """
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(matrix, index=list(self.features), columns=list(self.features))
+
+    def to_dict(self):
+        return {
+            'as_of': self.as_of.date().isoformat(),
+            'features': list(self.features),
+            'count': self.count,
+            'mean': self.mean.tolist(),
+            'comoment': self.comoment.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        accumulator = cls(state['features'], state['as_of'])
+        accumulator.count = state['count']
+        accumulator.mean = np.array(state['mean'])
+        accumulator.comoment = np.array(state['comoment'])
+        return accumulator
+
+    def save(self, path):
+        """
+        Write the statistics to a JSON file, replacing it atomically.
+        """
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read statistics written by save().
+        """
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
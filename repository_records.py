@@ -0,0 +1,171 @@
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+# Repository fields the search fetchers can return, and how each is read from an API item
+REPOSITORY_FIELDS = {
+    'name': itemgetter('name'),
+    'url': itemgetter('html_url'),
+    'description': itemgetter('description'),
+    'stars': itemgetter('stargazers_count'),
+    'forks': itemgetter('forks_count'),
+    'watchers': itemgetter('watchers_count'),
+    'issues': itemgetter('open_issues_count'),
+    'full_name': itemgetter('full_name'),
+    'owner': lambda item: item['owner']['login'],
+    'language': lambda item: item.get('language'),
+    'created_at': lambda item: item.get('created_at'),
+}
+
+# Fields returned when no projection is requested
+DEFAULT_FIELDS = ('name', 'url', 'description', 'stars', 'forks', 'watchers', 'issues')
+
+# Fields stored as integers in columnar output
+NUMERIC_FIELDS = frozenset(('stars', 'forks', 'watchers', 'issues'))
+
+# Output formats accepted by the fetchers
+OUTPUTS = ('dicts', 'records', 'columns', 'frame', 'array')
+
+
+class RepositoryRecord:
+    """
+    A compact repository record.
+
+    Uses __slots__ instead of a per-instance dict, so each record costs a fixed
+    handful of pointers. Supports the dict-style access the rest of the app
+    uses (record['stars'], 'stars' in record, record.get('language')) for the
+    fields that were projected.
+    """
+    __slots__ = tuple(REPOSITORY_FIELDS)
+
+    def __init__(self, **values):
+        for field, value in values.items():
+            setattr(self, field, value)
+
+    @classmethod
+    def from_item(cls, item, fields=DEFAULT_FIELDS):
+        record = cls.__new__(cls)
+        for field in fields:
+            setattr(record, field, REPOSITORY_FIELDS[field](item))
+        return record
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def __contains__(self, field):
+        return isinstance(field, str) and hasattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def keys(self):
+        return [field for field in self.__slots__ if hasattr(self, field)]
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.keys()}
+
+    def __eq__(self, other):
+        if not isinstance(other, RepositoryRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        values = ', '.join(f'{field}={getattr(self, field)!r}' for field in self.keys())
+        return f'RepositoryRecord({values})'
+
+
+def check_fields(fields):
+    """
+    Validate a field projection and return it as a tuple.
+
+    Args:
+        fields (iterable): Field names, or None for DEFAULT_FIELDS.
+
+    Returns:
+        tuple: The field names.
+
+    Raises:
+        ValueError: If a field is not in REPOSITORY_FIELDS.
+    """
+    if fields is None:
+        return DEFAULT_FIELDS
+    fields = tuple(fields)
+    unknown = [field for field in fields if field not in REPOSITORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown repository fields: {', '.join(unknown)}")
+    return fields
+
+
+def project_items(items, fields=DEFAULT_FIELDS, output='dicts'):
+    """
+    Convert API repository items into one page of output in the requested format.
+
+    Args:
+        items (list): Repository items from the GitHub API.
+        fields (tuple): The fields to keep.
+        output (str): 'dicts', 'records' or 'columns' (a dict of column lists).
+
+    Returns:
+        list or dict: The page.
+    """
+    if output == 'records':
+        return [RepositoryRecord.from_item(item, fields) for item in items]
+    if output == 'columns':
+        return {field: [REPOSITORY_FIELDS[field](item) for item in items] for field in fields}
+    getters = [(field, REPOSITORY_FIELDS[field]) for field in fields]
+    return [{field: getter(item) for field, getter in getters} for item in items]
+
+
+def concat_columns(pages, fields=DEFAULT_FIELDS):
+    """
+    Join columnar pages into one dict of column lists.
+    """
+    columns = {field: [] for field in fields}
+    for page in pages:
+        for field in fields:
+            columns[field].extend(page[field])
+    return columns
+
+
+def columns_to_frame(pages, fields=DEFAULT_FIELDS):
+    """
+    Build a DataFrame from columnar pages.
+
+    Counters become int64 columns and text fields object columns.
+
+    Args:
+        pages (iterable): Pages in the 'columns' format.
+        fields (tuple): The fields in each page.
+
+    Returns:
+        DataFrame: One row per repository.
+    """
+    columns = concat_columns(pages, fields)
+    return pd.DataFrame({
+        field: np.asarray(values, dtype=np.int64) if field in NUMERIC_FIELDS else pd.Series(values, dtype=object)
+        for field, values in columns.items()
+    }, columns=list(fields))
+
+
+def columns_to_array(pages, fields=DEFAULT_FIELDS):
+    """
+    Build a NumPy structured array from columnar pages.
+
+    Args:
+        pages (iterable): Pages in the 'columns' format.
+        fields (tuple): The fields in each page.
+
+    Returns:
+        numpy.ndarray: A structured array with one element per repository.
+    """
+    columns = concat_columns(pages, fields)
+    dtype = [(field, np.int64 if field in NUMERIC_FIELDS else object) for field in fields]
+    length = len(next(iter(columns.values()), []))
+    array = np.empty(length, dtype=dtype)
+    for field, values in columns.items():
+        array[field] = values
+    return array
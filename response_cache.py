@@ -0,0 +1,200 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Default location of the on-disk GitHub API response cache
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'github_api.sqlite3')
+
+# Total size of cached response bodies kept on disk before evicting
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Seconds a response stays fresh, by endpoint; the first matching pattern wins
+DEFAULT_TTLS = [
+    (re.compile(r'/search/'), 300),
+    (re.compile(r'/repos/[^/]+/[^/]+/issues'), 300),
+    (re.compile(r'/repos/[^/]+/[^/]+/contributors'), 3600),
+    (re.compile(r'/repos/'), 600),
+    (re.compile(r'/users/[^/]+/repos'), 900),
+    (re.compile(r'/users/'), 3600),
+]
+
+# Freshness of responses from endpoints without a configured TTL
+DEFAULT_TTL = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_STATS = ('hits', 'misses', 'revalidated', 'evictions')
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of GitHub API responses shared by every process on the machine.
+
+    Entries are keyed by URL and query parameters and stay fresh for a TTL that
+    depends on the endpoint. Expired entries are kept so they can be revalidated
+    with their ETag. Once the stored bodies exceed `max_bytes` the least recently
+    used entries are evicted. Hit, miss, revalidation and eviction counters are
+    stored alongside the entries, so they cover all processes using the cache.
+
+    Args:
+        path (str): The SQLite database file.
+        max_bytes (int): The size budget for cached response bodies.
+        ttls (list): (compiled regex, seconds) pairs matched against the URL.
+        default_ttl (int): The TTL for URLs that match no pattern.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, ttls=None, default_ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def ttl_for(self, url):
+        """
+        Return the number of seconds a response from `url` stays fresh.
+        """
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def _count(self, conn, name, amount=1):
+        conn.execute(
+            'INSERT INTO stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, amount),
+        )
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        A fresh entry counts as a hit, anything else as a miss.
+
+        Args:
+            key (str): The request key.
+
+        Returns:
+            dict: The entry with 'body' (bytes), 'headers' (dict), 'etag',
+            'last_modified' and 'fresh' keys, or None if nothing is cached.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute(
+                'SELECT body, headers, etag, last_modified, expires_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            fresh = row is not None and row[4] > now
+            self._count(conn, 'hits' if fresh else 'misses')
+            if row is None:
+                return None
+            conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+        return {
+            'body': row[0],
+            'headers': json.loads(row[1]),
+            'etag': row[2],
+            'last_modified': row[3],
+            'fresh': fresh,
+        }
+
+    def put(self, key, body, headers, etag, last_modified, ttl):
+        """
+        Store a response and evict least recently used entries if over budget.
+
+        Args:
+            key (str): The request key.
+            body (bytes): The raw response body.
+            headers (dict): The response headers.
+            etag (str): The ETag validator, if any.
+            last_modified (str): The Last-Modified validator, if any.
+            ttl (int): Seconds the response stays fresh.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, body, headers, etag, last_modified, expires_at, accessed_at, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, body, json.dumps(dict(headers)), etag, last_modified, now + ttl, now, len(body)),
+            )
+            self._evict(conn)
+
+    def refresh(self, key, ttl):
+        """
+        Mark an entry as fresh again after the server confirmed it is unchanged.
+        """
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE responses SET expires_at = ?, accessed_at = ? WHERE key = ?', (now + ttl, now, key)
+            )
+            self._count(conn, 'revalidated')
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM responses WHERE key = ?', evicted)
+        self._count(conn, 'evictions', len(evicted))
+
+    def stats(self):
+        """
+        Return the cache counters and current size.
+
+        Returns:
+            dict: 'hits', 'misses', 'revalidated', 'evictions', 'entries' and 'bytes'.
+        """
+        with self._connection() as conn:
+            stats = dict.fromkeys(_STATS, 0)
+            stats.update(conn.execute('SELECT name, value FROM stats').fetchall())
+            entries, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        stats['entries'] = entries
+        stats['bytes'] = size
+        return stats
+
+    def clear(self):
+        """
+        Remove every cached response and reset the counters.
+        """
+        with self._connection() as conn:
+            conn.execute('DELETE FROM responses')
+            conn.execute('DELETE FROM stats')
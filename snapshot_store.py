@@ -0,0 +1,346 @@
+import os
+import shutil
+import sys
+import uuid
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from aggregate_store import AggregateStore
+from regression import RegressionAccumulator
+from volatility import VolatilityTracker
+
+# Directory holding the date-partitioned snapshot dataset
+SNAPSHOT_DIR = os.environ.get('GITHUB_SNAPSHOT_DIR', 'snapshots')
+
+# Counters compared between crawls to decide whether a repository changed
+COUNTER_COLUMNS = ['Stars', 'Forks', 'Watchers', 'Issues']
+
+# Columns kept per repository in the state: its counters and what the rollups group it by
+STATE_COLUMNS = ['URL'] + COUNTER_COLUMNS + ['Language', 'Owner', 'Date']
+
+# Columns stored in each partition; 'Date' is the partition key
+SCHEMA = pa.schema([
+    ('Name', pa.string()),
+    ('Description', pa.string()),
+    ('Stars', pa.int64()),
+    ('Forks', pa.int64()),
+    ('Watchers', pa.int64()),
+    ('Issues', pa.int64()),
+    ('URL', pa.string()),
+    ('Language', pa.string()),
+    ('Owner', pa.string()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('Date', pa.date32())]), flavor='hive')
+
+
+def _state_path(root):
+    # Directories starting with '_' are ignored when the dataset is discovered
+    return os.path.join(root, '_state', 'latest.parquet')
+
+
+def _aggregates_path(root):
+    return os.path.join(root, '_aggregates')
+
+
+def _regression_path(root):
+    return os.path.join(root, '_regression.json')
+
+
+def _volatility_path(root):
+    return os.path.join(root, '_volatility')
+
+
+def _load_state(root):
+    """
+    Load the latest known row of every repository in the store, as far as the rollups use it.
+    """
+    path = _state_path(root)
+    if os.path.exists(path):
+        state = pq.read_table(path).to_pandas()
+        if set(STATE_COLUMNS) <= set(state.columns):
+            return state
+        # Stores written before the state held these columns rolled up every
+        # version of a repository; rebuild the state and rollups from the latest rows
+        _discard_rollups(root)
+        return read_snapshots(columns=STATE_COLUMNS, root=root)
+    state = pd.DataFrame(columns=STATE_COLUMNS).astype({column: 'int64' for column in COUNTER_COLUMNS})
+    return state.astype({'Date': 'datetime64[ns]'})
+
+
+def _discard_rollups(root):
+    if os.path.isdir(_aggregates_path(root)):
+        shutil.rmtree(_aggregates_path(root))
+    if os.path.exists(_regression_path(root)):
+        os.remove(_regression_path(root))
+
+
+def _save_state(state, root):
+    path = _state_path(root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    pq.write_table(pa.Table.from_pandas(state, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _normalize(data):
+    """
+    Bring a frame in github_repos.csv layout to the snapshot schema.
+    """
+    frame = data.copy()
+    if 'Owner' not in frame.columns:
+        frame['Owner'] = frame['URL'].str.rstrip('/').str.split('/').str[-2]
+    for column in SCHEMA.names:
+        if column not in frame.columns:
+            frame[column] = None
+    frame = frame.drop_duplicates('URL', keep='last')
+    frame[COUNTER_COLUMNS] = frame[COUNTER_COLUMNS].fillna(0).astype('int64')
+    return frame[SCHEMA.names]
+
+
+def has_snapshots(root=SNAPSHOT_DIR):
+    """
+    Check whether the snapshot store holds any data.
+
+    Args:
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        bool: True if at least one snapshot has been written.
+    """
+    return os.path.exists(_state_path(root))
+
+
+def write_snapshot(data, snapshot_date=None, root=SNAPSHOT_DIR):
+    """
+    Append the repositories of one crawl to the snapshot store.
+
+    Only repositories that are new or whose stars, forks, watchers or issues
+    changed since the last snapshot are written, into the partition of the
+    snapshot date. The rollups count each repository once, by its latest row:
+    the previous row of a changed repository is taken out as the new one goes
+    in. Snapshots must be written in date order.
+
+    Args:
+        data (DataFrame): Repositories in the github_repos.csv layout.
+        snapshot_date (date): The date of the crawl. Default is today.
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        int: The number of changed repositories written.
+    """
+    snapshot_date = snapshot_date or date.today()
+    frame = _normalize(data)
+    state = _load_state(root)
+
+    merged = frame[['URL'] + COUNTER_COLUMNS].merge(state[['URL'] + COUNTER_COLUMNS], on='URL', how='left',
+                                                    suffixes=('', '_prev'))
+    changed = merged['Stars_prev'].isna()
+    for column in COUNTER_COLUMNS:
+        changed |= merged[column] != merged[f'{column}_prev']
+    changes = frame[changed.values]
+    if changes.empty:
+        # A crawl without changes is still a snapshot period in which every repository returned 0
+        volatility = load_volatility(root)
+        volatility.update(changes, snapshot_date)
+        volatility.save(_volatility_path(root))
+        return 0
+
+    aggregates = load_aggregates(root)
+    regression = load_regression(root)
+    volatility = load_volatility(root)
+    partition = os.path.join(root, f'Date={snapshot_date.isoformat()}')
+    os.makedirs(partition, exist_ok=True)
+    table = pa.Table.from_pandas(changes, schema=SCHEMA, preserve_index=False)
+    pq.write_table(table, os.path.join(partition, f'part-{uuid.uuid4().hex}.parquet'))
+
+    # Keep the rollups in step with the dataset, so readers never aggregate raw rows
+    rows = changes.assign(Date=pd.Timestamp(snapshot_date))
+    previous = state[state['URL'].isin(changes['URL'])]
+    aggregates.remove(previous)
+    aggregates.update(rows)
+    aggregates.save(_aggregates_path(root))
+    regression.remove(previous)
+    regression.update(rows)
+    regression.save(_regression_path(root))
+    volatility.update(changes, snapshot_date)
+    volatility.save(_volatility_path(root))
+
+    state = pd.concat([state[~state['URL'].isin(changes['URL'])], rows[STATE_COLUMNS]])
+    _save_state(state, root)
+    return len(changes)
+
+
+def ingest_repositories(repositories, language, snapshot_date=None, root=SNAPSHOT_DIR):
+    """
+    Append repositories returned by the github_data fetchers to the snapshot store.
+
+    Args:
+        repositories (iterable): Repository dictionaries, e.g. from get_most_starred_repositories,
+            or pages of them from iter_most_starred_repositories.
+        language (str): The programming language the repositories were fetched for.
+        snapshot_date (date): The date of the crawl. Default is today.
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        int: The number of changed repositories written.
+    """
+    rows = []
+    for item in repositories:
+        for repo in (item if isinstance(item, list) else [item]):
+            rows.append({
+                'Name': repo['name'],
+                'Description': repo['description'],
+                'Stars': repo['stars'],
+                'Forks': repo['forks'],
+                'Watchers': repo['watchers'],
+                'Issues': repo['issues'],
+                'URL': repo['url'],
+                'Language': language,
+            })
+    if not rows:
+        return 0
+    return write_snapshot(pd.DataFrame(rows), snapshot_date, root)
+
+
+def import_csv(path, root=SNAPSHOT_DIR):
+    """
+    Load a CSV in github_repos.csv layout into the snapshot store, one snapshot per Date.
+
+    Args:
+        path (str): The CSV file.
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        int: The number of changed repositories written.
+    """
+    data = pd.read_csv(path)
+    data['Date'] = pd.to_datetime(data['Date'], format='%Y-%m-%d')
+    written = 0
+    for snapshot_date, rows in data.groupby('Date', sort=True):
+        written += write_snapshot(rows.drop(columns='Date'), snapshot_date.date(), root)
+    return written
+
+
+def load_aggregates(root=SNAPSHOT_DIR):
+    """
+    Load the year, quarter, language and owner rollups of the latest row of every repository.
+
+    The rollups are updated by write_snapshot. Stores written before they
+    existed are aggregated from the raw rows once.
+
+    Args:
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        AggregateStore: The rollups, empty if no snapshot has been written.
+    """
+    if os.path.isdir(_aggregates_path(root)):
+        return AggregateStore.load(_aggregates_path(root))
+    if has_snapshots(root):
+        return AggregateStore.from_frame(read_snapshots(root=root))
+    return AggregateStore()
+
+
+def load_regression(root=SNAPSHOT_DIR):
+    """
+    Load the regression statistics (see regression.py) of the latest row of every repository.
+
+    The statistics are updated by write_snapshot. Stores written before they
+    existed are read through once.
+
+    Args:
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        RegressionAccumulator: The statistics, empty if no snapshot has been written.
+    """
+    if os.path.exists(_regression_path(root)):
+        return RegressionAccumulator.load(_regression_path(root))
+    if has_snapshots(root):
+        return RegressionAccumulator.from_frame(read_snapshots(root=root))
+    return RegressionAccumulator()
+
+
+def load_volatility(root=SNAPSHOT_DIR):
+    """
+    Load the per-repository star volatility (see volatility.py) of the snapshot history.
+
+    The statistics are updated by write_snapshot. Stores written before they
+    existed are read through once.
+
+    Args:
+        root (str): The snapshot dataset directory.
+
+    Returns:
+        VolatilityTracker: The statistics, empty if no snapshot has been written.
+    """
+    if os.path.isdir(_volatility_path(root)):
+        return VolatilityTracker.load(_volatility_path(root))
+    if has_snapshots(root):
+        return VolatilityTracker.from_frame(read_snapshots(columns=['URL', 'Stars', 'Language', 'Date'], root=root,
+                                                           history=True))
+    return VolatilityTracker()
+
+
+def read_snapshots(start=None, end=None, columns=None, predicate=None, root=SNAPSHOT_DIR, history=False):
+    """
+    Read the repositories of a date range.
+
+    Each repository comes back once, as its latest row in the range, i.e. as
+    it stood at the end of the range; with `history` every row written for it
+    in the range comes back instead. Partitions outside the range are skipped,
+    only the requested columns are read, and `predicate` is pushed down to the
+    Parquet reader. It is applied to the latest rows, so a repository that no
+    longer matches is left out rather than read at an older version.
+
+    Args:
+        start (date): The first snapshot date to include. Default is the earliest.
+        end (date): The last snapshot date to include. Default is the latest.
+        columns (list): The columns to read. Default is all columns including 'Date'.
+        predicate (pyarrow.dataset.Expression): An optional row filter,
+            e.g. ds.field('Language') == 'Python'.
+        root (str): The snapshot dataset directory.
+        history (bool): Return every row in the range, not just the latest per repository.
+
+    Returns:
+        DataFrame: The matching snapshot rows.
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    conditions = []
+    if start is not None:
+        conditions.append(ds.field('Date') >= pa.scalar(pd.Timestamp(start).date(), type=pa.date32()))
+    if end is not None:
+        conditions.append(ds.field('Date') <= pa.scalar(pd.Timestamp(end).date(), type=pa.date32()))
+    in_range = _conjunction(conditions)
+    expression = _conjunction(conditions + ([] if predicate is None else [predicate]))
+    if history:
+        return dataset.to_table(columns=columns, filter=expression).to_pandas(date_as_object=False)
+
+    # Find the latest version of every repository from the two key columns,
+    # then read the requested columns of the matching rows only
+    keys = dataset.to_table(columns=['URL', 'Date'], filter=in_range).to_pandas(date_as_object=False)
+    latest = keys.sort_values('Date', kind='stable').drop_duplicates('URL', keep='last')
+    names = SCHEMA.names + ['Date'] if columns is None else list(columns)
+    extra = [column for column in ('URL', 'Date') if column not in names]
+    rows = dataset.to_table(columns=names + extra, filter=expression).to_pandas(date_as_object=False)
+    rows = rows.merge(latest, on=['URL', 'Date'], how='inner')
+    return rows[names]
+
+
+def _conjunction(conditions):
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+if __name__ == "__main__":
+    # Example usage: python snapshot_store.py github_repos.csv
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'github_repos.csv'
+    print(f"Imported {import_csv(csv_path)} changed repositories from {csv_path}")
+    print(read_snapshots(columns=['Name', 'Stars', 'Date']))
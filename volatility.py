@@ -0,0 +1,433 @@
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Number of most recent snapshot periods the rolling volatility covers
+ROLLING_WINDOW = 30
+
+# Columns of the statistics returned by VolatilityTracker.statistics
+STATISTICS = ['Language', 'Stars', 'Observations', 'Volatility', 'Rolling Volatility']
+
+
+def _add_value(count, mean, m2, value):
+    """
+    Add one return to running statistics with Welford's update; NaN values are skipped.
+    """
+    known = ~np.isnan(value)
+    count = count + known
+    delta = np.where(known, value - mean, 0.0)
+    mean = mean + np.divide(delta, count, out=np.zeros_like(delta), where=count > 0)
+    m2 = m2 + np.where(known, delta * (value - mean), 0.0)
+    return count, mean, m2
+
+
+def _add_zeros(count, mean, m2, zeros):
+    """
+    Add `zeros` returns of 0 to running statistics (Chan et al.'s merge with a constant group).
+    """
+    total = count + zeros
+    shrink = np.divide(count, total, out=np.zeros(len(count)), where=total > 0)
+    return total, mean * shrink, m2 + mean ** 2 * zeros * shrink
+
+
+def _sample_std(m2, count):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 1, np.sqrt(np.maximum(m2, 0) / (count - 1)), np.nan)
+
+
+def _pooled_std(codes, groups, count, mean, m2):
+    """
+    Return the standard deviation of all returns of each group of repositories.
+
+    Merges the per-repository moments as in Chan et al.'s parallel variance:
+    the squared deviations within repositories plus those of their means
+    around the group mean. `codes` gives each repository's group, -1 for none.
+    """
+    known = codes >= 0
+    codes, count, mean, m2 = codes[known], count[known], mean[known], m2[known]
+    total = np.bincount(codes, count, groups)
+    group_mean = np.divide(np.bincount(codes, count * mean, groups), total, out=np.zeros(groups), where=total > 0)
+    pooled_m2 = np.bincount(codes, m2 + count * (mean - group_mean[codes]) ** 2, groups)
+    return _sample_std(pooled_m2, total)
+
+
+class VolatilityTracker:
+    """
+    Per-repository star volatility over snapshot history, updated online.
+
+    A repository's return in a snapshot period is the relative change of its
+    stars since the previous snapshot, and 0 if it did not change, so
+    volatility is comparable between small and large repositories.
+
+    The snapshot store only records repositories that changed, so an update
+    costs time in the number of changed repositories, not all of them: a
+    repository's Welford statistics are brought up to date when it changes,
+    merging in the zero returns of the periods it did not change in one step.
+    The rolling volatility over the last `window` periods is computed from a
+    log of the non-zero returns in the window. Queries complete the
+    statistics of all repositories up to the latest snapshot, vectorized,
+    without reading any snapshot rows.
+
+    Snapshots must be added in date order. Several updates for the same date
+    (e.g. one per crawled language) form one period.
+
+    Args:
+        window (int): The number of periods of the rolling volatility.
+    """
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        # Index of the latest snapshot period, and its date
+        self.period = -1
+        self.last_date = None
+        self.urls = pd.Index([])
+        self.languages = np.empty(0, dtype=object)
+        # Latest stars, and the stars before the latest change (NaN if there was none)
+        self.stars = np.empty(0)
+        self.base = np.empty(0)
+        # Periods in which each repository was first seen and last changed
+        self.first = np.empty(0, dtype=np.int64)
+        self.changed = np.empty(0, dtype=np.int64)
+        # Statistics of the returns of the periods before the latest change
+        self.count = np.empty(0, dtype=np.int64)
+        self.mean = np.empty(0)
+        self.m2 = np.empty(0)
+        # Non-zero returns of recent periods, as (period, repository position, return)
+        self.log_periods = np.empty(0, dtype=np.int64)
+        self.log_positions = np.empty(0, dtype=np.int64)
+        self.log_returns = np.empty(0)
+
+    @classmethod
+    def from_frame(cls, data, window=ROLLING_WINDOW, dates=None):
+        """
+        Build the statistics from snapshot rows.
+
+        Args:
+            data (DataFrame): Rows with 'URL', 'Stars', 'Date' (the snapshot date)
+                and optionally 'Language', e.g. from snapshot_store.read_snapshots(history=True).
+            window (int): See VolatilityTracker.
+            dates (iterable): All snapshot dates of the history, when `data` holds
+                only some of its repositories. Dates without rows still count as
+                periods, so trackers of different repositories can be concatenated.
+
+        Returns:
+            VolatilityTracker: The statistics of all snapshots.
+        """
+        tracker = cls(window)
+        row_dates = pd.to_datetime(data['Date']).to_numpy().astype('datetime64[ns]')
+        order = np.argsort(row_dates, kind='stable')
+        row_dates = row_dates[order]
+        codes, urls = pd.factorize(data['URL'].to_numpy()[order])
+        stars = data['Stars'].to_numpy(dtype=float)[order]
+        languages = data['Language'].to_numpy(dtype=object)[order] if 'Language' in data.columns else None
+        # Register every repository once, so the loop below only touches changed ones
+        tracker._append(pd.Index(urls))
+        timeline = np.unique(row_dates)
+        if dates is not None:
+            snapshot_dates = pd.to_datetime(pd.Series(list(dates))).to_numpy().astype('datetime64[ns]')
+            timeline = np.union1d(timeline, snapshot_dates)
+        bounds = np.searchsorted(row_dates, timeline, side='left')
+        bounds = np.r_[bounds, len(row_dates)]
+        for snapshot_date, start, stop in zip(timeline, bounds[:-1], bounds[1:]):
+            # The last row of a repository within one date wins
+            positions, last = np.unique(codes[start:stop][::-1], return_index=True)
+            rows = stop - 1 - last
+            tracker._apply(positions, stars[rows], None if languages is None else languages[rows],
+                           pd.Timestamp(snapshot_date))
+        return tracker
+
+    @classmethod
+    def concat(cls, trackers):
+        """
+        Combine the statistics of disjoint sets of repositories over the same snapshots.
+
+        Used to merge trackers built in parallel from partitions of the
+        repositories, each with from_frame(..., dates=...) over all snapshot dates.
+
+        Args:
+            trackers (iterable): VolatilityTracker objects with the same window and periods.
+
+        Returns:
+            VolatilityTracker: The statistics of all their repositories.
+
+        Raises:
+            ValueError: If the trackers cover different snapshots or share repositories.
+        """
+        trackers = list(trackers)
+        if not trackers:
+            return cls()
+        first = trackers[0]
+        if any((tracker.window, tracker.period, tracker.last_date) != (first.window, first.period, first.last_date)
+               for tracker in trackers):
+            raise ValueError("Trackers have different windows or snapshot periods")
+        combined = cls(first.window)
+        combined.period = first.period
+        combined.last_date = first.last_date
+        combined.urls = pd.Index(np.concatenate([tracker.urls.to_numpy(dtype=object) for tracker in trackers]))
+        if combined.urls.has_duplicates:
+            raise ValueError("Trackers share repositories")
+        for name in ('languages', 'stars', 'base', 'first', 'changed', 'count', 'mean', 'm2',
+                     'log_periods', 'log_returns'):
+            setattr(combined, name, np.concatenate([getattr(tracker, name) for tracker in trackers]))
+        offsets = np.cumsum([0] + [len(tracker.urls) for tracker in trackers[:-1]])
+        combined.log_positions = np.concatenate([tracker.log_positions + offset
+                                                 for tracker, offset in zip(trackers, offsets)])
+        return combined
+
+    def _append(self, urls):
+        added = len(urls)
+        self.urls = self.urls.append(urls)
+        self.languages = np.concatenate([self.languages, np.full(added, None, dtype=object)])
+        self.stars = np.concatenate([self.stars, np.full(added, np.nan)])
+        self.base = np.concatenate([self.base, np.full(added, np.nan)])
+        self.first = np.concatenate([self.first, np.zeros(added, dtype=np.int64)])
+        self.changed = np.concatenate([self.changed, np.zeros(added, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(added, dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.zeros(added)])
+        self.m2 = np.concatenate([self.m2, np.zeros(added)])
+
+    def _returns(self, positions):
+        base = self.base[positions]
+        with np.errstate(invalid='ignore'):
+            return (self.stars[positions] - base) / np.maximum(base, 1)
+
+    def update(self, data, snapshot_date):
+        """
+        Add the changed repositories of one snapshot.
+
+        Args:
+            data (DataFrame): Rows with 'URL', 'Stars' and optionally 'Language'.
+                Repositories not in it kept their stars.
+            snapshot_date (date): The date of the snapshot.
+
+        Raises:
+            ValueError: If the snapshot is older than the latest one.
+        """
+        data = data.drop_duplicates('URL', keep='last')
+        positions = self.urls.get_indexer(data['URL'])
+        new = positions < 0
+        if new.any():
+            positions[new] = np.arange(len(self.urls), len(self.urls) + int(new.sum()))
+            self._append(pd.Index(data['URL'][new]))
+        languages = data['Language'].to_numpy(dtype=object) if 'Language' in data.columns else None
+        self._apply(positions, data['Stars'].to_numpy(dtype=float), languages, pd.Timestamp(snapshot_date))
+
+    def _apply(self, positions, stars, languages, snapshot_date):
+        if self.last_date is not None and snapshot_date < self.last_date:
+            raise ValueError("Snapshots must be added in date order")
+        if self.last_date is None or snapshot_date > self.last_date:
+            self.period += 1
+            self.last_date = snapshot_date
+            # Returns that left the rolling window are no longer needed
+            keep = self.log_periods > self.period - self.window
+            self.log_periods = self.log_periods[keep]
+            self.log_positions = self.log_positions[keep]
+            self.log_returns = self.log_returns[keep]
+        period = self.period
+
+        seen = ~np.isnan(self.stars[positions])
+        fresh = positions[~seen]
+        self.first[fresh] = period
+        self.changed[fresh] = period
+
+        # Repositories that changed in an earlier period: fold in the return of
+        # that change and the zero returns since, then start a new change
+        moved = positions[seen & (self.changed[positions] < period)]
+        if len(moved):
+            returns = self._returns(moved)
+            count, mean, m2 = _add_value(self.count[moved], self.mean[moved], self.m2[moved], returns)
+            zeros = period - self.changed[moved] - 1
+            self.count[moved], self.mean[moved], self.m2[moved] = _add_zeros(count, mean, m2, zeros)
+            logged = (returns != 0) & ~np.isnan(returns) & (self.changed[moved] > period - self.window)
+            self.log_periods = np.concatenate([self.log_periods, self.changed[moved][logged]])
+            self.log_positions = np.concatenate([self.log_positions, moved[logged]])
+            self.log_returns = np.concatenate([self.log_returns, returns[logged]])
+            self.base[moved] = self.stars[moved]
+            self.changed[moved] = period
+
+        self.stars[positions] = stars
+        if languages is not None:
+            known = pd.notna(languages)
+            self.languages[positions[known]] = languages[known]
+
+    def _totals(self):
+        """
+        Return the count, mean and squared deviations of all returns up to the latest snapshot.
+        """
+        count, mean, m2 = _add_value(self.count, self.mean, self.m2, self._returns(slice(None)))
+        return _add_zeros(count, mean, m2, self.period - self.changed)
+
+    def _window(self):
+        """
+        Return the count, mean and squared deviations of the returns of the last `window` periods.
+        """
+        start = self.period - self.window
+        count = (self.period - np.maximum(self.first, start)).clip(min=0)
+        in_window = self.log_periods > start
+        positions = self.log_positions[in_window]
+        returns = self.log_returns[in_window]
+        # The return of each repository's latest change is not logged yet
+        pending = self._returns(slice(None))
+        pending = np.where((self.changed > start) & ~np.isnan(pending), pending, 0.0)
+        total = np.bincount(positions, returns, len(self.urls)) + pending
+        squares = np.bincount(positions, returns ** 2, len(self.urls)) + pending ** 2
+        mean = np.divide(total, count, out=np.zeros(len(count)), where=count > 0)
+        return count, mean, squares - mean * total
+
+    def statistics(self):
+        """
+        Return the volatility of every repository.
+
+        Returns:
+            DataFrame: Indexed by URL, with the 'Language', the latest 'Stars',
+            the number of returns ('Observations'), the standard deviation of
+            all returns ('Volatility') and of the returns of the last `window`
+            periods ('Rolling Volatility'). Volatilities need two returns and
+            are NaN before.
+        """
+        return self._statistics(slice(None))
+
+    def _statistics(self, positions):
+        count, _, m2 = self._totals()
+        window_count, _, window_m2 = self._window()
+        return pd.DataFrame({
+            'Language': self.languages[positions],
+            'Stars': self.stars[positions],
+            'Observations': count[positions],
+            'Volatility': _sample_std(m2, count)[positions],
+            'Rolling Volatility': _sample_std(window_m2, window_count)[positions],
+        }, index=self.urls[positions].rename('URL'), columns=STATISTICS)
+
+    def top_volatile(self, k=10, by='Rolling Volatility', language=None, min_observations=2):
+        """
+        Return the k most volatile repositories.
+
+        Args:
+            k (int): The number of repositories.
+            by (str): 'Rolling Volatility' or 'Volatility'.
+            language (str): Only consider repositories in this language.
+            min_observations (int): Only consider repositories with at least this many returns.
+
+        Returns:
+            DataFrame: The rows of statistics() for the repositories, most volatile
+            first and equally volatile ones by URL.
+        """
+        count, _, m2 = self._totals()
+        if by == 'Rolling Volatility':
+            window_count, _, window_m2 = self._window()
+            volatility = _sample_std(window_m2, window_count)
+        else:
+            volatility = _sample_std(m2, count)
+        selected = (count >= min_observations) & ~np.isnan(volatility)
+        if language is not None:
+            codes, languages = pd.factorize(self.languages)
+            matches = [index for index, name in enumerate(languages) if str(name).lower() == language.lower()]
+            selected &= np.isin(codes, matches)
+        candidates = np.flatnonzero(selected)
+        if len(candidates) > k:
+            # Partial selection of the k largest, without sorting all repositories;
+            # ties with the k-th are broken by URL, so concatenated trackers agree
+            values = volatility[candidates]
+            threshold = np.partition(values, len(values) - k)[len(values) - k]
+            above = candidates[values > threshold]
+            tied = candidates[values == threshold]
+            tied = tied[self.urls[tied].argsort()[:k - len(above)]]
+            candidates = np.concatenate([above, tied])
+        top = self._statistics(candidates)
+        return top.sort_values([by, 'URL'], ascending=[False, True], kind='stable')
+
+    def language_volatility(self):
+        """
+        Return the volatility of the returns of all repositories per language.
+
+        Returns:
+            DataFrame: Indexed by Language, with the number of 'Repositories',
+            'Observations' and the pooled 'Volatility' and 'Rolling Volatility'.
+        """
+        count, mean, m2 = self._totals()
+        window_count, window_mean, window_m2 = self._window()
+        codes, languages = pd.factorize(self.languages, sort=True)
+        groups = len(languages)
+        return pd.DataFrame({
+            'Repositories': np.bincount(codes[codes >= 0], minlength=groups),
+            'Observations': np.bincount(codes[codes >= 0], count[codes >= 0], groups).astype(np.int64),
+            'Volatility': _pooled_std(codes, groups, count, mean, m2),
+            'Rolling Volatility': _pooled_std(codes, groups, window_count, window_mean, window_m2),
+        }, index=pd.Index(languages, name='Language'))
+
+    def save(self, path):
+        """
+        Write the statistics to a directory of Parquet files, replacing any previous version.
+
+        Args:
+            path (str): The directory.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        tmp_path = os.path.join(parent, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp_path)
+        pd.DataFrame({
+            'URL': self.urls,
+            'Language': self.languages,
+            'Stars': self.stars,
+            'Base': self.base,
+            'First': self.first,
+            'Changed': self.changed,
+            'Count': self.count,
+            'Mean': self.mean,
+            'M2': self.m2,
+        }).to_parquet(os.path.join(tmp_path, 'repositories.parquet'), index=False)
+        pd.DataFrame({
+            'Period': self.log_periods,
+            'Position': self.log_positions,
+            'Return': self.log_returns,
+        }).to_parquet(os.path.join(tmp_path, 'returns.parquet'), index=False)
+        with open(os.path.join(tmp_path, 'state.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'window': self.window,
+                'period': self.period,
+                'last_date': None if self.last_date is None else self.last_date.date().isoformat(),
+            }, f)
+        old_path = None
+        if os.path.exists(path):
+            old_path = f"{tmp_path}.old"
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        if old_path is not None:
+            for name in os.listdir(old_path):
+                os.remove(os.path.join(old_path, name))
+            os.rmdir(old_path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read statistics written by save().
+
+        Args:
+            path (str): The directory.
+
+        Returns:
+            VolatilityTracker: The statistics.
+        """
+        with open(os.path.join(path, 'state.json'), encoding='utf-8') as f:
+            state = json.load(f)
+        tracker = cls(state['window'])
+        tracker.period = state['period']
+        tracker.last_date = None if state['last_date'] is None else pd.Timestamp(state['last_date'])
+        repositories = pd.read_parquet(os.path.join(path, 'repositories.parquet'))
+        tracker.urls = pd.Index(repositories['URL'])
+        tracker.languages = repositories['Language'].to_numpy(dtype=object, copy=True)
+        tracker.stars = repositories['Stars'].to_numpy(dtype=float, copy=True)
+        tracker.base = repositories['Base'].to_numpy(dtype=float, copy=True)
+        tracker.first = repositories['First'].to_numpy(dtype=np.int64, copy=True)
+        tracker.changed = repositories['Changed'].to_numpy(dtype=np.int64, copy=True)
+        tracker.count = repositories['Count'].to_numpy(dtype=np.int64, copy=True)
+        tracker.mean = repositories['Mean'].to_numpy(dtype=float, copy=True)
+        tracker.m2 = repositories['M2'].to_numpy(dtype=float, copy=True)
+        returns = pd.read_parquet(os.path.join(path, 'returns.parquet'))
+        tracker.log_periods = returns['Period'].to_numpy(dtype=np.int64, copy=True)
+        tracker.log_positions = returns['Position'].to_numpy(dtype=np.int64, copy=True)
+        tracker.log_returns = returns['Return'].to_numpy(dtype=float, copy=True)
+        return tracker